@@ -16,6 +16,12 @@
 # Standard imports
 import sys
 import copy
+import importlib
+from types import MappingProxyType
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 # Third party imports
 import openstack.exceptions
@@ -24,27 +30,9 @@ from cloudify.exceptions import NonRecoverableError
 from cloudify import ctx as _ctx
 
 # Local imports
-from openstack_plugin.constants import USE_EXTERNAL_RESOURCE_PROPERTY
-from openstack_sdk.resources.compute import (OpenstackFlavor,
-                                             OpenstackHostAggregate,
-                                             OpenstackKeyPair,
-                                             OpenstackServer,
-                                             OpenstackServerGroup)
-
-from openstack_sdk.resources.identity import (OpenstackUser,
-                                              OpenstackProject,
-                                              OpenstackDomain)
-
-from openstack_sdk.resources.networks import (OpenstackFloatingIP,
-                                              OpenstackNetwork,
-                                              OpenstackPort,
-                                              OpenstackRBACPolicy,
-                                              OpenstackRouter,
-                                              OpenstackSecurityGroup,
-                                              OpenstackSubnet)
-
-from openstack_sdk.resources.volume import OpenstackVolume
-from openstack_sdk.resources.images import OpenstackImage
+from openstack_sdk._compat import text_type
+from openstack_plugin.constants import (USE_EXTERNAL_RESOURCE_PROPERTY,
+                                        COMPAT_RESOURCE_IDS)
 from openstack_plugin.constants import (CLOUDIFY_CREATE_OPERATION,
                                         CLOUDIFY_LIST_OPERATION,
                                         CLOUDIFY_UPDATE_OPERATION,
@@ -366,6 +354,90 @@ DEPRECATED_CONFIG = DEPRECATED_CLINE_CONFIG + DEPRECATED_ARGS
 
 OLD_ROUTER_NODE = 'cloudify.openstack.nodes.Router'
 
+# Compat methods used to transform openstack plugin 2.x node types
+TRANSFORMATION_HANDLER_MAP = MappingProxyType({
+    'cloudify.openstack.nodes.Flavor': '_transform_flavor',
+    'cloudify.openstack.nodes.HostAggregate': '_transform_aggregate',
+    'cloudify.openstack.nodes.Image': '_transform_image',
+    'cloudify.openstack.nodes.KeyPair': '_transform_keypair',
+    'cloudify.openstack.nodes.ServerGroup': '_transform_server_group',
+    'cloudify.openstack.nodes.User': '_transform_user',
+    'cloudify.openstack.nodes.Project': '_transform_project',
+    'cloudify.openstack.nodes.Volume': '_transform_volume',
+    'cloudify.openstack.nodes.Server': '_transform_server',
+    'cloudify.openstack.nodes.Network': '_transform_network',
+    'cloudify.openstack.nodes.Subnet': '_transform_subnet',
+    'cloudify.openstack.nodes.Port': '_transform_port',
+    'cloudify.openstack.nodes.FloatingIP': '_transform_floating_ip',
+    'cloudify.openstack.nodes.Router': '_transform_router',
+    'cloudify.openstack.nodes.Routes': '_transform_routes',
+    'cloudify.openstack.nodes.SecurityGroup': '_transform_security_group',
+    'cloudify.openstack.nodes.RBACPolicy': '_transform_rbac_policy'
+})
+
+# Resource classes are imported on first use, importing all of them loads
+# the resource modules of every openstack service while most operations
+# do not need any of them
+RESOURCE_CLASS_PATHS = MappingProxyType({
+    'flavor': 'openstack_sdk.resources.compute.OpenstackFlavor',
+    'aggregate': 'openstack_sdk.resources.compute.OpenstackHostAggregate',
+    'image': 'openstack_sdk.resources.images.OpenstackImage',
+    'keypair': 'openstack_sdk.resources.compute.OpenstackKeyPair',
+    'server': 'openstack_sdk.resources.compute.OpenstackServer',
+    'server_group': 'openstack_sdk.resources.compute.OpenstackServerGroup',
+    'user': 'openstack_sdk.resources.identity.OpenstackUser',
+    'project': 'openstack_sdk.resources.identity.OpenstackProject',
+    'floatingip': 'openstack_sdk.resources.networks.OpenstackFloatingIP',
+    'network': 'openstack_sdk.resources.networks.OpenstackNetwork',
+    'port': 'openstack_sdk.resources.networks.OpenstackPort',
+    'rbac_policy': 'openstack_sdk.resources.networks.OpenstackRBACPolicy',
+    'router': 'openstack_sdk.resources.networks.OpenstackRouter',
+    'security_group':
+        'openstack_sdk.resources.networks.OpenstackSecurityGroup',
+    'subnet': 'openstack_sdk.resources.networks.OpenstackSubnet',
+    'volume': 'openstack_sdk.resources.volume.OpenstackVolume'
+})
+
+DOMAIN_RESOURCE_CLASS_PATH = 'openstack_sdk.resources.identity.OpenstackDomain'
+
+
+def import_resource_class(class_path):
+    """
+    :param str class_path: Dotted path of the resource class
+    :return: Resource class
+    """
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class LazyResourceClassMap(Mapping):
+    """
+    Read-only mapping of openstack types to resource classes, each class is
+    imported the first time it is looked up
+    """
+    def __init__(self, class_paths):
+        self._class_paths = class_paths
+        self._classes = {}
+
+    def __getitem__(self, openstack_type):
+        if openstack_type not in self._classes:
+            self._classes[openstack_type] = \
+                import_resource_class(self._class_paths[openstack_type])
+        return self._classes[openstack_type]
+
+    def __iter__(self):
+        return iter(self._class_paths)
+
+    def __len__(self):
+        return len(self._class_paths)
+
+
+RESOURCE_CLASS_MAP = LazyResourceClassMap(RESOURCE_CLASS_PATHS)
+
+# Transformation handler names resolved for each node type hierarchy, so the
+# hierarchy is only walked once per node type in the current process
+_transformation_handler_cache = {}
+
 
 class Compat(object):
     def __init__(self, context, **kwargs):
@@ -382,49 +454,13 @@ class Compat(object):
 
     @property
     def transformation_handler_map(self):
-        return {
-            'cloudify.openstack.nodes.Flavor': self._transform_flavor,
-            'cloudify.openstack.nodes.HostAggregate':
-                self._transform_aggregate,
-            'cloudify.openstack.nodes.Image': self._transform_image,
-            'cloudify.openstack.nodes.KeyPair': self._transform_keypair,
-            'cloudify.openstack.nodes.ServerGroup':
-                self._transform_server_group,
-            'cloudify.openstack.nodes.User': self._transform_user,
-            'cloudify.openstack.nodes.Project': self._transform_project,
-            'cloudify.openstack.nodes.Volume': self._transform_volume,
-            'cloudify.openstack.nodes.Server': self._transform_server,
-            'cloudify.openstack.nodes.Network': self._transform_network,
-            'cloudify.openstack.nodes.Subnet': self._transform_subnet,
-            'cloudify.openstack.nodes.Port': self._transform_port,
-            'cloudify.openstack.nodes.FloatingIP': self._transform_floating_ip,
-            'cloudify.openstack.nodes.Router': self._transform_router,
-            'cloudify.openstack.nodes.Routes': self._transform_routes,
-            'cloudify.openstack.nodes.SecurityGroup':
-                self._transform_security_group,
-            'cloudify.openstack.nodes.RBACPolicy': self._transform_rbac_policy
-        }
+        return {node_type: getattr(self, handler_name)
+                for node_type, handler_name
+                in TRANSFORMATION_HANDLER_MAP.items()}
 
     @property
     def resource_class_map(self):
-        return {
-            'flavor': OpenstackFlavor,
-            'aggregate': OpenstackHostAggregate,
-            'image': OpenstackImage,
-            'keypair': OpenstackKeyPair,
-            'server': OpenstackServer,
-            'server_group': OpenstackServerGroup,
-            'user': OpenstackUser,
-            'project': OpenstackProject,
-            'floatingip': OpenstackFloatingIP,
-            'network': OpenstackNetwork,
-            'port': OpenstackPort,
-            'rbac_policy': OpenstackRBACPolicy,
-            'router': OpenstackRouter,
-            'security_group': OpenstackSecurityGroup,
-            'subnet': OpenstackSubnet,
-            'volume': OpenstackVolume
-        }
+        return RESOURCE_CLASS_MAP
 
     @property
     def openstack_config(self):
@@ -482,14 +518,18 @@ class Compat(object):
         :return: Handler object in order to transform data to support
         openstack version 3
         """
-
-        for node_type in self._type_hierarchy:
-            handler_node = self.transformation_handler_map.get(node_type)
-            if handler_node:
-                return handler_node
-
-        raise NonRecoverableError(
-            'Invalid openstack node type {0}'.format(self._type))
+        type_hierarchy = tuple(self._type_hierarchy)
+        handler_name = _transformation_handler_cache.get(type_hierarchy)
+        if not handler_name:
+            for node_type in type_hierarchy:
+                handler_name = TRANSFORMATION_HANDLER_MAP.get(node_type)
+                if handler_name:
+                    break
+            else:
+                raise NonRecoverableError(
+                    'Invalid openstack node type {0}'.format(self._type))
+            _transformation_handler_cache[type_hierarchy] = handler_name
+        return getattr(self, handler_name)
 
     def get_openstack_resource_id(self,
                                   class_resource,
@@ -505,20 +545,48 @@ class Compat(object):
         :param resource_name_or_id: The name | id of the resource requested
         :return str: The uuid resource
         """
+        runtime_properties = self.context.instance.runtime_properties
+        resource_ids = runtime_properties.get(COMPAT_RESOURCE_IDS) or {}
+        resource_key = '{0}:{1}'.format(resource_type, resource_name_or_id)
         resource = class_resource(client_config=self.openstack_config,
                                   logger=self.logger)
+        find_resource = getattr(resource, 'find_{0}'.format(resource_type))
+        cached_id = resource_ids.get(resource_key)
+        if cached_id:
+            # The cached id is checked using a lookup by id, it is dropped
+            # once the resource is deleted or renamed, i.e. when a new image
+            # is uploaded under the same name
+            try:
+                remote_instance = find_resource(cached_id)
+            except openstack.exceptions.NotFoundException:
+                remote_instance = None
+            if remote_instance and resource_name_or_id in (
+                    remote_instance.id, remote_instance.name):
+                return cached_id
+            self.logger.debug('Resolved id {0} of {1} is stale'.format(
+                cached_id, resource_key))
+            resource_ids = dict(resource_ids)
+            del resource_ids[resource_key]
+            runtime_properties[COMPAT_RESOURCE_IDS] = resource_ids
+
         try:
-            remote_instance = \
-                getattr(resource,
-                        'find_{0}'.format(resource_type))(resource_name_or_id)
+            remote_instance = find_resource(resource_name_or_id)
         except openstack.exceptions.NotFoundException as error:
             _, _, tb = sys.exc_info()
             if is_create_if_missing(self.context):
+                # The resource may be created later, so the missing id is
+                # not kept for the next operations
                 return None
             raise NonRecoverableError(
                 'Failure while trying to request '
                 'Openstack API: {}'.format(error.message),
                 causes=[exception_to_error_cause(error, tb)])
+        # Keep the resolved id, so that the next operations do not need to
+        # lookup the resource by its name again
+        if isinstance(remote_instance.id, text_type):
+            resource_ids = dict(resource_ids)
+            resource_ids[resource_key] = remote_instance.id
+            runtime_properties[COMPAT_RESOURCE_IDS] = resource_ids
         return remote_instance.id
 
     def populate_resource_id(self, openstack_type, properties):
@@ -537,7 +605,7 @@ class Compat(object):
             resource_id = self._properties['resource_id']
             if self._properties.get(USE_EXTERNAL_RESOURCE_PROPERTY):
                 # Get the class corresponding to the resource type provided
-                class_resource = self.resource_class_map[openstack_type]
+                class_resource = RESOURCE_CLASS_MAP[openstack_type]
                 # In the old plugin, resource_id could be a resource id or
                 # could be a name, so before send that to the 3.x plugin we
                 # should make sure that the plugin has the "id" translated
@@ -640,7 +708,7 @@ class Compat(object):
             elif sg_rule.get('remote_group_name'):
                 sg_rule['remote_group_id'] =\
                     self.get_openstack_resource_id(
-                        OpenstackSecurityGroup,
+                        RESOURCE_CLASS_MAP['security_group'],
                         'security_group',
                         sg_rule['remote_group_name'])
                 del sg_rule['remote_group_name']
@@ -658,6 +726,25 @@ class Compat(object):
         consistent with plugin 3.x
         :param str openstack_type: Openstack object type.
         """
+        self._process_common_operation_inputs()
+
+        if 'args' in self.kwargs and not self.kwargs['args']:
+            del self.kwargs['args']
+
+        if self.operation_name == CLOUDIFY_CREATE_OPERATION:
+            self._process_create_operation_inputs(openstack_type)
+
+        if self.kwargs.get('args'):
+            if self.operation_name == CLOUDIFY_LIST_OPERATION:
+                self._process_list_operation_inputs(openstack_type)
+            elif self.is_update_operation:
+                self._process_update_operation_inputs(openstack_type)
+
+    def _process_common_operation_inputs(self):
+        """
+        This method will merge the openstack config & resource id provided
+        via interface operations inputs with node properties
+        """
         # For all operations, old plugin allow to override the resource_id &
         # openstack_config via interface operations inputs, so these need to
         # handle and merge/update with the one provided using node properties
@@ -676,18 +763,6 @@ class Compat(object):
             elif openstack_config.get(item):
                 openstack_config.pop(item)
 
-        if 'args' in self.kwargs and not self.kwargs['args']:
-            del self.kwargs['args']
-
-        if self.operation_name == CLOUDIFY_CREATE_OPERATION:
-            self._process_create_operation_inputs(openstack_type)
-
-        if self.kwargs.get('args'):
-            if self.operation_name == CLOUDIFY_LIST_OPERATION:
-                self._process_list_operation_inputs(openstack_type)
-            elif self.is_update_operation:
-                self._process_update_operation_inputs(openstack_type)
-
     def _process_create_operation_inputs(self, openstack_type):
         """
         This method will lookup the args provided from input opertaions and
@@ -784,9 +859,10 @@ class Compat(object):
         elif openstack_type in ['user', 'project']:
             domain = self.kwargs['args'].pop('domain', None)
             if domain:
-                domain_id = self.get_openstack_resource_id(OpenstackDomain,
-                                                           'domain',
-                                                           domain)
+                domain_id = self.get_openstack_resource_id(
+                    import_resource_class(DOMAIN_RESOURCE_CLASS_PATH),
+                    'domain',
+                    domain)
                 self.kwargs['args']['domain_id'] = domain_id
 
         params = dict()
@@ -864,14 +940,14 @@ class Compat(object):
         image = config.get('image')
         if flavor:
             flavor_id = \
-                self.get_openstack_resource_id(OpenstackFlavor,
+                self.get_openstack_resource_id(RESOURCE_CLASS_MAP['flavor'],
                                                'flavor',
                                                flavor)
             config['flavor_id'] = flavor_id
             del config['flavor']
         if image:
             image_id = \
-                self.get_openstack_resource_id(OpenstackImage,
+                self.get_openstack_resource_id(RESOURCE_CLASS_MAP['image'],
                                                'image',
                                                image)
             config['image_id'] = image_id or ''
@@ -903,21 +979,20 @@ class Compat(object):
         """
         for key, value in list(config.items()):
             if key == 'user':
-                user_id = self.get_openstack_resource_id(OpenstackUser,
-                                                         'user',
-                                                         value)
+                user_id = self.get_openstack_resource_id(
+                    RESOURCE_CLASS_MAP['user'], 'user', value)
                 config.pop('user')
                 config['user'] = user_id
             elif key == 'domain':
-                domain_id = self.get_openstack_resource_id(OpenstackDomain,
-                                                           'domain',
-                                                           value)
+                domain_id = self.get_openstack_resource_id(
+                    import_resource_class(DOMAIN_RESOURCE_CLASS_PATH),
+                    'domain',
+                    value)
                 config.pop('domain')
                 config['domain_id'] = domain_id
             elif key == 'default_project':
-                project_id = self.get_openstack_resource_id(OpenstackProject,
-                                                            'project',
-                                                            value)
+                project_id = self.get_openstack_resource_id(
+                    RESOURCE_CLASS_MAP['project'], 'project', value)
                 config.pop('default_project')
                 config['default_project_id'] = project_id
             elif key not in allowed_params:
@@ -933,21 +1008,20 @@ class Compat(object):
         """
         for key, value in list(config.items()):
             if key == 'project':
-                project_id = self.get_openstack_resource_id(OpenstackProject,
-                                                            'project',
-                                                            value)
+                project_id = self.get_openstack_resource_id(
+                    RESOURCE_CLASS_MAP['project'], 'project', value)
                 config.pop('project')
                 config['project'] = project_id
             elif key == 'parent':
-                parent_id = self.get_openstack_resource_id(OpenstackProject,
-                                                           'project',
-                                                           value)
+                parent_id = self.get_openstack_resource_id(
+                    RESOURCE_CLASS_MAP['project'], 'project', value)
                 config.pop('parent')
                 config['parent_id'] = parent_id
             elif key == 'domain':
-                domain_id = self.get_openstack_resource_id(OpenstackDomain,
-                                                           'domain',
-                                                           value)
+                domain_id = self.get_openstack_resource_id(
+                    import_resource_class(DOMAIN_RESOURCE_CLASS_PATH),
+                    'domain',
+                    value)
                 config.pop('domain')
                 config['domain_id'] = domain_id
             elif key not in allowed_params:
@@ -1143,7 +1217,7 @@ class Compat(object):
                                           'because router id is not missing')
             if not router_id:
                 router_id = self.get_openstack_resource_id(
-                    OpenstackRouter,
+                    RESOURCE_CLASS_MAP['router'],
                     'router',
                     properties['resource_config']['name'])
 
@@ -1183,7 +1257,10 @@ class Compat(object):
     def transform(self):
         """
         This method will do the transform operation to get a compatible
-        openstack version 3 properties based on the current node type
+        openstack version 3 properties based on the current node type. Only
+        the ids resolved from resource names are kept as hidden runtime
+        property, so that the retries and the next operations skip the
+        lookups while the transformation itself is always done again
         :return dict: Compatible openstack version 3 properties
         """
         handler_v2 = self.lookup_handler_for_openstack_node_v2()
@@ -25,6 +25,9 @@ USE_EXTERNAL_RESOURCE_PROPERTY = 'use_external_resource'
 CREATE_IF_MISSING_PROPERTY = 'create_if_missing'
 CONDITIONALLY_CREATED = 'conditionally_created'
 USE_COMPACT_NODE = 'use_compact_node'
+# Hidden runtime property which caches the ids resolved by the
+# transformation of 2.x nodes
+COMPAT_RESOURCE_IDS = '__compat_resource_ids'
 SERVER_TASK_CREATE = 'create_server_task'
 SERVER_TASK_STOP = 'stop_server_task'
 SERVER_TASK_DELETE = 'delete_server_task'
@@ -33,6 +36,11 @@ SERVER_TASK_STATE = 'task_state'
 SERVER_TASK_BACKUP_DONE = 'backup_done'
 SERVER_TASK_RESTORE_STATE = 'restore_state'
 SERVER_INTERFACE_IDS = 'interfaces'
+SERVER_POOL_CONFIG = 'server_pool'
+SERVER_POOL_NAME_PROPERTY = 'server_pool_name'
+FLOATING_IP_POOL_CONFIG = 'floating_ip_pool'
+FLOATING_IP_POOL_NAME_PROPERTY = 'floating_ip_pool_name'
+FLOATING_IP_POOL_CLAIMS = 'floating_ip_pool_claims'
 VOLUME_TASK_DELETE = 'delete_volume_task'
 VOLUME_ATTACHMENT_TASK = 'attach_volume_task'
 VOLUME_DETACHMENT_TASK = 'detach_volume_task'
@@ -41,6 +49,9 @@ VOLUME_SNAPSHOT_TASK = 'snapshot_volume_task'
 VOLUME_SNAPSHOT_ID = 'snapshot_id'
 VOLUME_BACKUP_ID = 'backup_id'
 VOLUME_ATTACHMENT_ID = 'attachment_id'
+SECURITY_GROUP_CREATED_RULES = 'created_rules'
+SECURITY_GROUP_FAILED_RULES = 'failed_rules'
+SECURITY_GROUP_DEFAULT_RULES_REMOVED = 'default_rules_removed'
 
 # Openstack Server status constants.
 # Full lists here: https://bit.ly/2UyB5V5 # NOQA
@@ -52,6 +63,7 @@ SERVER_STATUS_ERROR = 'ERROR'
 SERVER_STATUS_REBOOT = 'REBOOT'
 SERVER_STATUS_HARD_REBOOT = 'HARD_REBOOT'
 SERVER_STATUS_UNKNOWN = 'UNKNOWN'
+SERVER_TASK_STATE_DELETING = 'deleting'
 
 # Openstack volume attachment status constants
 VOLUME_STATUS_CREATING = 'creating'
@@ -106,6 +118,8 @@ PORT_NODE_TYPE = 'cloudify.nodes.openstack.Port'
 SUBNET_NODE_TYPE = 'cloudify.nodes.openstack.Subnet'
 VOLUME_NODE_TYPE = 'cloudify.nodes.openstack.Volume'
 SECURITY_GROUP_NODE_TYPE = 'cloudify.nodes.openstack.SecurityGroup'
+SERVER_POOL_NODE_TYPE = 'cloudify.nodes.openstack.ServerPool'
+FLOATING_IP_POOL_NODE_TYPE = 'cloudify.nodes.openstack.FloatingIPPool'
 
 # Cloudify relationship types
 RBAC_POLICY_RELATIONSHIP_TYPE = \
@@ -127,6 +141,15 @@ OPENSTACK_NETWORK_ID = 'net_id'
 PS_OPEN = '<powershell>'
 PS_CLOSE = '</powershell>'
 INFINITE_RESOURCE_QUOTA = -1
+SECURITY_GROUP_RULES_CHUNK_SIZE = 100
+# Map protocol numbers to the names used by neutron for security group rules
+SECURITY_GROUP_RULE_PROTOCOLS = {
+    '1': 'icmp',
+    '6': 'tcp',
+    '17': 'udp',
+    '58': 'ipv6-icmp',
+    'icmpv6': 'ipv6-icmp',
+}
 SERVER_ACTION_STATUS_DONE = 'DONE'
 SERVER_ACTION_STATUS_PENDING = 'PENDING'
 SERVER_REBUILD_STATUS = 'rebuild_done'
@@ -161,6 +184,18 @@ SERVER_IP_PROPERTY = 'ip'
 KEY_USE_CFY_LOGGER = 'use_cfy_logger'
 KEY_GROUPS = 'groups'
 KEY_LOGGERS = 'loggers'
+KEY_BUFFER = 'buffer'
+DEFAULT_LOGGING_BUFFER_CONFIG = {
+    # Records are forwarded synchronously unless it is enabled explicitly
+    'enabled': False,
+    # Maximum number of records waiting to be forwarded
+    'queue_size': 1000,
+    # Maximum number of records forwarded on each wake up
+    'batch_size': 100,
+    # Once the queue is 80% full only one of "sample_rate" debug records is
+    # kept
+    'sample_rate': 10,
+}
 PRIVATE_KEY_PREFIX = '-----BEGIN'
 
 DEFAULT_LOGGING_CONFIG = {
@@ -181,3 +216,50 @@ LOGGING_GROUPS = {
         'openstack.fnmatch',
     ]
 }
+
+# Runtime payload config for the resource payload stored as runtime property
+RUNTIME_PAYLOAD_CONFIG = 'runtime_payload'
+DEFAULT_RUNTIME_PAYLOAD_CONFIG = {
+    # Keep only the fields listed in RESOURCE_PAYLOAD_FIELDS
+    'projection': False,
+    # Fields to keep in addition to RESOURCE_PAYLOAD_FIELDS
+    'extra_fields': [],
+    # Fields larger than this size (in bytes) are compressed, 0 disables it
+    'compress_threshold': 0,
+    # Maximum size (in bytes) of the whole payload, 0 disables it
+    'max_size': 0,
+}
+RESOURCE_PAYLOAD_SENSITIVE_FIELDS = ('user_data', 'adminPass')
+# Fields which are never compressed nor dropped when the payload exceeds its
+# maximum size, "networks" is read back by the plugin operations
+RESOURCE_PAYLOAD_REQUIRED_FIELDS = ('id', 'name', 'status', 'networks')
+RESOURCE_PAYLOAD_FIELDS = {
+    SERVER_OPENSTACK_TYPE: (
+        'id',
+        'name',
+        'status',
+        'addresses',
+        'access_ipv4',
+        'access_ipv6',
+        'availability_zone',
+        'flavor',
+        'image',
+        'key_name',
+        'metadata',
+        'networks',
+        'security_groups',
+        'attached_volumes',
+        'host_id',
+        'hypervisor_hostname',
+        'power_state',
+        'vm_state',
+        'task_state',
+        'project_id',
+        'user_id',
+        'tags',
+        'created_at',
+        'updated_at',
+        'launched_at',
+    ),
+}
+COMPRESSED_PAYLOAD_FIELD = '__zlib_base64__'
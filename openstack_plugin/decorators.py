@@ -15,19 +15,23 @@
 
 # Standard Imports
 import sys
+import time
 
 # Third party imports
 from openstack import exceptions
 from cloudify import ctx as CloudifyContext
-from cloudify.exceptions import NonRecoverableError
+from cloudify.exceptions import NonRecoverableError, OperationRetry
 from cloudify.utils import exception_to_error_cause
 from cloudify.decorators import operation
 
 # Local imports
-from openstack_plugin.compat import Compat
 from openstack_sdk.common import (InvalidDomainException,
                                   QuotaException,
                                   InvalidINSecureValue)
+from openstack_sdk.circuit_breaker import CircuitBreakerOpenException
+from openstack_sdk.api_ledger import (start_api_call_ledger,
+                                      stop_api_call_ledger)
+from openstack_sdk.cassette import flush_cassettes
 from openstack_plugin.utils import (
     resolve_ctx,
     get_current_operation,
@@ -36,7 +40,14 @@ from openstack_plugin.utils import (
     update_runtime_properties_for_operation_task,
     update_runtime_properties_for_node_v2,
     is_compat_node,
-    set_external_resource
+    set_external_resource,
+    begin_runtime_properties_transaction,
+    end_runtime_properties_transaction,
+    flush_openstack_logging,
+    report_api_call_ledger,
+    export_operation_metrics,
+    start_operation_profiler,
+    stop_operation_profiler
 )
 # Local imports
 from openstack_plugin.constants import (
@@ -78,6 +89,17 @@ def with_openstack_resource(class_decl,
 
             # Get the current operation name
             operation_name = get_current_operation()
+            # Runtime properties changes are buffered and only written on
+            # checkpoints, the remaining changes are stored by cloudify once
+            # the operation is done
+            begin_runtime_properties_transaction(ctx_node)
+            # Record openstack API calls sent while running the operation
+            start_api_call_ledger(operation_name)
+            started_at = time.time()
+            resource = None
+            operation_error = None
+            # Profiler is only created when profiling is enabled
+            profiler = start_operation_profiler(ctx_node, kwargs)
             try:
                 # Prepare the openstack resource that need to execute the
                 # current task operation
@@ -118,12 +140,41 @@ def with_openstack_resource(class_decl,
                     CLOUDIFY_UPDATE_OPERATION
                 ])
 
+            except CircuitBreakerOpenException as error:
+                # Fail fast while the openstack service is degraded and let
+                # cloudify retry the operation once the circuit is half-open
+                operation_error = OperationRetry(
+                    'Failure while trying to run operation:'
+                    '{0}: {1}'.format(operation_name, error),
+                    retry_after=error.retry_after)
+                raise operation_error
             except EXCEPTIONS as errors:
                 _, _, tb = sys.exc_info()
-                raise NonRecoverableError(
+                operation_error = NonRecoverableError(
                     'Failure while trying to run operation:'
                     '{0}: {1}'.format(operation_name, errors.message),
                     causes=[exception_to_error_cause(errors, tb)])
+                raise operation_error
+            except Exception as error:
+                operation_error = error
+                raise
+            finally:
+                end_runtime_properties_transaction(ctx_node)
+                stop_operation_profiler(ctx, ctx_node, profiler,
+                                        operation_name)
+                ledger = stop_api_call_ledger()
+                client_config = getattr(resource, 'client_config', None)
+                report_api_call_ledger(ctx, ctx_node, ledger, client_config)
+                export_operation_metrics(ctx,
+                                         ctx_node,
+                                         ledger,
+                                         operation_error,
+                                         time.time() - started_at,
+                                         client_config)
+                # Make sure buffered openstack logs are sent and recorded
+                # interactions are written before the operation is done
+                flush_openstack_logging()
+                flush_cassettes()
         return wrapper_inner
     return wrapper_outer
 
@@ -145,6 +196,9 @@ def with_compat_node(func):
         # Check to see if we need to do properties transformation or not
         kwargs_config = {}
         if is_compat_node(ctx_node):
+            # Compat tables and the resource classes they refer to are only
+            # loaded for nodes of version 2.X
+            from openstack_plugin.compat import Compat
             compat = Compat(context=ctx_node, **kwargs)
             kwargs_config = compat.transform()
 
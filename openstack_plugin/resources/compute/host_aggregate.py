@@ -25,7 +25,8 @@ from openstack_plugin.constants import (RESOURCE_ID,
                                         HOST_AGGREGATE_OPENSTACK_TYPE)
 from openstack_plugin.utils import (
     add_resource_list_to_runtime_properties,
-    reset_dict_empty_keys
+    reset_dict_empty_keys,
+    checkpoint_runtime_properties
 )
 # Py2/3 compatibility
 from openstack_sdk._compat import text_type
@@ -61,13 +62,14 @@ def _remove_hosts(openstack_resource, hosts, update_on_remove=False):
     if isinstance(hosts, list):
         updated_hosts = [host for host in hosts]
         for host in hosts:
+            if update_on_remove:
+                # save current state before remove next host
+                checkpoint_runtime_properties(ctx)
             # remove host from the target host aggregate
             openstack_resource.remove_host(host)
             if update_on_remove:
                 updated_hosts.remove(host)
                 ctx.instance.runtime_properties['hosts'] = updated_hosts
-                # save current state before remove next host
-                ctx.instance.update()
     else:
         raise NonRecoverableError(
             'invalid data type {0} for hosts'.format(type(hosts)))
@@ -178,6 +180,8 @@ def delete(openstack_resource):
         _remove_hosts(openstack_resource,
                       ctx.instance.runtime_properties['hosts'],
                       update_on_remove=True)
+        # save current state before delete the aggregate
+        checkpoint_runtime_properties(ctx)
     openstack_resource.delete()
 
 
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 # Standard imports
+import copy
 import json
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_v1_5
@@ -27,6 +28,8 @@ from cloudify.exceptions import (OperationRetry,
 
 # Local imports
 from openstack_sdk.resources.compute import (OpenstackServer,
+                                             OpenstackServerPool,
+                                             OpenstackServerBatch,
                                              OpenstackKeyPair,
                                              OpenstackFlavor)
 
@@ -35,7 +38,10 @@ from openstack_sdk.resources.volume import OpenstackVolume
 from openstack_sdk.resources.networks import (OpenstackPort,
                                               OpenstackNetwork,
                                               OpenstackFloatingIP,
+                                              OpenstackFloatingIPPool,
                                               OpenstackSecurityGroup)
+from openstack_sdk.status_poller import get_polled_status
+from openstack_sdk.file_state import file_lock_supported
 
 from openstack_plugin.decorators import (with_openstack_resource,
                                          with_compat_node,
@@ -64,6 +70,11 @@ from openstack_plugin.constants import (RESOURCE_ID,
                                         SERVER_TASK_STATE,
                                         SERVER_INTERFACE_IDS,
                                         SERVER_ADMIN_PASSWORD,
+                                        SERVER_POOL_CONFIG,
+                                        SERVER_POOL_NAME_PROPERTY,
+                                        SERVER_POOL_NODE_TYPE,
+                                        FLOATING_IP_POOL_CONFIG,
+                                        FLOATING_IP_POOL_CLAIMS,
                                         IMAGE_UPLOADING_PENDING,
                                         IMAGE_STATUS_ACTIVE,
                                         IMAGE_UPLOADING,
@@ -91,6 +102,7 @@ from openstack_plugin.constants import (RESOURCE_ID,
 
 from openstack_plugin.utils import \
     (handle_userdata,
+     get_batch_id,
      validate_resource_quota,
      wait_until_status,
      add_resource_list_to_runtime_properties,
@@ -101,9 +113,23 @@ from openstack_plugin.utils import \
      get_snapshot_name,
      generate_attachment_volume_key,
      assign_resource_payload_as_runtime_properties,
+     decompress_payload_field,
      remove_duplicates_items,
      get_networks_from_relationships,
-     get_security_groups_from_relationships)
+     get_security_groups_from_relationships,
+     checkpoint_runtime_properties,
+     get_relationship_index)
+
+DEFAULT_BATCH_CONFIG = {
+    # If true, servers of node instances which resolve to the same server
+    # configuration are booted using a single multi-create request
+    'enabled': False,
+    # Number of seconds the batch waits for other instances once the first
+    # server is submitted
+    'window': 5,
+    # Maximum number of servers booted on each multi-create request
+    'size': 100,
+}
 
 
 def _stop_server(server):
@@ -119,7 +145,7 @@ def _stop_server(server):
             ctx.instance.runtime_properties[SERVER_TASK_STOP]\
                 = SERVER_ACTION_STATUS_PENDING
             # save flag as current state before external call
-            ctx.instance.update()
+            checkpoint_runtime_properties(ctx)
 
         # Get the server instance to check the status of the server
         server_resource = server.get()
@@ -152,7 +178,7 @@ def _start_server(server):
             ctx.instance.runtime_properties[SERVER_TASK_START]\
                 = SERVER_ACTION_STATUS_PENDING
             # save flag as current state before external call
-            ctx.instance.update()
+            checkpoint_runtime_properties(ctx)
 
         # Get the server instance to check the status of the server
         server = server.get()
@@ -169,8 +195,6 @@ def _start_server(server):
         ctx.logger.info('Server is already started')
         ctx.instance.runtime_properties[SERVER_TASK_START]\
             = SERVER_ACTION_STATUS_DONE
-    # save flag as current state before external call
-    ctx.instance.update()
 
 
 def _set_server_ips_runtime_properties(server):
@@ -337,7 +361,7 @@ def _handle_generate_snapshot(server,
         ctx.instance.runtime_properties[SERVER_TASK_BACKUP_DONE] \
             = SERVER_ACTION_STATUS_PENDING
         # save flag as current state before external call
-        ctx.instance.update()
+        checkpoint_runtime_properties(ctx)
 
     # Wait for finish upload
     is_finished = \
@@ -348,8 +372,6 @@ def _handle_generate_snapshot(server,
     if is_finished:
         ctx.instance.runtime_properties[SERVER_TASK_BACKUP_DONE]\
             = SERVER_ACTION_STATUS_DONE
-        # save flag as current state before external call
-        ctx.instance.update()
 
 
 def _handle_snapshot_restore(server, image_id, snapshot_name):
@@ -390,7 +412,7 @@ def _handle_snapshot_restore(server, image_id, snapshot_name):
             ctx.instance.runtime_properties[SERVER_TASK_RESTORE_STATE] \
                 = SERVER_ACTION_STATUS_PENDING
             # save flag as current state before external call
-            ctx.instance.update()
+            checkpoint_runtime_properties(ctx)
 
     # Only check this logic if the server is already stopped
     if server_status == SERVER_ACTION_STATUS_DONE:
@@ -403,7 +425,7 @@ def _handle_snapshot_restore(server, image_id, snapshot_name):
             ctx.instance.runtime_properties[SERVER_TASK_RESTORE_STATE]\
                 = SERVER_REBUILD_STATUS
             # save flag as current state before external call
-            ctx.instance.update()
+            checkpoint_runtime_properties(ctx)
 
             # Try to start server to be available for usage
             _start_server(server)
@@ -412,8 +434,6 @@ def _handle_snapshot_restore(server, image_id, snapshot_name):
             if server_status == SERVER_ACTION_STATUS_DONE:
                 ctx.instance.runtime_properties[SERVER_TASK_RESTORE_STATE]\
                     = SERVER_ACTION_STATUS_DONE
-                # save flag as current state before external call
-                ctx.instance.update()
 
 
 def _get_image(image_resource, snapshot_name):
@@ -460,9 +480,9 @@ def _get_boot_volume_targets():
     with server so that we can use them for define bootable devices
     """
     targets = []
-    for rel in ctx.instance.relationships:
-        # Get runtime properties for target instance
-        runtime_properties = rel.target.instance.runtime_properties
+    index = get_relationship_index(ctx.instance)
+    for rel, runtime_properties in \
+            zip(index.relationships, index.runtime_properties):
         # Check if the target instance openstack type is volume type and it
         # has bootable runtime property set on the target volume instance
         if runtime_properties.get(OPENSTACK_TYPE_PROPERTY)\
@@ -1207,7 +1227,7 @@ def _disconnect_resources_from_external_server(openstack_resource):
             updated.remove(interface)
             ctx.instance.runtime_properties[SERVER_INTERFACE_IDS] = updated
             # save flag as current state before external call
-            ctx.instance.update()
+            checkpoint_runtime_properties(ctx)
             ctx.logger.info(
                 'Successfully detached network {0} to device (server) id {1}.'
                 .format(interface, openstack_resource.resource_id))
@@ -1332,7 +1352,8 @@ def _disconnect_security_group_from_server_ports(client_config,
     if not server_payload:
         return
 
-    networks = server_payload.get('networks') or []
+    # Payloads stored before the field was exempted may be compressed
+    networks = decompress_payload_field(server_payload.get('networks')) or []
     server_ports = \
         [
             network[PORT_OPENSTACK_TYPE]
@@ -1530,15 +1551,114 @@ def _validate_security_groups_on_ports(server_networks, client_config):
     return False
 
 
-@with_compat_node
-@with_openstack_resource(
-    OpenstackServer,
-    existing_resource_handler=_connect_resources_to_external_server)
-def create(openstack_resource):
+def _get_server_pool(openstack_resource):
     """
-    Create openstack server instance
-    :param openstack_resource: instance of openstack server resource
+    This method will return the server pool connected to the server node
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return tuple: Instance of OpenstackServerPool and the pool configuration
+    or (None, None) if the server is not connected to a pool
+    """
+    pool_rel = \
+        find_relationship_by_node_type(ctx.instance, SERVER_POOL_NODE_TYPE)
+    if not pool_rel:
+        return None, None
+
+    pool_config = \
+        pool_rel.target.instance.runtime_properties.get(SERVER_POOL_CONFIG)
+    if not pool_config:
+        return None, None
+
+    server_pool = OpenstackServerPool(
+        client_config=openstack_resource.client_config,
+        resource_config=pool_config['resource_config'],
+        logger=ctx.logger)
+    return server_pool, pool_config
+
+
+def _claim_server_from_pool(openstack_resource):
+    """
+    This method will claim a server which is already active from the server
+    pool connected to the server node, instead of booting a new server.
+    Claimed servers keep the flavor, image and networks of the pool
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return bool: True if a server is claimed from the pool
+    """
+    server_pool, pool_config = _get_server_pool(openstack_resource)
+    if not server_pool:
+        return False
+
+    # The claim id is the same for retries of the create operation, so that
+    # a server claimed before the operation failed is not claimed twice
+    claim_id = '{0}-{1}'.format(ctx.deployment.id, ctx.instance.id)
+    server_id = server_pool.claim(claim_id)
+    if not server_id:
+        ctx.logger.info('Server pool {0} does not have any available server,'
+                        ' booting a new server'.format(server_pool.name))
+        return False
+
+    ctx.instance.runtime_properties[RESOURCE_ID] = server_id
+    ctx.instance.runtime_properties[SERVER_POOL_NAME_PROPERTY] = \
+        server_pool.name
+    openstack_resource.resource_id = server_id
+    if openstack_resource.name:
+        openstack_resource.update({'name': openstack_resource.name})
+
+    # Security groups are attached to the claimed server in configure
+    # operation, like they are for servers booted by the create operation
+    security_groups = _get_security_groups_config(
+        openstack_resource.config,
+        client_config=openstack_resource.client_config
+    )
+    ctx.instance.runtime_properties['__security_groups_link_to_port'] = False
+    if security_groups:
+        ctx.instance.runtime_properties['security_groups'] = security_groups
+
+    assign_resource_payload_as_runtime_properties(ctx,
+                                                  openstack_resource.get(),
+                                                  SERVER_OPENSTACK_TYPE)
+    ctx.logger.info('Claimed server {0} from server pool {1}'.format(
+        server_id, server_pool.name))
+
+    # Boot a server in place of the claimed server, it is not waited for
+    server_pool.refill(pool_config['size'])
+    return True
+
+
+def _release_server_to_pool(openstack_resource):
+    """
+    This method will return a server claimed from a server pool to the pool
+    instead of deleting it, if the pool recycles its servers and it is not
+    full already
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return bool: True if the server is returned to the pool
     """
+    if not ctx.instance.runtime_properties.get(SERVER_POOL_NAME_PROPERTY):
+        return False
+
+    server_pool, pool_config = _get_server_pool(openstack_resource)
+    if not (server_pool and pool_config.get('recycle')):
+        return False
+
+    return server_pool.release(
+        openstack_resource.resource_id,
+        pool_config['max_size'],
+        ctx.instance.runtime_properties.get('security_groups'))
+
+
+def _update_server_create_config(openstack_resource):
+    """
+    This method will resolve the configuration required to boot the server
+    using the user data, the nodes connected to the server node, flavor and
+    image
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return dict: Runtime properties required by configure operation in
+    order to attach security groups to the server
+    """
+    runtime_properties = {}
     blueprint_user_data = openstack_resource.config.get('user_data')
     user_data = handle_userdata(blueprint_user_data)
 
@@ -1572,11 +1692,133 @@ def create(openstack_resource):
     has_sg = _validate_security_groups_on_ports(
         server_networks, client_config
     )
-    ctx.instance.runtime_properties['__security_groups_link_to_port'] = has_sg
+    runtime_properties['__security_groups_link_to_port'] = has_sg
 
     # Update instance runtime properties to be added later on on start server
     if security_groups:
-        ctx.instance.runtime_properties['security_groups'] = security_groups
+        runtime_properties['security_groups'] = security_groups
+    return runtime_properties
+
+
+def get_batch_config():
+    """
+    This method will return the batch configuration of the current node
+    merged with the default configuration
+    :return dict: Batch configuration
+    """
+    batch_config = dict(DEFAULT_BATCH_CONFIG)
+    batch_config.update(ctx.node.properties.get('batch_config') or {})
+    return batch_config
+
+
+def _get_server_batch(openstack_resource):
+    """
+    This method will return the batch of the current server, servers are
+    batched together only if they are created for the same node using the
+    same configuration and are connected to the same resources, which means
+    their configuration is resolved to the same server configuration
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return: Instance of OpenstackServerBatch
+    """
+    resource_config = ctx.node.properties.get('resource_config') or {}
+    targets = sorted(
+        [
+            rel.type,
+            rel.target.instance.runtime_properties.get(RESOURCE_ID)
+        ]
+        for rel in ctx.instance.relationships
+    )
+    # Servers of the batch are named by nova using the name of the batch and
+    # the index of each server
+    config = copy.deepcopy(openstack_resource.config)
+    config['name'] = resource_config.get('name') or 'server-{0}-{1}'.format(
+        ctx.deployment.id, ctx.node.id.replace('_', '-'))
+    server_batch = OpenstackServerBatch(
+        client_config=openstack_resource.client_config,
+        resource_config=config,
+        logger=ctx.logger)
+    server_batch.batch_id = get_batch_id(ctx,
+                                         openstack_resource.client_config,
+                                         resource_config,
+                                         targets)
+    return server_batch
+
+
+def _boot_server_in_batch(openstack_resource, batch_config):
+    """
+    This method will submit the server to the batch of the current server,
+    the configuration of the batch is resolved once by the instance which
+    boots the batch using a single multi-create request
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :param dict batch_config: Batch configuration of the server node
+    :return bool: True if the server is booted as part of the batch
+    """
+    if not file_lock_supported():
+        ctx.logger.warning('Servers are not booted in batch without file '
+                           'locks, booting server alone')
+        return False
+
+    # The agent init script is different for each node instance
+    if ctx.agent.init_script():
+        ctx.logger.info('Servers which install the agent using init script '
+                        'are not booted in batch, booting server alone')
+        return False
+
+    server_batch = _get_server_batch(openstack_resource)
+    result = server_batch.submit(
+        ctx.instance.id,
+        batch_config['window'],
+        batch_config['size'],
+        prepare=lambda: _update_server_create_config(server_batch))
+    if not result:
+        raise OperationRetry(
+            message='Waiting for server batch {0} to be booted'.format(
+                server_batch.batch_id),
+            retry_after=batch_config['window'])
+
+    if result.get('error'):
+        ctx.logger.warning(
+            'Failed to boot server in batch: {0}, booting it alone'.format(
+                result['error']))
+        return False
+
+    created_resource = result['resource']
+    ctx.instance.runtime_properties.update(result['shared'])
+    ctx.instance.runtime_properties[RESOURCE_ID] = created_resource['id']
+    openstack_resource.resource_id = created_resource['id']
+    assign_resource_payload_as_runtime_properties(ctx,
+                                                  created_resource,
+                                                  SERVER_OPENSTACK_TYPE)
+    ctx.logger.info('Booted server {0} as part of batch {1}'.format(
+        created_resource['id'], server_batch.batch_id))
+    return True
+
+
+@with_compat_node
+@with_openstack_resource(
+    OpenstackServer,
+    existing_resource_handler=_connect_resources_to_external_server)
+def create(openstack_resource):
+    """
+    Create openstack server instance
+    :param openstack_resource: instance of openstack server resource
+    """
+    # Servers connected to a server pool are claimed from the pool, the
+    # server is booted only if the pool does not have any available server
+    if _claim_server_from_pool(openstack_resource):
+        return
+
+    # Servers of scaled nodes can be booted together, the server is booted
+    # once the batch is full or the batch window is elapsed
+    batch_config = get_batch_config()
+    if batch_config['enabled'] and ctx.node.number_of_instances > 1 and \
+            _boot_server_in_batch(openstack_resource, batch_config):
+        return
+
+    ctx.instance.runtime_properties.update(
+        _update_server_create_config(openstack_resource))
 
     # Create resource, At server creation we are not going to attach any
     # security groups here since Adding security groups within create server
@@ -1608,6 +1850,14 @@ def configure(openstack_resource):
     Populate required runtime properties for server when it is in active status
     :param openstack_resource: instance of openstack server resource
     """
+    # Skip the request of the server while the status poller of the
+    # project reports it as not started yet
+    status = get_polled_status(openstack_resource)
+    if status and status not in [SERVER_STATUS_ACTIVE, SERVER_STATUS_ERROR]:
+        raise OperationRetry(
+            message='Waiting for server to be in {0} state but is in {1} '
+                    'state. Retrying...'.format(SERVER_STATUS_ACTIVE, status))
+
     # Get the details for the created servers instance
     server = openstack_resource.get()
 
@@ -1658,6 +1908,10 @@ def delete(openstack_resource):
 
     # Check if delete operation triggered or not before
     if SERVER_TASK_DELETE not in ctx.instance.runtime_properties:
+        if _release_server_to_pool(openstack_resource):
+            ctx.logger.info('Server {0} is returned to its server pool'
+                            .format(server.id))
+            return
         openstack_resource.delete()
         ctx.instance.runtime_properties[SERVER_TASK_DELETE] = True
 
@@ -2018,6 +2272,99 @@ def detach_volume(openstack_resource, **kwargs):
         del ctx.target.instance.runtime_properties[detachment_task_key]
 
 
+def _is_floating_ip_pool_target():
+    """
+    :return bool: True if the target of the relationship is a floating ip
+    pool node
+    """
+    # Only floating ip pool nodes store the pool configuration
+    return FLOATING_IP_POOL_CONFIG in ctx.target.instance.runtime_properties
+
+
+def _get_target_floating_ip_pool(openstack_resource):
+    """
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :return tuple: Instance of OpenstackFloatingIPPool of the target node and
+    the pool configuration
+    """
+    pool_config = \
+        ctx.target.instance.runtime_properties[FLOATING_IP_POOL_CONFIG]
+    floating_ip_pool = OpenstackFloatingIPPool(
+        client_config=openstack_resource.client_config,
+        resource_config=pool_config['resource_config'],
+        logger=ctx.logger)
+    return floating_ip_pool, pool_config
+
+
+def _claim_floating_ip_for_server(openstack_resource, fixed_ip=None):
+    """
+    This method will claim a floating ip from the floating ip pool which is
+    the target of the relationship, the floating ip is associated with the
+    port of the server in the same request. A floating ip is allocated for
+    the pool if it is empty
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    :param str fixed_ip: The fixed IP address to be associated with the
+    floating IP address
+    :return str: The floating ip address
+    """
+    port_id = None
+    for interface in openstack_resource.server_interfaces():
+        ip_addresses = [item.get('ip_address')
+                        for item in interface.fixed_ips or []]
+        if not fixed_ip or fixed_ip in ip_addresses:
+            port_id = interface.port_id
+            break
+    if not port_id:
+        raise NonRecoverableError(
+            'Server {0} does not have a port to associate floating ip with'
+            ''.format(openstack_resource.resource_id))
+
+    floating_ip_pool, _ = _get_target_floating_ip_pool(openstack_resource)
+    claim_id = '{0}-{1}-{2}'.format(ctx.deployment.id,
+                                    ctx.source.instance.id,
+                                    ctx.target.instance.id)
+    claimed = floating_ip_pool.claim(claim_id,
+                                     port_id=port_id,
+                                     fixed_ip_address=fixed_ip)
+    if not claimed:
+        ctx.logger.info('Floating ip pool {0} does not have any available '
+                        'floating ip, allocating a new floating ip'
+                        ''.format(floating_ip_pool.name))
+        claimed = floating_ip_pool.allocate(claim_id,
+                                            port_id=port_id,
+                                            fixed_ip_address=fixed_ip)
+
+    claims = ctx.source.instance.runtime_properties.get(
+        FLOATING_IP_POOL_CLAIMS, {})
+    claims[ctx.target.instance.id] = claimed.id
+    ctx.source.instance.runtime_properties[FLOATING_IP_POOL_CLAIMS] = claims
+    return claimed.floating_ip_address
+
+
+def _release_floating_ip_of_server(openstack_resource):
+    """
+    This method will return the floating ip claimed for the server to the
+    floating ip pool which is the target of the relationship, the floating
+    ip is deleted if the pool is full already
+    :param openstack_resource: Instance Of OpenstackServer in order to
+    use it
+    """
+    claims = ctx.source.instance.runtime_properties.get(
+        FLOATING_IP_POOL_CLAIMS, {})
+    floating_ip_id = claims.pop(ctx.target.instance.id, None)
+    if not floating_ip_id:
+        return
+
+    floating_ip_pool, pool_config = \
+        _get_target_floating_ip_pool(openstack_resource)
+    if not floating_ip_pool.release(floating_ip_id, pool_config['max_size']):
+        floating_ip_pool.resource_id = floating_ip_id
+        floating_ip_pool.delete()
+    ctx.source.instance.runtime_properties[FLOATING_IP_POOL_CLAIMS] = claims
+
+
 @with_compat_node
 @with_openstack_resource(
     OpenstackServer,
@@ -2031,13 +2378,19 @@ def connect_floating_ip(openstack_resource, floating_ip, fixed_ip=''):
     floating IP address. Used when the server is connected to multiple
     networks.
     """
-    if not floating_ip:
+    fixed_ip = fixed_ip or None
+    if _is_floating_ip_pool_target():
+        # Floating ips of a pool are claimed and associated with the port of
+        # the server in a single request
+        floating_ip = _claim_floating_ip_for_server(openstack_resource,
+                                                    fixed_ip)
+    elif not floating_ip:
         raise NonRecoverableError('floating_ip is required in order to '
                                   'connect floating ip to server {0}'
                                   ''.format(openstack_resource.resource_id))
-    fixed_ip = fixed_ip or None
-    openstack_resource.add_floating_ip_to_server(floating_ip,
-                                                 fixed_ip=fixed_ip)
+    else:
+        openstack_resource.add_floating_ip_to_server(floating_ip,
+                                                     fixed_ip=fixed_ip)
     # set public ip property inside server runtime_properties
     ctx.source.instance.runtime_properties[SERVER_PUBLIC_IP_PROPERTY] = \
         floating_ip
@@ -2059,12 +2412,14 @@ def disconnect_floating_ip(openstack_resource, floating_ip):
     :param floating_ip: The floating IP connetced to the server which should
     be disconnected
     """
-    if not floating_ip:
+    if _is_floating_ip_pool_target():
+        _release_floating_ip_of_server(openstack_resource)
+    elif not floating_ip:
         raise NonRecoverableError('floating_ip is required in order to '
                                   'disconnect floating ip from server {0}'
                                   ''.format(openstack_resource.resource_id))
-
-    openstack_resource.remove_floating_ip_from_server(floating_ip)
+    else:
+        openstack_resource.remove_floating_ip_from_server(floating_ip)
     # remove public ip property from server runtime_properties
     ctx.source.instance.runtime_properties.pop(SERVER_PUBLIC_IP_PROPERTY, None)
     if ctx.source.node.properties.get('use_public_ip', False):
@@ -0,0 +1,139 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Third party imports
+from cloudify import ctx
+from cloudify.exceptions import OperationRetry
+
+# Local imports
+from openstack_sdk.resources.compute import OpenstackServerPool
+from openstack_plugin.decorators import (with_openstack_resource,
+                                         with_compat_node)
+from openstack_plugin.constants import (RESOURCE_ID,
+                                        SERVER_POOL_CONFIG,
+                                        SERVER_TASK_STATE_DELETING)
+
+DEFAULT_POOL_CONFIG = {
+    # Number of available servers kept in the pool
+    'size': 1,
+    # Maximum number of available servers once claimed servers are returned
+    # to the pool, 0 means the same as "size"
+    'max_size': 0,
+    # If true, servers are rebuilt and returned to the pool once they are
+    # deleted, instead of being deleted
+    'recycle': False,
+}
+
+
+def get_pool_config():
+    """
+    This method will return the pool configuration of the current node merged
+    with the default configuration
+    :return dict: Pool configuration
+    """
+    pool_config = dict(DEFAULT_POOL_CONFIG)
+    pool_config.update(ctx.node.properties.get('pool_config') or {})
+    pool_config['max_size'] = \
+        max(pool_config['max_size'], pool_config['size'])
+    return pool_config
+
+
+def _refill_pool(openstack_resource):
+    """
+    This method will boot servers until the pool has the number of available
+    servers set by the pool configuration
+    :param openstack_resource: Instance of openstack server pool resource
+    :return int: Number of available servers which are active
+    """
+    pool_config = get_pool_config()
+    booted = openstack_resource.refill(pool_config['size'])
+    if booted:
+        ctx.logger.info('Booted {0} server(s) for pool {1}'.format(
+            len(booted), openstack_resource.name))
+    servers = openstack_resource.list_pool_servers(
+        OpenstackServerPool.STATE_AVAILABLE)
+    return len([server for server in servers
+                if server.status == OpenstackServerPool.STATUS_ACTIVE])
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackServerPool)
+def create(openstack_resource):
+    """
+    Create openstack server pool, servers of the pool are booted ahead of
+    time so that server nodes connected to the pool can claim them
+    :param openstack_resource: Instance of openstack server pool resource
+    """
+    _refill_pool(openstack_resource)
+    pool_config = get_pool_config()
+    pool_config.update(name=openstack_resource.name,
+                       resource_config=openstack_resource.config)
+    ctx.instance.runtime_properties[RESOURCE_ID] = openstack_resource.name
+    ctx.instance.runtime_properties[SERVER_POOL_CONFIG] = pool_config
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackServerPool)
+def configure(openstack_resource):
+    """
+    Wait for the servers of the pool to be active
+    :param openstack_resource: Instance of openstack server pool resource
+    """
+    size = get_pool_config()['size']
+    active = _refill_pool(openstack_resource)
+    if active < size:
+        raise OperationRetry(
+            message='Waiting for pool {0} to have {1} active server(s), '
+                    'current active server(s): {2}. Retrying...'.format(
+                        openstack_resource.name, size, active))
+    ctx.logger.info('Pool {0} has {1} active server(s)'.format(
+        openstack_resource.name, active))
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackServerPool)
+def delete(openstack_resource):
+    """
+    Delete the available servers of the pool, servers which are claimed are
+    deleted with their server nodes
+    :param openstack_resource: Instance of openstack server pool resource
+    """
+    servers = openstack_resource.list_pool_servers(
+        OpenstackServerPool.STATE_AVAILABLE)
+    if not servers:
+        ctx.logger.info('Pool {0} is deleted successfully'.format(
+            openstack_resource.name))
+        return
+
+    for server in servers:
+        # Servers already being deleted are not deleted again on retries
+        if server.task_state != SERVER_TASK_STATE_DELETING:
+            openstack_resource.delete_pool_server(server.id)
+    raise OperationRetry(
+        message='Waiting for {0} server(s) of pool {1} to be deleted'.format(
+            len(servers), openstack_resource.name))
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackServerPool)
+def refill(openstack_resource):
+    """
+    Boot servers for the pool until it has the number of available servers
+    set by the pool configuration, without waiting for them to be active
+    :param openstack_resource: Instance of openstack server pool resource
+    """
+    active = _refill_pool(openstack_resource)
+    ctx.logger.info('Pool {0} has {1} active server(s)'.format(
+        openstack_resource.name, active))
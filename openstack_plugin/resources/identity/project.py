@@ -344,7 +344,6 @@ def get_project_quota(openstack_resource):
     """
     quotas = openstack_resource.get_project_quota()
     ctx.instance.runtime_properties['quota'] = quotas
-    ctx.instance.update()
 
 
 @with_compat_node
@@ -19,6 +19,7 @@ from cloudify.exceptions import (RecoverableError, NonRecoverableError)
 
 # Local imports
 from openstack_sdk.resources.networks import (OpenstackFloatingIP,
+                                              OpenstackFloatingIPPool,
                                               OpenstackNetwork)
 
 from openstack_plugin.decorators import (with_openstack_resource,
@@ -27,6 +28,9 @@ from openstack_plugin.decorators import (with_openstack_resource,
 
 from openstack_plugin.constants import (RESOURCE_ID,
                                         FLOATING_IP_OPENSTACK_TYPE,
+                                        FLOATING_IP_POOL_CONFIG,
+                                        FLOATING_IP_POOL_NAME_PROPERTY,
+                                        FLOATING_IP_POOL_NODE_TYPE,
                                         NETWORK_OPENSTACK_TYPE,
                                         SUBNET_OPENSTACK_TYPE,
                                         PORT_OPENSTACK_TYPE)
@@ -34,6 +38,7 @@ from openstack_plugin.utils import (
     reset_dict_empty_keys,
     validate_resource_quota,
     add_resource_list_to_runtime_properties,
+    find_relationship_by_node_type,
     find_openstack_ids_of_connected_nodes_by_openstack_type)
 
 
@@ -215,6 +220,90 @@ def _update_floating_ip_config(floating_ip_resource):
     _update_floating_ip_subnet(floating_ip_resource)
 
 
+def get_floating_ip_pool(client_config, pool_config):
+    """
+    This method will return the floating ip pool of a pool node
+    :param dict client_config: Openstack configuration required to connect
+    to API
+    :param dict pool_config: Pool configuration stored as runtime property
+    of the pool node
+    :return: Instance of OpenstackFloatingIPPool
+    """
+    return OpenstackFloatingIPPool(
+        client_config=client_config,
+        resource_config=pool_config['resource_config'],
+        logger=ctx.logger)
+
+
+def _get_floating_ip_pool_config():
+    """
+    :return dict: Configuration of the floating ip pool connected to the
+    floating ip node or None if it is not connected to a pool
+    """
+    pool_rel = \
+        find_relationship_by_node_type(ctx.instance,
+                                       FLOATING_IP_POOL_NODE_TYPE)
+    if not pool_rel:
+        return None
+    return pool_rel.target.instance.runtime_properties.get(
+        FLOATING_IP_POOL_CONFIG)
+
+
+def _claim_floating_ip_from_pool(openstack_resource):
+    """
+    This method will claim a floating ip from the floating ip pool connected
+    to the floating ip node, instead of allocating a new floating ip. The
+    floating ip is associated with the configured port in the same request
+    :param openstack_resource: Instance of openstack floating ip resource
+    :return bool: True if a floating ip is claimed from the pool
+    """
+    pool_config = _get_floating_ip_pool_config()
+    if not pool_config:
+        return False
+
+    floating_ip_pool = get_floating_ip_pool(openstack_resource.client_config,
+                                            pool_config)
+    # The claim id is the same for retries of the create operation, so that
+    # a floating ip claimed before the operation failed is not claimed twice
+    claimed = floating_ip_pool.claim(
+        '{0}-{1}'.format(ctx.deployment.id, ctx.instance.id),
+        port_id=openstack_resource.config.get('port_id'),
+        fixed_ip_address=openstack_resource.config.get('fixed_ip_address'))
+    if not claimed:
+        ctx.logger.info('Floating ip pool {0} does not have any available '
+                        'floating ip, allocating a new floating ip'
+                        ''.format(floating_ip_pool.name))
+        return False
+
+    ctx.instance.runtime_properties[RESOURCE_ID] = claimed.id
+    ctx.instance.runtime_properties['floating_ip_address'] = \
+        claimed.floating_ip_address
+    ctx.instance.runtime_properties[FLOATING_IP_POOL_NAME_PROPERTY] = \
+        floating_ip_pool.name
+    return True
+
+
+def _release_floating_ip_to_pool(openstack_resource):
+    """
+    This method will return a floating ip claimed from a floating ip pool to
+    the pool instead of deleting it, unless the pool is full already
+    :param openstack_resource: Instance of openstack floating ip resource
+    :return bool: True if the floating ip is returned to the pool
+    """
+    if not ctx.instance.runtime_properties.get(
+            FLOATING_IP_POOL_NAME_PROPERTY):
+        return False
+
+    pool_config = _get_floating_ip_pool_config()
+    if not pool_config:
+        return False
+
+    floating_ip_pool = get_floating_ip_pool(openstack_resource.client_config,
+                                            pool_config)
+    return floating_ip_pool.release(openstack_resource.resource_id,
+                                    pool_config['max_size'])
+
+
 @with_compat_node
 @with_openstack_resource(class_decl=OpenstackFloatingIP,
                          existing_resource_handler=use_external_floating_ip)
@@ -225,6 +314,9 @@ def create(openstack_resource):
     """
     # Update floating ip config
     _update_floating_ip_config(openstack_resource)
+    # Floating ips connected to a floating ip pool are claimed from the pool
+    if _claim_floating_ip_from_pool(openstack_resource):
+        return
     # Create openstack resource
     created_resource = openstack_resource.create()
     # Update runtime properties for floating ip
@@ -241,6 +333,10 @@ def delete(openstack_resource):
     Delete current openstack floating ip
     :param openstack_resource: Instance of openstack floating ip resource
     """
+    if _release_floating_ip_to_pool(openstack_resource):
+        ctx.logger.info('Floating ip {0} is returned to its floating ip pool'
+                        .format(openstack_resource.resource_id))
+        return
     openstack_resource.delete()
 
 
@@ -0,0 +1,116 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Third party imports
+from cloudify import ctx
+
+# Local imports
+from openstack_sdk.resources.networks import OpenstackFloatingIPPool
+from openstack_plugin.decorators import (with_openstack_resource,
+                                         with_compat_node)
+from openstack_plugin.constants import (RESOURCE_ID, FLOATING_IP_POOL_CONFIG)
+from openstack_plugin.resources.network.floating_ip import \
+    _update_floating_ip_network
+
+DEFAULT_POOL_CONFIG = {
+    # Name of the pool, floating ips of the pool are tagged with it
+    'name': '',
+    # Number of available floating ips kept in the pool
+    'size': 1,
+    # Maximum number of available floating ips once claimed floating ips
+    # are returned to the pool, 0 means the same as "size"
+    'max_size': 0,
+}
+
+
+def get_pool_config():
+    """
+    This method will return the pool configuration of the current node merged
+    with the default configuration, the pool name is generated from the node
+    instance if it is missing
+    :return dict: Pool configuration
+    """
+    pool_config = dict(DEFAULT_POOL_CONFIG)
+    pool_config.update(ctx.node.properties.get('pool_config') or {})
+    pool_config['max_size'] = \
+        max(pool_config['max_size'], pool_config['size'])
+    if not pool_config['name']:
+        pool_config['name'] = '{0}-{1}'.format(
+            ctx.deployment.id, ctx.instance.id.replace('_', '-'))
+    return pool_config
+
+
+def _refill_pool(openstack_resource, pool_config):
+    """
+    This method will allocate floating ips until the pool has the number of
+    available floating ips set by the pool configuration
+    :param openstack_resource: Instance of openstack floating ip pool
+    resource
+    :param dict pool_config: Pool configuration
+    """
+    openstack_resource.name = pool_config['name']
+    allocated = openstack_resource.refill(pool_config['size'])
+    if allocated:
+        ctx.logger.info('Allocated {0} floating ip(s) for pool {1}'.format(
+            len(allocated), openstack_resource.name))
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackFloatingIPPool)
+def create(openstack_resource):
+    """
+    Create openstack floating ip pool, floating ips of the pool are allocated
+    ahead of time so that floating ip nodes and servers connected to the
+    pool can claim them
+    :param openstack_resource: Instance of openstack floating ip pool
+    resource
+    """
+    _update_floating_ip_network(openstack_resource)
+    pool_config = get_pool_config()
+    _refill_pool(openstack_resource, pool_config)
+    pool_config['resource_config'] = dict(openstack_resource.config,
+                                          name=pool_config['name'])
+    ctx.instance.runtime_properties[RESOURCE_ID] = pool_config['name']
+    ctx.instance.runtime_properties[FLOATING_IP_POOL_CONFIG] = pool_config
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackFloatingIPPool)
+def delete(openstack_resource):
+    """
+    Delete the available floating ips of the pool, floating ips which are
+    claimed are deleted with their floating ip nodes
+    :param openstack_resource: Instance of openstack floating ip pool
+    resource
+    """
+    openstack_resource.name = get_pool_config()['name']
+    deleted = openstack_resource.delete_available_ips()
+    ctx.logger.info('Deleted {0} floating ip(s) of pool {1}'.format(
+        deleted, openstack_resource.name))
+
+
+@with_compat_node
+@with_openstack_resource(OpenstackFloatingIPPool)
+def refill(openstack_resource):
+    """
+    Allocate floating ips for the pool until it has the number of available
+    floating ips set by the pool configuration
+    :param openstack_resource: Instance of openstack floating ip pool
+    resource
+    """
+    # The floating network is resolved once the pool is created
+    pool_config = ctx.instance.runtime_properties[FLOATING_IP_POOL_CONFIG]
+    openstack_resource.config.update(pool_config['resource_config'])
+    _refill_pool(openstack_resource, pool_config)
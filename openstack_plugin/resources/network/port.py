@@ -15,13 +15,15 @@
 
 # Third party imports
 from cloudify import ctx
-from cloudify.exceptions import NonRecoverableError
+from cloudify.exceptions import (NonRecoverableError, OperationRetry)
 
 from IPy import IP
 
 # Local imports
-from openstack_sdk.resources.networks import OpenstackPort
+from openstack_sdk.resources.networks import (OpenstackPort,
+                                              OpenstackPortBatch)
 from openstack_sdk.resources.compute import OpenstackServer
+from openstack_sdk.file_state import file_lock_supported
 from openstack_plugin.decorators import (with_openstack_resource,
                                          with_compat_node,
                                          with_multiple_data_sources)
@@ -30,12 +32,24 @@ from openstack_plugin.constants import (RESOURCE_ID,
                                         NETWORK_OPENSTACK_TYPE,
                                         SECURITY_GROUP_OPENSTACK_TYPE)
 from openstack_plugin.utils import (
+    get_batch_id,
     update_runtime_properties,
     reset_dict_empty_keys,
     validate_resource_quota,
     add_resource_list_to_runtime_properties,
     find_openstack_ids_of_connected_nodes_by_openstack_type)
 
+DEFAULT_BULK_CONFIG = {
+    # If true, ports of node instances which share the same network and
+    # security groups are created using neutron bulk API
+    'enabled': False,
+    # Number of seconds the batch waits for other instances once the first
+    # port is submitted
+    'window': 5,
+    # Maximum number of ports sent on each bulk request
+    'chunk_size': 100,
+}
+
 
 @with_multiple_data_sources()
 def _update_network_config(port_config, allow_multiple=False):
@@ -316,6 +330,72 @@ def _export_ips_to_port_instance(ips_v4, ips_v6):
         ctx.instance.runtime_properties['ipv6_address'] = ''
 
 
+def get_bulk_config():
+    """
+    This method will return the bulk configuration of the current node merged
+    with the default configuration
+    :return dict: Bulk configuration
+    """
+    bulk_config = dict(DEFAULT_BULK_CONFIG)
+    bulk_config.update(ctx.node.properties.get('bulk_config') or {})
+    return bulk_config
+
+
+def _get_port_batch(openstack_resource):
+    """
+    This method will return the batch of the current port, ports are batched
+    together only if they are created for the same node using the same
+    client config, network and security groups
+    :param openstack_resource: Instance Of OpenstackPort in order to
+    use it
+    :return: Instance of OpenstackPortBatch
+    """
+    port_batch = OpenstackPortBatch(
+        client_config=openstack_resource.client_config,
+        logger=ctx.logger)
+    port_batch.batch_id = get_batch_id(
+        ctx,
+        openstack_resource.client_config,
+        openstack_resource.config.get('network_id'),
+        sorted(openstack_resource.config.get('security_groups') or []))
+    return port_batch
+
+
+def _create_port_in_bulk(openstack_resource, bulk_config):
+    """
+    This method will submit the port config to the batch of the current port,
+    and return the created port once the batch is created using neutron bulk
+    API
+    :param openstack_resource: Instance Of OpenstackPort in order to
+    use it
+    :param dict bulk_config: Bulk configuration of the port node
+    :return dict: The created port, or None if it could not be created in
+    bulk
+    """
+    if not file_lock_supported():
+        ctx.logger.warning('Ports are not created in bulk without file '
+                           'locks, creating port alone')
+        return None
+
+    port_batch = _get_port_batch(openstack_resource)
+    result = port_batch.submit(ctx.instance.id,
+                               bulk_config['window'],
+                               bulk_config['chunk_size'],
+                               member_config=openstack_resource.config)
+    if not result:
+        raise OperationRetry(
+            message='Waiting for port batch {0} to be created'.format(
+                port_batch.batch_id),
+            retry_after=bulk_config['window'])
+
+    if result.get('error'):
+        ctx.logger.warning(
+            'Failed to create port in bulk: {0}, creating it alone'.format(
+                result['error']))
+        return None
+    return result['resource']
+
+
 @with_compat_node
 @with_openstack_resource(
     OpenstackPort,
@@ -328,8 +408,17 @@ def create(openstack_resource):
     # Update port config before create port
     _update_port_config(openstack_resource.config)
 
+    # Ports of scaled nodes can be created in bulk, the port is created once
+    # the batch is full or the batch window is elapsed
+    created_resource = None
+    bulk_config = get_bulk_config()
+    if bulk_config['enabled'] and ctx.node.number_of_instances > 1:
+        created_resource = \
+            _create_port_in_bulk(openstack_resource, bulk_config)
+
     # Create port
-    created_resource = openstack_resource.create()
+    if not created_resource:
+        created_resource = openstack_resource.create()
     ipv4_list, ipv6_list = _get_fixed_ips_from_port(created_resource)
     fixed_ips = ipv4_list + ipv6_list
     _export_ips_to_port_instance(ipv4_list, ipv6_list)
@@ -337,10 +426,11 @@ def create(openstack_resource):
     # Handle runtime properties
     update_runtime_properties(
         {
-            RESOURCE_ID: created_resource.id,
+            RESOURCE_ID: created_resource['id'],
             'fixed_ips': fixed_ips,
-            'mac_address': created_resource.mac_address,
-            'allowed_address_pairs': created_resource.allowed_address_pairs,
+            'mac_address': created_resource['mac_address'],
+            'allowed_address_pairs':
+                created_resource['allowed_address_pairs'],
         }
     )
 
@@ -14,7 +14,9 @@
 # limitations under the License.
 
 # Third party imports
+import openstack.exceptions
 from cloudify import ctx
+from cloudify.exceptions import NonRecoverableError
 
 # Local imports
 from openstack_sdk.resources.networks import OpenstackSecurityGroup
@@ -23,12 +25,25 @@ from openstack_sdk.resources.networks import OpenstackSecurityGroupRule
 from openstack_plugin.decorators import (with_openstack_resource,
                                          with_compat_node)
 
-from openstack_plugin.constants import (RESOURCE_ID,
-                                        SECURITY_GROUP_OPENSTACK_TYPE)
+from openstack_plugin.constants import (
+    RESOURCE_ID,
+    SECURITY_GROUP_OPENSTACK_TYPE,
+    SECURITY_GROUP_RULES_CHUNK_SIZE,
+    SECURITY_GROUP_CREATED_RULES,
+    SECURITY_GROUP_FAILED_RULES,
+    SECURITY_GROUP_DEFAULT_RULES_REMOVED)
 from openstack_plugin.utils import (reset_dict_empty_keys,
                                     validate_resource_quota,
                                     add_resource_list_to_runtime_properties,
-                                    validate_ip_or_range_syntax)
+                                    validate_ip_or_range_syntax,
+                                    get_security_group_rule_key,
+                                    compile_security_group_rules)
+
+# Rules added by neutron to every new security group
+DEFAULT_EGRESS_RULES = (
+    ('egress', 'IPv4', None, None, None, None, None),
+    ('egress', 'IPv6', None, None, None, None, None),
+)
 
 
 def security_group_creation_validation(openstack_resource):
@@ -57,44 +72,163 @@ def create(openstack_resource):
     ctx.instance.runtime_properties[RESOURCE_ID] = created_resource.id
 
 
+def _report_failed_rules(failed_rules, total_rules):
+    """
+    This method will save the security group rules which failed to be created
+    as runtime property and raise an error when there are failed rules
+    :param list failed_rules: List of failed rules with the error message
+    :param int total_rules: Number of rules requested to be created
+    """
+    if failed_rules:
+        ctx.instance.runtime_properties[SECURITY_GROUP_FAILED_RULES] = \
+            failed_rules
+        raise NonRecoverableError(
+            'Failed to create {0} of {1} security group rules: {2}'.format(
+                len(failed_rules), total_rules, failed_rules))
+    ctx.instance.runtime_properties.pop(SECURITY_GROUP_FAILED_RULES, None)
+
+
+def _reconcile_security_group_rules(security_group_rule,
+                                    security_group_id,
+                                    security_group_rules,
+                                    chunk_size):
+    """
+    This method will converge the rules of the security group to the rules
+    provided, by fetching the existing rules once and only adding the
+    missing rules and removing the rules which are not requested anymore
+    :param security_group_rule: Instance of openstack security group rule
+    :param str security_group_id: Security group id
+    :param list security_group_rules: List of security group rules
+    :param int chunk_size: Maximum number of rules created per request
+    """
+    existing_rules = {}
+    for sg_rule in security_group_rule.list(
+            query={'security_group_id': security_group_id}):
+        existing_rules.setdefault(
+            get_security_group_rule_key(sg_rule), []).append(sg_rule.id)
+
+    desired_rules = {}
+    for rule_config in security_group_rules:
+        if not rule_config.get('security_group_id'):
+            rule_config['security_group_id'] = security_group_id
+        desired_rules.setdefault(
+            get_security_group_rule_key(rule_config), rule_config)
+
+    # Default egress rules are only removed when it is requested explicitly
+    keep_default_rules = \
+        not ctx.node.properties.get('disable_default_egress_rules')
+    removed_rules = []
+    for rule_key, rule_ids in existing_rules.items():
+        if rule_key in desired_rules:
+            continue
+        if keep_default_rules and rule_key in DEFAULT_EGRESS_RULES:
+            continue
+        removed_rules.extend(rule_ids)
+
+    added_rules = [rule_config for rule_key, rule_config
+                   in desired_rules.items() if rule_key not in existing_rules]
+
+    ctx.logger.info(
+        'Reconciling security group {0} rules: {1} to add, '
+        '{2} to remove'.format(security_group_id,
+                               len(added_rules),
+                               len(removed_rules)))
+
+    # Add the new rules before removing the old ones, so that the allowed
+    # traffic is not interrupted while the rules are updated
+    results = security_group_rule.create_rules(added_rules,
+                                               chunk_size=chunk_size)
+    failed_rules = [{'rule': rule_config, 'error': str(result)}
+                    for rule_config, result in zip(added_rules, results)
+                    if isinstance(result, Exception) and not isinstance(
+                        result, openstack.exceptions.ConflictException)]
+    _report_failed_rules(failed_rules, len(added_rules))
+    security_group_rule.delete_rules(removed_rules)
+
+
 @with_compat_node
 @with_openstack_resource(OpenstackSecurityGroup)
-def configure(openstack_resource, security_group_rules=None):
+def configure(openstack_resource,
+              security_group_rules=None,
+              rules_chunk_size=SECURITY_GROUP_RULES_CHUNK_SIZE,
+              reconcile_rules=False,
+              compile_rules=False):
     """
     This task will allow to add security group rules and attach them to
-    created security group if they provided on the node configuration
+    created security group if they provided on the node configuration. The
+    rules are created in bulk and tracked as runtime properties, so that
+    running the task again only creates the rules which are not created yet
     :param openstack_resource: security group instance
     :param security_group_rules: List of security group rules
+    :param rules_chunk_size: Maximum number of rules created per request
+    :param reconcile_rules: If true, only the difference between the
+    existing rules and the provided rules is applied
+    :param compile_rules: If true, rules are merged and de-duplicated before
+    they are created
     """
     client_config = ctx.node.properties.get('client_config')
     security_group_id = openstack_resource.resource_id
+    runtime_properties = ctx.instance.runtime_properties
 
     # Define security group rule instance
     security_group_rule = \
         OpenstackSecurityGroupRule(client_config=client_config,
                                    logger=ctx.logger)
 
+    if compile_rules and security_group_rules:
+        compiled_rules = compile_security_group_rules(security_group_rules)
+        ctx.logger.info(
+            'Compiled {0} security group rules into {1} rules'.format(
+                len(security_group_rules), len(compiled_rules)))
+        security_group_rules = compiled_rules
+
+    if reconcile_rules:
+        _reconcile_security_group_rules(security_group_rule,
+                                        security_group_id,
+                                        security_group_rules or [],
+                                        rules_chunk_size)
+        return
+
     # Check if the "disable_default_egress_rules" is enabled or not so that
     # we can remove default egress rules for current security group
-    if ctx.node.properties.get('disable_default_egress_rules'):
-        for sg_rule in security_group_rule.list(
-                query={'security_group_id': security_group_id}):
-
-            security_group_rule.resource_id = sg_rule.id
-            security_group_rule.delete()
+    default_rules_removed = \
+        runtime_properties.get(SECURITY_GROUP_DEFAULT_RULES_REMOVED)
+    if ctx.node.properties.get('disable_default_egress_rules') \
+            and not default_rules_removed:
+        security_group_rule.delete_rules(
+            [sg_rule.id for sg_rule in security_group_rule.list(
+                query={'security_group_id': security_group_id})])
+        runtime_properties[SECURITY_GROUP_DEFAULT_RULES_REMOVED] = True
 
-    security_group_rule.resource_id = None
-    # Check the existing rules attached to current security groups
-    # in order to apply them to that group
-    for rule_config in security_group_rules:
+    # Skip the rules which are already created by previous run of this task
+    created_rules = \
+        dict(runtime_properties.get(SECURITY_GROUP_CREATED_RULES) or {})
+    pending_rules = []
+    for index, rule_config in enumerate(security_group_rules or []):
+        if str(index) in created_rules:
+            continue
         # Check if the config contains the security group id or not
         if not rule_config.get('security_group_id'):
             rule_config['security_group_id'] = security_group_id
+        pending_rules.append((index, rule_config))
+
+    results = security_group_rule.create_rules(
+        [rule_config for _, rule_config in pending_rules],
+        chunk_size=rules_chunk_size)
+
+    failed_rules = []
+    for (index, rule_config), result in zip(pending_rules, results):
+        if isinstance(result, openstack.exceptions.ConflictException):
+            ctx.logger.warning(
+                'Security group rule {0} already exists'.format(rule_config))
+            created_rules[str(index)] = None
+        elif isinstance(result, Exception):
+            failed_rules.append({'rule': rule_config, 'error': str(result)})
+        else:
+            created_rules[str(index)] = result.id
 
-        # Create new instance for each security group id
-        security_group_rule.config = rule_config
-        # Create security group rule
-        security_group_rule.create()
+    runtime_properties[SECURITY_GROUP_CREATED_RULES] = created_rules
+    _report_failed_rules(failed_rules, len(pending_rules))
 
 
 @with_compat_node
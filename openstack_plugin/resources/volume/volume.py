@@ -50,7 +50,8 @@ from openstack_plugin.utils import (
     wait_until_status,
     get_snapshot_name,
     add_resource_list_to_runtime_properties,
-    find_openstack_ids_of_connected_nodes_by_openstack_type)
+    find_openstack_ids_of_connected_nodes_by_openstack_type,
+    checkpoint_runtime_properties)
 
 
 def _is_volume_backup_matched(backup_instance, volume_id, name):
@@ -182,7 +183,7 @@ def _create_volume_backup(volume_resource, backup_name):
         ctx.instance.runtime_properties[VOLUME_BACKUP_TASK] = True
         ctx.instance.runtime_properties[VOLUME_BACKUP_ID] = backup_id
         # save flag as current state before external call
-        ctx.instance.update()
+        checkpoint_runtime_properties(ctx)
 
     backup_resource, ready = \
         get_ready_resource_status(backup,
@@ -238,7 +239,7 @@ def _create_volume_snapshot(volume_resource, snapshot_name, snapshot_type):
         ctx.instance.runtime_properties[VOLUME_SNAPSHOT_TASK] = True
         ctx.instance.runtime_properties[VOLUME_SNAPSHOT_ID] = snapshot_id
         # save flag as current state before external call
-        ctx.instance.update()
+        checkpoint_runtime_properties(ctx)
 
     # Check the status of the snapshot process
     snapshot_resource, ready = \
@@ -506,7 +507,7 @@ def delete(openstack_resource):
         openstack_resource.delete()
         ctx.instance.runtime_properties[VOLUME_TASK_DELETE] = True
         # save flag as current state before external call
-        ctx.instance.update()
+        checkpoint_runtime_properties(ctx)
 
     # Make sure that volume are deleting
     try:
@@ -0,0 +1,475 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmarks which run representative lifecycles of the plugin operations
+# against the fake openstack API. Each scenario records the wall time, the
+# number of HTTP requests, the number of keystone authentication requests
+# and the peak RSS of the process, and fails once one of them exceeds the
+# budget checked in "budgets.json", so that regressions like N+1 lookups
+# are caught before they are released.
+#
+# The benchmarks are slower than the unit tests, so they only run when the
+# "OPENSTACK_BENCHMARKS" environment variable is set. The measured values are
+# written to the JSON file set by the "OPENSTACK_BENCHMARK_RESULTS"
+# environment variable, which is useful to update the budgets once a change
+# is expected to affect them.
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import unittest
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Third party imports
+import mock
+import openstack.resource
+from cloudify.constants import RELATIONSHIP_INSTANCE
+from cloudify.context import OperationContext
+from cloudify.exceptions import OperationRetry
+from cloudify.mocks import MockContext
+from cloudify.state import current_ctx
+
+# Local imports
+from openstack_sdk.tests.fake_openstack import (FakeOpenstackServer,
+                                                PROJECT_ID)
+from openstack_plugin.tests.base import OpenStackTestBase
+from openstack_plugin.resources.compute import server
+from openstack_plugin.resources.identity import project
+from openstack_plugin.resources.network import (rbac_policy,
+                                                security_group)
+from openstack_plugin.resources.volume import volume
+from openstack_plugin.constants import (RESOURCE_ID,
+                                        OPENSTACK_TYPE_PROPERTY,
+                                        NETWORK_OPENSTACK_TYPE,
+                                        PORT_OPENSTACK_TYPE,
+                                        VOLUME_OPENSTACK_TYPE,
+                                        RBAC_POLICY_RELATIONSHIP_TYPE,
+                                        SECURITY_GROUP_CREATED_RULES)
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), 'budgets.json')
+RESULTS_FILE_ENV = 'OPENSTACK_BENCHMARK_RESULTS'
+BENCHMARKS_ENV = 'OPENSTACK_BENCHMARKS'
+
+# Operations retried more than this are considered stuck
+MAX_OPERATION_RETRIES = 10
+
+SERVER_PORTS = 4
+SERVER_VOLUMES = 2
+SECURITY_GROUP_RULES = 150
+PROJECT_USERS = 30
+NETWORK_SUBNETS = 2
+NETWORK_PORTS = 20
+
+
+def _get_peak_rss_mb():
+    if not resource:
+        return 0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak RSS in kilobytes while macOS uses bytes
+    if sys.platform == 'darwin':
+        return peak_rss / (1024.0 * 1024.0)
+    return peak_rss / 1024.0
+
+
+def _to_primitive(value):
+    if isinstance(value, openstack.resource.Resource):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: _to_primitive(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_primitive(item) for item in value]
+    return value
+
+
+@unittest.skipUnless(os.environ.get(BENCHMARKS_ENV),
+                     'Set {0} to run the benchmarks'.format(BENCHMARKS_ENV))
+class OperationBenchmarkTestCase(OpenStackTestBase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(OperationBenchmarkTestCase, cls).setUpClass()
+        with open(BUDGETS_FILE) as budgets_file:
+            cls.budgets = json.load(budgets_file)
+
+    def setUp(self):
+        super(OperationBenchmarkTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+
+    @property
+    def client_config(self):
+        return self.fake_openstack.client_config
+
+    def _node_ctx(self,
+                  node_id,
+                  node_type,
+                  properties,
+                  relationships=None,
+                  type_hierarchy=None):
+        properties = dict(properties, client_config=self.client_config)
+        return self.get_mock_ctx(
+            node_id,
+            test_properties=properties,
+            test_relationships=relationships,
+            type_hierarchy=type_hierarchy or ['cloudify.nodes.Root',
+                                              node_type],
+            node_type=node_type)
+
+    def _relationships(self, rel_type, targets):
+        """
+        :param str rel_type: Relationship type
+        :param list targets: List of (node type, runtime properties)
+        :return list: List of relationships to the target instances
+        """
+        relationships = self.get_mock_relationship_ctx_for_node([
+            {
+                'node': {'properties': {'client_config': self.client_config}},
+                'instance': {'runtime_properties': runtime_properties},
+                'type': rel_type,
+                'type_hierarchy': ['cloudify.nodes.Root', node_type],
+            } for node_type, runtime_properties in targets])
+        for relationship in relationships:
+            relationship.type_hierarchy = [
+                'cloudify.relationships.depends_on', rel_type]
+        return relationships
+
+    def _relationship_ctx(self, source_ctx, target_ctx, on_target=False):
+        # The relationship context shares the node instances of the source
+        # and the target, so the runtime properties are kept between the
+        # node and relationship operations
+        return self.get_mock_relationship_ctx(
+            deployment_name='benchmark',
+            node_id=(target_ctx if on_target else source_ctx).node.id,
+            test_source=MockContext({
+                'node': source_ctx.node,
+                'instance': source_ctx.instance,
+                '_context': {'node_id': source_ctx.node.id}
+            }),
+            test_target=MockContext({
+                'node': target_ctx.node,
+                'instance': target_ctx.instance,
+                '_context': {'node_id': target_ctx.node.id}
+            }))
+
+    @staticmethod
+    def _store_runtime_properties(_ctx):
+        # Runtime properties are stored as JSON by the manager, so the next
+        # operations never see the SDK objects assigned to them
+        instances = [_ctx.source.instance, _ctx.target.instance] \
+            if _ctx.type == RELATIONSHIP_INSTANCE else [_ctx.instance]
+        for instance in instances:
+            runtime_properties = json.loads(json.dumps(
+                _to_primitive(dict(instance.runtime_properties))))
+            instance.runtime_properties.clear()
+            instance.runtime_properties.update(runtime_properties)
+
+    def _run(self, _ctx, operation_name, operation, **kwargs):
+        """
+        Run the operation as the workflow does, by running it again until
+        it stops asking to be retried
+        """
+        for retry_number in range(MAX_OPERATION_RETRIES):
+            _ctx._operation = OperationContext({
+                'name': operation_name,
+                'retry_number': retry_number
+            })
+            current_ctx.set(_ctx)
+            try:
+                operation(openstack_resource=None, **kwargs)
+                return
+            except OperationRetry:
+                continue
+            finally:
+                self._store_runtime_properties(_ctx)
+        raise AssertionError(
+            'Operation {0} is still retried after {1} retries'.format(
+                operation_name, MAX_OPERATION_RETRIES))
+
+    @staticmethod
+    def _record_result(scenario, result):
+        results_file = os.environ.get(RESULTS_FILE_ENV)
+        if not results_file:
+            return
+        results = {}
+        if os.path.exists(results_file):
+            with open(results_file) as results_input:
+                results = json.load(results_input)
+        results[scenario] = result
+        with open(results_file, 'w') as results_output:
+            json.dump(results, results_output, indent=2, sort_keys=True)
+
+    @contextmanager
+    def _benchmark(self, scenario):
+        self.fake_openstack.reset_requests()
+        started_at = time.time()
+        yield
+        result = {
+            'wall_time': round(time.time() - started_at, 3),
+            'requests': self.fake_openstack.count_requests(),
+            'auth_calls': self.fake_openstack.count_requests(
+                'POST', '/auth/tokens$'),
+            # Peak RSS is measured for the whole process, so the budget is
+            # an upper bound for the memory used while running the tests
+            'peak_rss_mb': round(_get_peak_rss_mb(), 1),
+        }
+        self._record_result(scenario, result)
+
+        budget = self.budgets[scenario]
+        exceeded = ['{0} {1} > {2}'.format(key, result[key], budget[key])
+                    for key in sorted(budget) if result[key] > budget[key]]
+        if exceeded:
+            self.fail('Benchmark {0} exceeded its budget: {1}'.format(
+                scenario, ', '.join(exceeded)))
+
+    def test_server_lifecycle(self):
+        flavor = self.fake_openstack.add_resource(
+            'compute', 'flavors', {'name': 'benchmark-flavor'})
+        image = self.fake_openstack.add_resource(
+            'image', 'images', {'name': 'benchmark-image',
+                                'status': 'active'})
+        network = self.fake_openstack.add_resource(
+            'network', 'networks', {'name': 'benchmark-network'})
+        ports = [self.fake_openstack.add_resource(
+            'network', 'ports', {
+                'name': 'benchmark-port-{0}'.format(index),
+                'network_id': network['id']
+            }) for index in range(SERVER_PORTS)]
+
+        server_ctx = self._node_ctx(
+            'server',
+            'cloudify.nodes.openstack.Server',
+            {
+                'os_family': 'linux',
+                'resource_config': {
+                    'name': 'benchmark-server',
+                    'flavor_id': flavor['id'],
+                    'image_id': image['id']
+                }
+            },
+            relationships=self._relationships(
+                'cloudify.relationships.openstack.server_connected_to_port',
+                [('cloudify.nodes.openstack.Port', {
+                    RESOURCE_ID: port['id'],
+                    OPENSTACK_TYPE_PROPERTY: PORT_OPENSTACK_TYPE
+                }) for port in ports]),
+            type_hierarchy=['cloudify.nodes.Root', 'cloudify.nodes.Compute'])
+
+        volume_ctxs = []
+        for index in range(SERVER_VOLUMES):
+            remote_volume = self.fake_openstack.add_resource(
+                'block-storage', 'volumes', {
+                    'name': 'benchmark-volume-{0}'.format(index),
+                    'size': 1,
+                    'status': 'available'
+                })
+            volume_ctx = self._node_ctx(
+                'volume-{0}'.format(index),
+                'cloudify.nodes.openstack.Volume',
+                {
+                    'device_name': 'auto',
+                    'resource_config': {
+                        'name': 'benchmark-volume-{0}'.format(index)
+                    }
+                })
+            volume_ctx.instance.runtime_properties.update({
+                RESOURCE_ID: remote_volume['id'],
+                OPENSTACK_TYPE_PROPERTY: VOLUME_OPENSTACK_TYPE
+            })
+            volume_ctxs.append(volume_ctx)
+
+        with self._benchmark('server_lifecycle'):
+            self._run(server_ctx,
+                      'cloudify.interfaces.lifecycle.create',
+                      server.create)
+            self._run(server_ctx,
+                      'cloudify.interfaces.lifecycle.configure',
+                      server.configure)
+            for volume_ctx in volume_ctxs:
+                self._run(self._relationship_ctx(volume_ctx,
+                                                 server_ctx,
+                                                 on_target=True),
+                          'cloudify.interfaces.relationship_lifecycle'
+                          '.establish',
+                          server.attach_volume)
+            for volume_ctx in volume_ctxs:
+                self._run(self._relationship_ctx(volume_ctx,
+                                                 server_ctx,
+                                                 on_target=True),
+                          'cloudify.interfaces.relationship_lifecycle'
+                          '.unlink',
+                          server.detach_volume)
+            self._run(server_ctx,
+                      'cloudify.interfaces.lifecycle.delete',
+                      server.delete)
+
+    def test_security_group_rules(self):
+        security_group_ctx = self._node_ctx(
+            'security-group',
+            'cloudify.nodes.openstack.SecurityGroup',
+            {'resource_config': {'name': 'benchmark-security-group'}})
+        rules = [{
+            'direction': 'ingress',
+            'protocol': 'tcp',
+            'port_range_min': 1000 + index,
+            'port_range_max': 1000 + index,
+            'remote_ip_prefix': '0.0.0.0/0'
+        } for index in range(SECURITY_GROUP_RULES)]
+
+        with self._benchmark('security_group_rules'):
+            self._run(security_group_ctx,
+                      'cloudify.interfaces.lifecycle.create',
+                      security_group.create)
+            self._run(security_group_ctx,
+                      'cloudify.interfaces.lifecycle.configure',
+                      security_group.configure,
+                      security_group_rules=rules)
+            self.assertEqual(
+                len(security_group_ctx.instance.runtime_properties[
+                    SECURITY_GROUP_CREATED_RULES]),
+                SECURITY_GROUP_RULES)
+            self._run(security_group_ctx,
+                      'cloudify.interfaces.lifecycle.delete',
+                      security_group.delete)
+
+    def test_project_onboarding(self):
+        self.fake_openstack.add_resource(
+            'identity', 'roles', {'name': 'member'})
+        users = []
+        for index in range(PROJECT_USERS):
+            user = self.fake_openstack.add_resource(
+                'identity', 'users', {
+                    'name': 'benchmark-user-{0}'.format(index),
+                    'domain_id': 'default'
+                })
+            users.append({'name': user['name'], 'roles': ['member']})
+
+        project_ctx = self._node_ctx(
+            'project',
+            'cloudify.nodes.openstack.Project',
+            {
+                'resource_config': {'name': 'benchmark-project'},
+                'users': users
+            })
+
+        with self._benchmark('project_onboarding'):
+            self._run(project_ctx,
+                      'cloudify.interfaces.lifecycle.create',
+                      project.create)
+            self._run(project_ctx,
+                      'cloudify.interfaces.lifecycle.start',
+                      project.start)
+            self._run(project_ctx,
+                      'cloudify.interfaces.lifecycle.delete',
+                      project.delete)
+
+    def test_rbac_policy_unlink(self):
+        subnets = [self.fake_openstack.add_resource(
+            'network', 'subnets', {
+                'name': 'benchmark-subnet-{0}'.format(index),
+                'cidr': '10.0.{0}.0/24'.format(index),
+                'ip_version': 4,
+                'enable_dhcp': True
+            }) for index in range(NETWORK_SUBNETS)]
+        network = self.fake_openstack.add_resource(
+            'network', 'networks', {
+                'name': 'benchmark-network',
+                'subnets': [subnet['id'] for subnet in subnets]
+            })
+        for index in range(NETWORK_PORTS):
+            self.fake_openstack.add_resource(
+                'network', 'ports', {
+                    'name': 'benchmark-port-{0}'.format(index),
+                    'network_id': network['id']
+                })
+
+        network_ctx = self._node_ctx(
+            'network',
+            'cloudify.nodes.openstack.Network',
+            {'resource_config': {}})
+        network_ctx.instance.runtime_properties.update({
+            RESOURCE_ID: network['id'],
+            OPENSTACK_TYPE_PROPERTY: NETWORK_OPENSTACK_TYPE
+        })
+        rbac_policy_ctx = self._node_ctx(
+            'rbac-policy',
+            'cloudify.nodes.openstack.RBACPolicy',
+            {
+                'resource_config': {
+                    'target_tenant': PROJECT_ID,
+                    'action': 'access_as_shared'
+                }
+            },
+            relationships=self._relationships(
+                RBAC_POLICY_RELATIONSHIP_TYPE,
+                [('cloudify.nodes.openstack.Network',
+                  dict(network_ctx.instance.runtime_properties))]))
+
+        with self._benchmark('rbac_policy_unlink'):
+            self._run(rbac_policy_ctx,
+                      'cloudify.interfaces.lifecycle.create',
+                      rbac_policy.create)
+            self._run(self._relationship_ctx(rbac_policy_ctx, network_ctx),
+                      'cloudify.interfaces.relationship_lifecycle.unlink',
+                      rbac_policy.unlink_target_object,
+                      resource_network_id=network['id'],
+                      disable_dhcp=True,
+                      clean_ports=True)
+            self._run(rbac_policy_ctx,
+                      'cloudify.interfaces.lifecycle.delete',
+                      rbac_policy.delete)
+
+    @mock.patch('openstack_plugin.resources.volume.volume.time.sleep')
+    def test_volume_snapshot(self, _):
+        volume_ctx = self._node_ctx(
+            'volume',
+            'cloudify.nodes.openstack.Volume',
+            {
+                'device_name': 'auto',
+                'resource_config': {
+                    'name': 'benchmark-volume',
+                    'size': 1
+                }
+            })
+        snapshot = {
+            'snapshot_name': 'benchmark-snapshot',
+            'snapshot_type': 'benchmark',
+            'snapshot_incremental': True
+        }
+
+        with self._benchmark('volume_snapshot'):
+            self._run(volume_ctx,
+                      'cloudify.interfaces.lifecycle.create',
+                      volume.create)
+            self._run(volume_ctx,
+                      'cloudify.interfaces.lifecycle.start',
+                      volume.start)
+            self._run(volume_ctx,
+                      'cloudify.interfaces.snapshot.create',
+                      volume.snapshot_create,
+                      **snapshot)
+            self._run(volume_ctx,
+                      'cloudify.interfaces.snapshot.delete',
+                      volume.snapshot_delete,
+                      **snapshot)
+            self._run(volume_ctx,
+                      'cloudify.interfaces.lifecycle.delete',
+                      volume.delete)
@@ -0,0 +1,123 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Each operation could run in a fresh process on the agent, so importing
+# the module of an operation is part of its cold-start time. Every entry
+# point module is imported in a new interpreter with "python -X importtime"
+# and fails once it takes longer than the budget checked in
+# "import_budgets.json", or once it loads a module which should only be
+# loaded on first use (i.e. compat tables for nodes of version 2.X).
+#
+# The measured values are written to the JSON file set by the
+# "OPENSTACK_BENCHMARK_RESULTS" environment variable, like the operation
+# benchmarks.
+
+# Standard imports
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+# Local imports
+from openstack_plugin.tests.benchmarks import test_benchmarks
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), 'import_budgets.json')
+IMPORT_MARKER = '-- import --'
+# Modules listed when an entry point exceeds its import time budget
+TOP_IMPORTS = 5
+
+IMPORT_SCRIPT = """
+import sys, json
+sys.stderr.write({marker!r} + '\\n')
+import {module}
+sys.stdout.write(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _parse_importtime(output):
+    """
+    :param str output: Output of "python -X importtime" once the entry point
+    is imported
+    :return list: List of (module, cumulative time in microseconds) of the
+    modules imported directly by the script
+    """
+    imports = []
+    lines = output.split(IMPORT_MARKER, 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented under the module which imported them
+        if name.startswith(' ') and not name.startswith('  '):
+            imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+@unittest.skipIf(sys.version_info < (3, 7),
+                 '"python -X importtime" requires python 3.7+')
+class ImportTimeTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ImportTimeTestCase, cls).setUpClass()
+        with open(BUDGETS_FILE) as budgets_file:
+            cls.budgets = json.load(budgets_file)
+
+    @staticmethod
+    def _import(module):
+        process = subprocess.Popen(
+            [sys.executable, '-X', 'importtime', '-c',
+             IMPORT_SCRIPT.format(marker=IMPORT_MARKER, module=module)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+        stdout, stderr = process.communicate()
+        if process.returncode:
+            raise AssertionError(
+                'Unable to import {0}: {1}'.format(module, stderr))
+        return _parse_importtime(stderr), json.loads(stdout)
+
+    def test_entry_points_import_time(self):
+        forbidden_modules = self.budgets['forbidden_modules']
+        for module, budget in sorted(self.budgets['entry_points'].items()):
+            with self.subTest(module=module):
+                imports, modules = self._import(module)
+                import_time_ms = sum(
+                    cumulative for _, cumulative in imports) / 1000.0
+                test_benchmarks.OperationBenchmarkTestCase._record_result(
+                    'import:{0}'.format(module),
+                    {'import_time_ms': round(import_time_ms, 1)})
+
+                allowed_modules = budget.get('allowed_modules', [])
+                loaded = [name for name in forbidden_modules
+                          if name in modules and name not in allowed_modules]
+                self.assertEqual(
+                    loaded, [],
+                    '{0} loads modules which should be loaded on first '
+                    'use: {1}'.format(module, ', '.join(loaded)))
+
+                if import_time_ms > budget['import_time_ms']:
+                    top_imports = sorted(
+                        imports, key=lambda item: -item[1])[:TOP_IMPORTS]
+                    self.fail(
+                        'Import of {0} exceeded its budget: {1:.1f}ms > '
+                        '{2}ms, slowest imports: {3}'.format(
+                            module,
+                            import_time_ms,
+                            budget['import_time_ms'],
+                            ', '.join('{0} {1:.1f}ms'.format(
+                                name, cumulative / 1000.0)
+                                for name, cumulative in top_imports)))
@@ -350,6 +350,37 @@ class HostAggregateTestCase(OpenStackTestBase):
             host_aggregate.add_hosts(hosts=invalid_hosts_to_add,
                                      openstack_resource=None)
 
+    def test_delete_checkpoint_hosts(self, mock_connection):
+        # Prepare the context for delete operation
+        self._prepare_context_for_operation(
+            test_name='HostAggregateTestCase',
+            ctx_operation_name='cloudify.interfaces.lifecycle.delete',
+            test_runtime_properties={
+                RESOURCE_ID: 'a95b5509-c122-4c2f-823e-884bb559afe8',
+                'hosts': ['host-1', 'host-2', 'host-3']
+            })
+        aggregate_instance = openstack.compute.v2.aggregate.Aggregate(**{
+            'id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            'name': 'test_host_aggregate',
+            'hosts': []
+        })
+        mock_connection().compute.get_aggregate = \
+            mock.MagicMock(return_value=aggregate_instance)
+        mock_connection().compute.remove_host_from_aggregate = \
+            mock.MagicMock(return_value=aggregate_instance)
+        mock_connection().compute.delete_aggregate = \
+            mock.MagicMock(return_value=None)
+        self._ctx.instance.update = mock.MagicMock()
+
+        host_aggregate.delete(openstack_resource=None)
+
+        # The state is only stored before the next external call, there is
+        # nothing to store before removing the first host
+        self.assertEqual(self._ctx.instance.update.call_count, 3)
+        self.assertEqual(
+            mock_connection().compute.remove_host_from_aggregate.call_count,
+            3)
+
     def test_remove_hosts(self, mock_connection):
         # Prepare the context for remove hosts operation
         self._prepare_context_for_operation(
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Standard imports
+import tempfile
+
 # Third party imports
 import mock
 import openstack.compute.v2.server
@@ -25,7 +28,9 @@ import openstack.network.v2.floating_ip
 import openstack.network.v2.port
 import openstack.network.v2.security_group
 import openstack.exceptions
+from cloudify.context import OperationContext
 from cloudify.exceptions import (OperationRetry, NonRecoverableError)
+from cloudify.state import current_ctx
 from cloudify.mocks import (
     MockContext,
     MockNodeContext,
@@ -34,11 +39,15 @@ from cloudify.mocks import (
 
 
 # Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.compute import OpenstackServerBatch
 from openstack_plugin.tests.base import OpenStackTestBase
 from openstack_plugin.resources.compute import server
 from openstack_plugin.resources.network import port
 from openstack_plugin.utils import (get_snapshot_name,
-                                    generate_attachment_volume_key)
+                                    generate_attachment_volume_key,
+                                    compress_payload_field,
+                                    decompress_payload_field)
 from openstack_plugin.constants import (RESOURCE_ID,
                                         OPENSTACK_NAME_PROPERTY,
                                         OPENSTACK_TYPE_PROPERTY,
@@ -2858,6 +2867,82 @@ class ServerTestCase(OpenStackTestBase):
             self._ctx.instance.runtime_properties[SERVER_OPENSTACK_TYPE][
                 'name'], old_server.name)
 
+    def test_update_with_runtime_payload(self, mock_connection):
+        # Prepare the context for update operation
+        properties = dict()
+        properties['runtime_payload'] = {
+            'projection': True,
+            'extra_fields': ['config_drive'],
+            'compress_threshold': 100,
+            'max_size': 1000,
+        }
+        properties.update(self.node_properties)
+        self._prepare_context_for_operation(
+            test_name='ServerTestCase',
+            ctx_operation_name='cloudify.interfaces.operations.update',
+            type_hierarchy=self.type_hierarchy,
+            test_properties=properties,
+            test_runtime_properties={
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8'
+            })
+        metadata = {'key-{0}'.format(index): 'value' for index in range(20)}
+        links = [{'href': 'http://test/{0}'.format(index)}
+                 for index in range(10)]
+        networks = [{'port': 'a95b5509-c122-4c2f-823e-884bb559afe{0}'.format(
+            index)} for index in range(4)]
+        new_server = openstack.compute.v2.server.Server(**{
+            'id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            'name': 'update_test_server',
+            'status': 'ACTIVE',
+            'config_drive': True,
+            'key_name': 'test_key_name',
+            'metadata': metadata,
+            'links': links,
+            'user_data': 'test_user_data',
+            'networks': networks,
+            'addresses': {
+                'net-{0}'.format(index): [{'addr': '10.0.0.{0}'.format(index)}]
+                for index in range(10)
+            }
+        })
+        mock_connection().compute.update_server = \
+            mock.MagicMock(return_value=new_server)
+
+        server.update(args={'name': 'update_test_server'},
+                      openstack_resource=None)
+
+        payload = self._ctx.instance.runtime_properties[SERVER_OPENSTACK_TYPE]
+        self.assertEqual(payload['name'], 'update_test_server')
+        self.assertTrue(payload['config_drive'])
+        self.assertEqual(decompress_payload_field(payload['metadata']),
+                         metadata)
+        # Networks are read back by the plugin, so they are kept as is
+        self.assertEqual(payload['networks'], networks)
+        for field in ['links', 'user_data', 'addresses']:
+            self.assertNotIn(field, payload)
+
+    def test_disconnect_security_group_from_compressed_ports(
+            self, mock_connection):
+        self._prepare_context_for_operation(
+            test_name='ServerTestCase',
+            ctx_operation_name='cloudify.interfaces.lifecycle.delete',
+            type_hierarchy=self.type_hierarchy)
+        remote_port = openstack.network.v2.port.Port(**{
+            'id': 'a95b5509-c122-4c2f-823e-884bb559afe1',
+            'security_group_ids': ['sg-1', 'sg-2'],
+        })
+        mock_connection().network.get_port = \
+            mock.MagicMock(return_value=remote_port)
+        mock_connection().network.update_port = mock.MagicMock()
+
+        # Payloads stored by earlier runs may have compressed networks
+        server._disconnect_security_group_from_server_ports(
+            self.client_config,
+            {'networks': compress_payload_field([{'port': remote_port.id}])},
+            'sg-1')
+        _, kwargs = mock_connection().network.update_port.call_args
+        self.assertEqual(kwargs, {'security_groups': ['sg-2']})
+
     def test_list_servers(self, mock_connection):
         # Prepare the context for list servers operation
         self._prepare_context_for_operation(
@@ -2959,3 +3044,167 @@ class ServerTestCase(OpenStackTestBase):
 
         # Call creation validation
         server.creation_validation(openstack_resource=None)
+
+
+class ServerBatchTestCase(OpenStackTestBase):
+
+    def setUp(self):
+        super(ServerBatchTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.flavor = self.fake_openstack.add_resource(
+            'compute', 'flavors', {'name': 'test-flavor'})
+        self.image = self.fake_openstack.add_resource(
+            'image', 'images', {'name': 'test-image', 'status': 'active'})
+        self.network = self.fake_openstack.add_resource(
+            'network', 'networks', {'name': 'test-network'})
+        # Keep the batches of each test apart
+        temp_dir = tempfile.mkdtemp()
+        patcher = mock.patch('tempfile.gettempdir', return_value=temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @property
+    def client_config(self):
+        return self.fake_openstack.client_config
+
+    def _server_ctx(self, instance_id, **batch_config):
+        _ctx = self.get_mock_ctx(
+            'ServerBatchTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'os_family': 'linux',
+                'resource_config': {
+                    'name': 'test-server',
+                    'flavor_id': self.flavor['id'],
+                    'image_id': self.image['id'],
+                    'networks': [{'uuid': self.network['id']}],
+                },
+                'batch_config': dict(batch_config, enabled=True)
+            },
+            type_hierarchy=['cloudify.nodes.Root', 'cloudify.nodes.Compute'],
+            node_type='cloudify.nodes.openstack.Server')
+        _ctx.instance._id = instance_id
+        _ctx.node.number_of_instances = 3
+        return _ctx
+
+    def _create(self, _ctx):
+        _ctx._operation = OperationContext({
+            'name': 'cloudify.interfaces.lifecycle.create',
+            'retry_number': 0
+        })
+        current_ctx.set(_ctx)
+        server.create(openstack_resource=None)
+
+    def test_boot_servers_in_batch(self):
+        server_ctxs = [self._server_ctx('server_{0}'.format(index),
+                                        window=60,
+                                        size=3) for index in range(3)]
+
+        # Servers are not booted until the batch is full
+        for _ctx in server_ctxs[:2]:
+            self.assertRaises(OperationRetry, self._create, _ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/servers'), 0)
+
+        for _ctx in reversed(server_ctxs):
+            self._create(_ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/servers'), 1)
+        # The flavor is resolved once for the whole batch
+        self.assertEqual(
+            self.fake_openstack.count_requests('GET', '/flavors'), 1)
+
+        # Servers are assigned to the instances by their index
+        reservation_ids = set()
+        for index, _ctx in enumerate(server_ctxs, 1):
+            server_id = _ctx.instance.runtime_properties[RESOURCE_ID]
+            booted = self.fake_openstack.get_resource(
+                'compute', 'servers', server_id)
+            self.assertEqual(booted['name'],
+                             'test-server-{0}'.format(index))
+            self.assertIn(OpenstackServerBatch.BATCH_METADATA,
+                          booted['metadata'])
+            reservation_ids.add(booted['OS-EXT-SRV-ATTR:reservation_id'])
+            self.assertIn('__security_groups_link_to_port',
+                          _ctx.instance.runtime_properties)
+        self.assertEqual(len(reservation_ids), 1)
+
+    def test_boot_servers_in_batch_list_failed(self):
+        server_ctxs = [self._server_ctx('server_{0}'.format(index),
+                                        window=60,
+                                        size=2) for index in range(2)]
+        self.assertRaises(OperationRetry, self._create, server_ctxs[0])
+
+        # The servers are booted but listing them fails
+        with mock.patch.object(
+                OpenstackServerBatch, 'list_batch_servers',
+                side_effect=openstack.exceptions.HttpException(
+                    message='Service unavailable')):
+            self.assertRaises(OperationRetry, self._create, server_ctxs[1])
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/servers'), 1)
+
+        # The retries resolve the booted servers instead of booting them again
+        for _ctx in server_ctxs:
+            self._create(_ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/servers'), 1)
+        server_ids = set(_ctx.instance.runtime_properties[RESOURCE_ID]
+                         for _ctx in server_ctxs)
+        self.assertEqual(
+            server_ids,
+            set(server['id'] for server in
+                self.fake_openstack.list_resources('compute', 'servers')))
+
+
+class ServerStatusPollerTestCase(OpenStackTestBase):
+
+    def setUp(self):
+        super(ServerStatusPollerTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer(status_delay=60).start()
+        self.addCleanup(self.fake_openstack.stop)
+        flavor = self.fake_openstack.add_resource(
+            'compute', 'flavors', {'name': 'test-flavor'})
+        image = self.fake_openstack.add_resource(
+            'image', 'images', {'name': 'test-image', 'status': 'active'})
+        self.server_ids = [
+            self.fake_openstack.add_resource('compute', 'servers', {
+                'name': 'test-server-{0}'.format(index),
+                'flavor': {'id': flavor['id']},
+                'image': {'id': image['id']},
+                'status': 'BUILD'
+            })['id'] for index in range(3)]
+        # Keep the status cache of each test apart
+        temp_dir = tempfile.mkdtemp()
+        patcher = mock.patch('tempfile.gettempdir', return_value=temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _configure(self, server_id):
+        _ctx = self.get_mock_ctx(
+            'ServerStatusPollerTestCase',
+            test_properties={
+                'client_config': dict(self.fake_openstack.client_config,
+                                      status_poller={'enabled': True}),
+                'os_family': 'linux',
+                'resource_config': {'name': 'test-server'},
+            },
+            test_runtime_properties={RESOURCE_ID: server_id},
+            type_hierarchy=['cloudify.nodes.Root', 'cloudify.nodes.Compute'],
+            node_type='cloudify.nodes.openstack.Server',
+            ctx_operation_name='cloudify.interfaces.lifecycle.configure')
+        current_ctx.set(_ctx)
+        server.configure(openstack_resource=None)
+
+    def test_configure_building_servers(self):
+        for server_id in self.server_ids:
+            self.assertRaises(OperationRetry, self._configure, server_id)
+
+        # The statuses are read from one list request of the servers
+        self.assertEqual(
+            self.fake_openstack.count_requests('GET', '/servers/detail$'), 1)
+        for server_id in self.server_ids:
+            self.assertEqual(
+                self.fake_openstack.count_requests(
+                    'GET', '/servers/{0}$'.format(server_id)), 0)
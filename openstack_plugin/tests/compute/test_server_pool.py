@@ -0,0 +1,250 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Third party imports
+import mock
+import openstack.compute.v2.server
+from cloudify.context import OperationContext
+from cloudify.exceptions import OperationRetry
+from cloudify.state import current_ctx
+
+# Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.compute import OpenstackServerPool
+from openstack_plugin.tests.base import OpenStackTestBase
+from openstack_plugin.tests.benchmarks import test_benchmarks
+from openstack_plugin.resources.compute import server, server_pool
+from openstack_plugin.constants import (RESOURCE_ID,
+                                        SERVER_POOL_CONFIG,
+                                        SERVER_POOL_NAME_PROPERTY,
+                                        SERVER_POOL_NODE_TYPE)
+
+IMAGE_ID = 'a95b5509-c122-4c2f-823e-884bb559da12'
+FLAVOR_ID = 'a95b5509-c122-4c2f-823e-884bb559da13'
+
+
+class ServerPoolTestCase(OpenStackTestBase):
+
+    def setUp(self):
+        super(ServerPoolTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+        # Servers of the pool are claimed using their ports
+        self.network = self.fake_openstack.add_resource(
+            'network', 'networks', {'name': 'test-network'})
+
+    @property
+    def client_config(self):
+        return self.fake_openstack.client_config
+
+    def _pool_ctx(self, **pool_config):
+        return self.get_mock_ctx(
+            'ServerPoolTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'resource_config': {
+                    'name': 'test-pool',
+                    'image_id': IMAGE_ID,
+                    'flavor_id': FLAVOR_ID,
+                    'networks': [{'uuid': self.network['id']}],
+                },
+                'pool_config': pool_config
+            },
+            type_hierarchy=['cloudify.nodes.Root', SERVER_POOL_NODE_TYPE],
+            node_type=SERVER_POOL_NODE_TYPE)
+
+    def _server_ctx(self, pool_ctx):
+        relationships = self.get_mock_relationship_ctx_for_node([{
+            'node': {'properties': pool_ctx.node.properties},
+            'instance': {
+                'runtime_properties': pool_ctx.instance.runtime_properties
+            },
+            'type': 'cloudify.relationships.depends_on',
+            'type_hierarchy': ['cloudify.nodes.Root', SERVER_POOL_NODE_TYPE],
+        }])
+        return self.get_mock_ctx(
+            'ServerTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'resource_config': {'name': 'test-server'},
+            },
+            test_relationships=relationships,
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.nodes.openstack.Server'],
+            node_type='cloudify.nodes.openstack.Server')
+
+    def _run(self, _ctx, operation_name, operation, max_retries=5):
+        for retry_number in range(max_retries):
+            _ctx._operation = OperationContext({
+                'name': operation_name,
+                'retry_number': retry_number
+            })
+            current_ctx.set(_ctx)
+            try:
+                operation(openstack_resource=None)
+                return retry_number
+            except OperationRetry:
+                continue
+            finally:
+                test_benchmarks.OperationBenchmarkTestCase.\
+                    _store_runtime_properties(_ctx)
+        raise AssertionError(
+            'Operation {0} is still retried'.format(operation_name))
+
+    def _list_servers(self, state=None):
+        servers = self.fake_openstack.list_resources('compute', 'servers')
+        return [item for item in servers
+                if item['metadata'].get(OpenstackServerPool.STATE_METADATA)
+                == state or not state]
+
+    def _create_pool(self, **pool_config):
+        pool_ctx = self._pool_ctx(**pool_config)
+        self._run(pool_ctx, 'cloudify.interfaces.lifecycle.create',
+                  server_pool.create)
+        self._run(pool_ctx, 'cloudify.interfaces.lifecycle.configure',
+                  server_pool.configure)
+        return pool_ctx
+
+    def test_create_pool(self):
+        pool_ctx = self._create_pool(size=2)
+
+        self.assertEqual(pool_ctx.instance.runtime_properties[RESOURCE_ID],
+                         'test-pool')
+        pool_config = pool_ctx.instance.runtime_properties[SERVER_POOL_CONFIG]
+        self.assertEqual(pool_config['size'], 2)
+        self.assertEqual(pool_config['max_size'], 2)
+        servers = self._list_servers(OpenstackServerPool.STATE_AVAILABLE)
+        self.assertEqual(len(servers), 2)
+        for item in servers:
+            self.assertTrue(item['name'].startswith('test-pool-'))
+            self.assertEqual(
+                item['metadata'][OpenstackServerPool.POOL_METADATA],
+                'test-pool')
+
+        # The pool is not refilled while it is full
+        self._run(pool_ctx, 'cloudify.interfaces.operations.refill',
+                  server_pool.refill)
+        self.assertEqual(len(self._list_servers()), 2)
+
+    def test_claim_server(self):
+        pool_ctx = self._create_pool(size=1, recycle=True)
+        available = self._list_servers(OpenstackServerPool.STATE_AVAILABLE)
+
+        server_ctx = self._server_ctx(pool_ctx)
+        self._run(server_ctx, 'cloudify.interfaces.lifecycle.create',
+                  server.create)
+
+        server_id = server_ctx.instance.runtime_properties[RESOURCE_ID]
+        self.assertEqual(server_id, available[0]['id'])
+        self.assertEqual(
+            server_ctx.instance.runtime_properties[SERVER_POOL_NAME_PROPERTY],
+            'test-pool')
+        claimed = self.fake_openstack.get_resource(
+            'compute', 'servers', server_id)
+        self.assertEqual(claimed['name'], 'test-server')
+        self.assertEqual(
+            claimed['metadata'][OpenstackServerPool.STATE_METADATA],
+            OpenstackServerPool.STATE_CLAIMED)
+        # A server is booted in place of the claimed server
+        self.assertEqual(
+            len(self._list_servers(OpenstackServerPool.STATE_AVAILABLE)), 1)
+
+        # Claiming again with the same id returns the same server
+        server_ctx.instance.runtime_properties.clear()
+        self._run(server_ctx, 'cloudify.interfaces.lifecycle.create',
+                  server.create)
+        self.assertEqual(server_ctx.instance.runtime_properties[RESOURCE_ID],
+                         server_id)
+
+        # The pool is full, so the server is deleted instead of recycled
+        self._run(server_ctx, 'cloudify.interfaces.lifecycle.delete',
+                  server.delete)
+        self.assertIsNone(self.fake_openstack.get_resource(
+            'compute', 'servers', server_id))
+
+    def test_claim_server_once(self):
+        pool_ctx = self._create_pool(size=1)
+        pool_config = pool_ctx.instance.runtime_properties[SERVER_POOL_CONFIG]
+        pools = [OpenstackServerPool(self.client_config,
+                                     pool_config['resource_config'],
+                                     logger=mock.MagicMock())
+                 for _ in range(2)]
+        server_id = pools[0].claim('claim-a')
+        self.assertIsNotNone(server_id)
+
+        # Another agent listed the server before its metadata was updated,
+        # the port of the server is claimed already so its claim fails
+        claimed = self.fake_openstack.get_resource('compute', 'servers',
+                                                   server_id)
+        available = dict(claimed['metadata'])
+        available[OpenstackServerPool.STATE_METADATA] = \
+            OpenstackServerPool.STATE_AVAILABLE
+        available.pop(OpenstackServerPool.CLAIM_METADATA)
+        with mock.patch.object(OpenstackServerPool, 'list_pool_servers',
+                               return_value=[
+                                   openstack.compute.v2.server.Server(
+                                       id=server_id,
+                                       status='ACTIVE',
+                                       metadata=available)]):
+            self.assertIsNone(pools[1].claim('claim-b'))
+        # The same claim is returned when it is retried
+        self.assertEqual(pools[0].claim('claim-a'), server_id)
+
+    def test_refill_pool_once(self):
+        pool_ctx = self._create_pool(size=2)
+        pool_config = pool_ctx.instance.runtime_properties[SERVER_POOL_CONFIG]
+        # Servers are filtered by the name of the pool on the server side
+        self.fake_openstack.add_resource('compute', 'servers', {
+            'name': 'other-server',
+            'metadata': {OpenstackServerPool.POOL_METADATA: 'test-pool'},
+            'status': 'ACTIVE'})
+        pool = OpenstackServerPool(self.client_config,
+                                   pool_config['resource_config'],
+                                   logger=mock.MagicMock())
+        self.fake_openstack.reset_requests()
+        with mock.patch.object(OpenstackServerPool, '_lock',
+                               wraps=pool._lock) as lock:
+            self.assertEqual(pool.refill(2), [])
+        lock.assert_called_once_with()
+        self.assertEqual(
+            [server.name for server in pool.list_pool_servers()],
+            [server['name'] for server in self._list_servers()
+             if server['name'] != 'other-server'])
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/servers'), 0)
+
+    def test_recycle_server(self):
+        pool_ctx = self._create_pool(size=1, max_size=2, recycle=True)
+        server_ctx = self._server_ctx(pool_ctx)
+        self._run(server_ctx, 'cloudify.interfaces.lifecycle.create',
+                  server.create)
+        server_id = server_ctx.instance.runtime_properties[RESOURCE_ID]
+
+        self._run(server_ctx, 'cloudify.interfaces.lifecycle.delete',
+                  server.delete)
+        recycled = self.fake_openstack.get_resource(
+            'compute', 'servers', server_id)
+        self.assertTrue(recycled['name'].startswith('test-pool-'))
+        self.assertEqual(
+            recycled['metadata'][OpenstackServerPool.STATE_METADATA],
+            OpenstackServerPool.STATE_AVAILABLE)
+        self.assertNotIn(OpenstackServerPool.CLAIM_METADATA,
+                         recycled['metadata'])
+        self.assertEqual(
+            len(self._list_servers(OpenstackServerPool.STATE_AVAILABLE)), 2)
+
+        self._run(pool_ctx, 'cloudify.interfaces.lifecycle.delete',
+                  server_pool.delete)
+        self.assertEqual(self._list_servers(), [])
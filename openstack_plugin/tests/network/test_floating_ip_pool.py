@@ -0,0 +1,224 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Third party imports
+from cloudify.context import OperationContext
+from cloudify.mocks import MockContext
+from cloudify.state import current_ctx
+
+# Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.networks import OpenstackFloatingIPPool
+from openstack_plugin.tests.base import OpenStackTestBase
+from openstack_plugin.tests.benchmarks import test_benchmarks
+from openstack_plugin.resources.compute import server
+from openstack_plugin.resources.network import (floating_ip,
+                                                floating_ip_pool)
+from openstack_plugin.constants import (RESOURCE_ID,
+                                        FLOATING_IP_POOL_CLAIMS,
+                                        FLOATING_IP_POOL_CONFIG,
+                                        FLOATING_IP_POOL_NAME_PROPERTY,
+                                        FLOATING_IP_POOL_NODE_TYPE,
+                                        SERVER_PUBLIC_IP_PROPERTY)
+
+
+class FloatingIPPoolTestCase(OpenStackTestBase):
+
+    def setUp(self):
+        super(FloatingIPPoolTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.network = self.fake_openstack.add_resource(
+            'network', 'networks', {'name': 'external'})
+
+    @property
+    def client_config(self):
+        return self.fake_openstack.client_config
+
+    def _pool_ctx(self, **pool_config):
+        return self.get_mock_ctx(
+            'FloatingIPPoolTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'resource_config': {
+                    'floating_network_id': self.network['id'],
+                },
+                'pool_config': dict(pool_config, name='test-pool')
+            },
+            type_hierarchy=['cloudify.nodes.Root',
+                            FLOATING_IP_POOL_NODE_TYPE],
+            node_type=FLOATING_IP_POOL_NODE_TYPE)
+
+    def _floating_ip_ctx(self, pool_ctx, port_id=None):
+        relationships = self.get_mock_relationship_ctx_for_node([{
+            'node': {'properties': pool_ctx.node.properties},
+            'instance': {
+                'runtime_properties': pool_ctx.instance.runtime_properties
+            },
+            'type': 'cloudify.relationships.depends_on',
+            'type_hierarchy': ['cloudify.nodes.Root',
+                               FLOATING_IP_POOL_NODE_TYPE],
+        }])
+        return self.get_mock_ctx(
+            'FloatingIPTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'resource_config': {'port_id': port_id},
+            },
+            test_relationships=relationships,
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.nodes.openstack.FloatingIP'],
+            node_type='cloudify.nodes.openstack.FloatingIP')
+
+    def _server_relationship_ctx(self, pool_ctx, server_id):
+        server_ctx = self.get_mock_ctx(
+            'ServerTestCase',
+            test_properties={'client_config': self.client_config,
+                             'resource_config': {'name': 'test-server'}},
+            test_runtime_properties={RESOURCE_ID: server_id},
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.nodes.openstack.Server'],
+            node_type='cloudify.nodes.openstack.Server')
+        return self.get_mock_relationship_ctx(
+            deployment_name='FloatingIPPoolTestCase',
+            node_id=server_ctx.node.id,
+            test_source=MockContext({
+                'node': server_ctx.node,
+                'instance': server_ctx.instance,
+                '_context': {'node_id': server_ctx.node.id}
+            }),
+            test_target=MockContext({
+                'node': pool_ctx.node,
+                'instance': pool_ctx.instance,
+                '_context': {'node_id': pool_ctx.node.id}
+            }))
+
+    def _run(self, _ctx, operation_name, operation, **kwargs):
+        _ctx._operation = OperationContext({
+            'name': operation_name,
+            'retry_number': 0
+        })
+        current_ctx.set(_ctx)
+        try:
+            operation(openstack_resource=None, **kwargs)
+        finally:
+            test_benchmarks.OperationBenchmarkTestCase.\
+                _store_runtime_properties(_ctx)
+
+    def _list_floating_ips(self, description=None):
+        return [item for item in self.fake_openstack.list_resources(
+            'network', 'floatingips')
+            if not description or item['description'] == description]
+
+    def _create_pool(self, **pool_config):
+        pool_ctx = self._pool_ctx(**pool_config)
+        self._run(pool_ctx, 'cloudify.interfaces.lifecycle.create',
+                  floating_ip_pool.create)
+        return pool_ctx
+
+    def test_create_pool(self):
+        pool_ctx = self._create_pool(size=2)
+
+        self.assertEqual(pool_ctx.instance.runtime_properties[RESOURCE_ID],
+                         'test-pool')
+        pool_config = \
+            pool_ctx.instance.runtime_properties[FLOATING_IP_POOL_CONFIG]
+        self.assertEqual(pool_config['max_size'], 2)
+        available = self._list_floating_ips(
+            OpenstackFloatingIPPool.STATE_AVAILABLE)
+        self.assertEqual(len(available), 2)
+        for item in available:
+            self.assertEqual(item['floating_network_id'], self.network['id'])
+
+        self._run(pool_ctx, 'cloudify.interfaces.operations.refill',
+                  floating_ip_pool.refill)
+        self.assertEqual(len(self._list_floating_ips()), 2)
+
+        self._run(pool_ctx, 'cloudify.interfaces.lifecycle.delete',
+                  floating_ip_pool.delete)
+        self.assertEqual(self._list_floating_ips(), [])
+
+    def test_claim_floating_ip(self):
+        pool_ctx = self._create_pool(size=1)
+        available = self._list_floating_ips()[0]
+
+        floating_ip_ctx = self._floating_ip_ctx(pool_ctx, port_id='port-1')
+        self._run(floating_ip_ctx, 'cloudify.interfaces.lifecycle.create',
+                  floating_ip.create)
+        runtime_properties = floating_ip_ctx.instance.runtime_properties
+        self.assertEqual(runtime_properties[RESOURCE_ID], available['id'])
+        self.assertEqual(runtime_properties['floating_ip_address'],
+                         available['floating_ip_address'])
+        self.assertEqual(runtime_properties[FLOATING_IP_POOL_NAME_PROPERTY],
+                         'test-pool')
+        claimed = self.fake_openstack.get_resource(
+            'network', 'floatingips', available['id'])
+        self.assertEqual(claimed['port_id'], 'port-1')
+
+        # The floating ip is returned to the pool once it is deleted
+        self._run(floating_ip_ctx, 'cloudify.interfaces.lifecycle.delete',
+                  floating_ip.delete)
+        released = self.fake_openstack.get_resource(
+            'network', 'floatingips', available['id'])
+        self.assertIsNone(released['port_id'])
+        self.assertEqual(released['description'],
+                         OpenstackFloatingIPPool.STATE_AVAILABLE)
+
+    def test_empty_pool(self):
+        pool_ctx = self._create_pool(size=0)
+        floating_ip_ctx = self._floating_ip_ctx(pool_ctx)
+        self._run(floating_ip_ctx, 'cloudify.interfaces.lifecycle.create',
+                  floating_ip.create)
+        runtime_properties = floating_ip_ctx.instance.runtime_properties
+        self.assertNotIn(FLOATING_IP_POOL_NAME_PROPERTY, runtime_properties)
+        self.assertEqual(len(self._list_floating_ips()), 1)
+
+    def test_connect_server_to_pool(self):
+        pool_ctx = self._create_pool(size=1)
+        available = self._list_floating_ips()[0]
+        remote_server = self.fake_openstack.add_resource(
+            'compute', 'servers', {'name': 'test-server'})
+        self.fake_openstack.add_resource(
+            'compute', 'os-interface',
+            {'port_id': 'port-1',
+             'fixed_ips': [{'ip_address': '10.0.0.5'}]},
+            parent=(('servers', remote_server['id']),))
+
+        rel_ctx = self._server_relationship_ctx(pool_ctx,
+                                                remote_server['id'])
+        self._run(rel_ctx,
+                  'cloudify.interfaces.relationship_lifecycle.establish',
+                  server.connect_floating_ip,
+                  floating_ip=None)
+        source_properties = rel_ctx.source.instance.runtime_properties
+        self.assertEqual(source_properties[SERVER_PUBLIC_IP_PROPERTY],
+                         available['floating_ip_address'])
+        self.assertEqual(
+            source_properties[FLOATING_IP_POOL_CLAIMS],
+            {rel_ctx.target.instance.id: available['id']})
+        claimed = self.fake_openstack.get_resource(
+            'network', 'floatingips', available['id'])
+        self.assertEqual(claimed['port_id'], 'port-1')
+
+        self._run(rel_ctx,
+                  'cloudify.interfaces.relationship_lifecycle.unlink',
+                  server.disconnect_floating_ip,
+                  floating_ip=None)
+        self.assertEqual(
+            rel_ctx.source.instance.runtime_properties[
+                FLOATING_IP_POOL_CLAIMS], {})
+        released = self.fake_openstack.get_resource(
+            'network', 'floatingips', available['id'])
+        self.assertIsNone(released['port_id'])
@@ -13,11 +13,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Standard imports
+import tempfile
+
 # Third party imports
 import mock
 import openstack.network.v2.port
+from keystoneauth1 import exceptions as ks_exceptions
+from cloudify.context import OperationContext
+from cloudify.exceptions import OperationRetry
+from cloudify.state import current_ctx
 
 # Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.networks import (OpenstackPort,
+                                              OpenstackPortBatch)
 from openstack_plugin.tests.base import OpenStackTestBase
 from openstack_plugin.resources.network import port
 from openstack_plugin.constants import (RESOURCE_ID,
@@ -867,3 +877,119 @@ class PortTestCase(OpenStackTestBase):
 
         # Call creation validation
         port.creation_validation(openstack_resource=None)
+
+
+class PortBulkTestCase(OpenStackTestBase):
+
+    def setUp(self):
+        super(PortBulkTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.network = self.fake_openstack.add_resource(
+            'network', 'networks', {'name': 'test-network'})
+        # Keep the batches of each test apart
+        temp_dir = tempfile.mkdtemp()
+        patcher = mock.patch('tempfile.gettempdir', return_value=temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @property
+    def client_config(self):
+        return self.fake_openstack.client_config
+
+    def _port_ctx(self, instance_id, **bulk_config):
+        _ctx = self.get_mock_ctx(
+            'PortBulkTestCase',
+            test_properties={
+                'client_config': self.client_config,
+                'resource_config': {
+                    'name': instance_id,
+                    'network_id': self.network['id'],
+                },
+                'bulk_config': dict(bulk_config, enabled=True)
+            },
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.nodes.openstack.Port'],
+            node_type='cloudify.nodes.openstack.Port')
+        _ctx.instance._id = instance_id
+        _ctx.node.number_of_instances = 3
+        return _ctx
+
+    def _create(self, _ctx):
+        _ctx._operation = OperationContext({
+            'name': 'cloudify.interfaces.lifecycle.create',
+            'retry_number': 0
+        })
+        current_ctx.set(_ctx)
+        port.create(openstack_resource=None)
+
+    def test_create_ports_in_bulk(self):
+        port_ctxs = [self._port_ctx('port_{0}'.format(index),
+                                    window=60,
+                                    chunk_size=3) for index in range(3)]
+
+        # Ports are not created until the batch is full
+        for _ctx in port_ctxs[:2]:
+            self.assertRaises(OperationRetry, self._create, _ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/ports'), 0)
+
+        for _ctx in reversed(port_ctxs):
+            self._create(_ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/ports'), 1)
+
+        # Each instance gets the port created using its own config
+        for _ctx in port_ctxs:
+            port_id = _ctx.instance.runtime_properties[RESOURCE_ID]
+            created_port = self.fake_openstack.get_resource(
+                'network', 'ports', port_id)
+            self.assertEqual(created_port['name'], _ctx.instance.id)
+            self.assertEqual(created_port['network_id'], self.network['id'])
+
+    def test_create_port_after_window(self):
+        _ctx = self._port_ctx('port_0', window=0)
+        self._create(_ctx)
+        self.assertIn(RESOURCE_ID, _ctx.instance.runtime_properties)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/ports'), 1)
+
+    def test_resume_ports_in_bulk(self):
+        self.fake_openstack.add_resource('network', 'extensions', {
+            'alias': OpenstackPortBatch.TAGS_EXTENSION,
+            'name': 'Tag support for resources during bulk creation'})
+        port_ctxs = [self._port_ctx('port_{0}'.format(index),
+                                    window=60,
+                                    chunk_size=2) for index in range(2)]
+        self.assertRaises(OperationRetry, self._create, port_ctxs[0])
+
+        # Neutron creates the ports but the response is lost
+        create_ports = OpenstackPort.create_ports
+
+        def lost_create_ports(resource, *args, **kwargs):
+            create_ports(resource, *args, **kwargs)
+            raise ks_exceptions.ConnectFailure('Connection reset')
+
+        with mock.patch.object(OpenstackPort, 'create_ports',
+                               autospec=True,
+                               side_effect=lost_create_ports):
+            self.assertRaises(ks_exceptions.ConnectFailure,
+                              self._create, port_ctxs[1])
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/ports'), 1)
+
+        # The retries find the ports instead of creating them again
+        for _ctx in port_ctxs:
+            self._create(_ctx)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/ports'), 1)
+        ports = self.fake_openstack.list_resources('network', 'ports')
+        self.assertEqual(
+            sorted(created_port['id'] for created_port in ports),
+            sorted(_ctx.instance.runtime_properties[RESOURCE_ID]
+                   for _ctx in port_ctxs))
+        for _ctx in port_ctxs:
+            created_port = self.fake_openstack.get_resource(
+                'network', 'ports',
+                _ctx.instance.runtime_properties[RESOURCE_ID])
+            self.assertEqual(created_port['name'], _ctx.instance.id)
@@ -16,6 +16,8 @@
 # Third party imports
 import mock
 import openstack.network.v2.security_group
+from openstack import exceptions
+from cloudify.exceptions import NonRecoverableError
 import openstack.network.v2.security_group_rule
 
 # Local imports
@@ -24,7 +26,9 @@ from openstack_plugin.resources.network import security_group
 from openstack_plugin.constants import (RESOURCE_ID,
                                         OPENSTACK_NAME_PROPERTY,
                                         OPENSTACK_TYPE_PROPERTY,
-                                        SECURITY_GROUP_OPENSTACK_TYPE)
+                                        SECURITY_GROUP_OPENSTACK_TYPE,
+                                        SECURITY_GROUP_CREATED_RULES,
+                                        SECURITY_GROUP_FAILED_RULES)
 
 
 @mock.patch('openstack.connect')
@@ -118,9 +122,9 @@ class SecurityGroupTestCase(OpenStackTestBase):
                 'updated_at': '12'
             })
         ]
-        # Mock get security group response
-        mock_connection().network.create_security_group_rule = \
-            mock.MagicMock(side_effect=security_group_rules)
+        # Mock bulk create security group rules response
+        mock_connection().network.create_security_group_rules = \
+            mock.MagicMock(return_value=iter(security_group_rules))
 
         # Call configure in order to add security group rules
         security_group.configure(security_group_rules=[
@@ -140,6 +144,223 @@ class SecurityGroupTestCase(OpenStackTestBase):
             }
         ], openstack_resource=None)
 
+        self.assertEqual(
+            mock_connection().network.create_security_group_rules.call_count,
+            1)
+        self.assertEqual(
+            self._ctx.instance.runtime_properties[
+                SECURITY_GROUP_CREATED_RULES],
+            {
+                '0': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+                '1': 'a95b5509-c122-4c2f-823e-884bb559afe2'
+            })
+
+    def test_configure_resume_failed_rules(self, mock_connection):
+        # Prepare the context for configure operation
+        self._prepare_context_for_operation(
+            test_name='SecurityGroupTestCase',
+            ctx_operation_name='cloudify.interfaces.lifecycle.configure',
+            test_runtime_properties={
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8'
+            })
+
+        rules = [
+            {
+                'remote_ip_prefix': '10.0.0.0/8',
+                'port_range_max': '22',
+                'port_range_min': '22',
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            },
+            {
+                'remote_ip_prefix': '10.0.0.0/8',
+                'port_range_max': '80',
+                'port_range_min': '80',
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            }
+        ]
+        created_rule = \
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe3',
+                'direction': 'ingress',
+                'protocol': 'tcp',
+                'security_group_id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            })
+
+        # The bulk request fails, so rules are created one by one and the
+        # second rule fails
+        mock_connection().network.create_security_group_rules = \
+            mock.MagicMock(side_effect=exceptions.BadRequestException())
+        mock_connection().network.create_security_group_rule = \
+            mock.MagicMock(side_effect=[
+                created_rule,
+                exceptions.BadRequestException(message='Invalid rule')])
+
+        with self.assertRaises(NonRecoverableError):
+            security_group.configure(security_group_rules=rules,
+                                     openstack_resource=None)
+
+        runtime_properties = self._ctx.instance.runtime_properties
+        self.assertEqual(runtime_properties[SECURITY_GROUP_CREATED_RULES],
+                         {'0': 'a95b5509-c122-4c2f-823e-884bb559afe3'})
+        self.assertEqual(
+            len(runtime_properties[SECURITY_GROUP_FAILED_RULES]), 1)
+
+        # Run the task again and make sure that only the failed rule is
+        # created again
+        created_rule = \
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe4',
+                'direction': 'ingress',
+                'protocol': 'tcp',
+                'security_group_id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            })
+        mock_connection().network.create_security_group_rules = \
+            mock.MagicMock(return_value=iter([created_rule]))
+
+        security_group.configure(security_group_rules=rules,
+                                 openstack_resource=None)
+        mock_connection().network.create_security_group_rules\
+            .assert_called_once_with([rules[1]])
+        self.assertEqual(runtime_properties[SECURITY_GROUP_CREATED_RULES],
+                         {'0': 'a95b5509-c122-4c2f-823e-884bb559afe3',
+                          '1': 'a95b5509-c122-4c2f-823e-884bb559afe4'})
+        self.assertNotIn(SECURITY_GROUP_FAILED_RULES, runtime_properties)
+
+    def test_configure_reconcile_rules(self, mock_connection):
+        # Prepare the context for configure operation
+        self._prepare_context_for_operation(
+            test_name='SecurityGroupTestCase',
+            ctx_operation_name='cloudify.interfaces.lifecycle.configure',
+            test_runtime_properties={
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8'
+            })
+
+        security_group_id = 'a95b5509-c122-4c2f-823e-884bb559afe8'
+        existing_rules = [
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'rule-{0}'.format(port),
+                'direction': 'ingress',
+                'ether_type': 'IPv4',
+                'protocol': 'tcp',
+                'port_range_min': port,
+                'port_range_max': port,
+                'remote_ip_prefix': '10.0.0.0/8',
+                'security_group_id': security_group_id,
+            }) for port in range(1000, 1150)
+        ]
+        existing_rules.append(
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'default-egress',
+                'direction': 'egress',
+                'ether_type': 'IPv4',
+                'security_group_id': security_group_id,
+            }))
+
+        # Replace the last rule and use equivalent values for the others
+        rules = [{
+            'direction': 'ingress',
+            'protocol': '6',
+            'port_range_min': str(port),
+            'port_range_max': str(port),
+            'remote_ip_prefix': '10.1.2.3/8',
+        } for port in range(1000, 1149)]
+        rules.append({
+            'direction': 'ingress',
+            'protocol': 'tcp',
+            'port_range_min': 443,
+            'port_range_max': 443,
+            'remote_ip_prefix': '10.0.0.0/8',
+        })
+
+        created_rule = \
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'rule-443',
+                'security_group_id': security_group_id,
+            })
+        mock_connection().network.security_group_rules = \
+            mock.MagicMock(return_value=iter(existing_rules))
+        mock_connection().network.create_security_group_rules = \
+            mock.MagicMock(return_value=iter([created_rule]))
+        mock_connection().network.delete_security_group_rule = \
+            mock.MagicMock(return_value=None)
+
+        security_group.configure(security_group_rules=rules,
+                                 reconcile_rules=True,
+                                 openstack_resource=None)
+
+        mock_connection().network.security_group_rules.assert_called_once()
+        mock_connection().network.create_security_group_rules\
+            .assert_called_once_with([rules[-1]])
+        mock_connection().network.delete_security_group_rule\
+            .assert_called_once_with('rule-1149', ignore_missing=True)
+
+    def test_configure_compile_rules(self, mock_connection):
+        # Prepare the context for configure operation
+        self._prepare_context_for_operation(
+            test_name='SecurityGroupTestCase',
+            ctx_operation_name='cloudify.interfaces.lifecycle.configure',
+            test_runtime_properties={
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8'
+            })
+
+        rules = [
+            {
+                'remote_ip_prefix': '10.0.0.0/25',
+                'port_range_max': 22,
+                'port_range_min': 22,
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            },
+            {
+                'remote_ip_prefix': '10.0.0.128/25',
+                'port_range_max': 22,
+                'port_range_min': 22,
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            },
+            {
+                'remote_ip_prefix': '10.0.0.12/32',
+                'port_range_max': 22,
+                'port_range_min': 22,
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            },
+            {
+                'remote_ip_prefix': '192.168.1.0/24',
+                'port_range_max': 80,
+                'port_range_min': 80,
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            },
+            {
+                'remote_ip_prefix': '192.168.0.0/16',
+                'direction': 'ingress',
+                'protocol': 'tcp'
+            }
+        ]
+        created_rules = [
+            openstack.network.v2.security_group_rule.SecurityGroupRule(**{
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe{0}'.format(index),
+                'security_group_id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            }) for index in range(2)
+        ]
+        mock_connection().network.create_security_group_rules = \
+            mock.MagicMock(return_value=iter(created_rules))
+
+        security_group.configure(security_group_rules=rules,
+                                 compile_rules=True,
+                                 openstack_resource=None)
+
+        compiled_rules = \
+            mock_connection().network.create_security_group_rules.call_args[
+                0][0]
+        self.assertEqual(
+            [(rule['remote_ip_prefix'], rule.get('port_range_min'))
+             for rule in compiled_rules],
+            [('10.0.0.0/24', 22), ('192.168.0.0/16', None)])
+
     def test_disable_default_egress_rules(self, mock_connection):
         # Prepare the context for configure operation
         properties = dict()
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Standard imports
+import time
+
 # Third party imports
 import mock
 import openstack.compute.v2.flavor
@@ -29,13 +32,19 @@ from openstack_sdk.resources import compute
 from openstack_sdk.resources import networks
 from openstack_sdk.resources import volume
 from openstack_sdk.resources import images
+from openstack_plugin import compat
 from openstack_plugin.compat import Compat
-from openstack_plugin.compat import OLD_ROUTER_NODE
+from openstack_plugin.compat import OLD_ROUTER_NODE, RESOURCE_CLASS_MAP
 from openstack_plugin.constants import (CLOUDIFY_CREATE_OPERATION,
                                         CLOUDIFY_LIST_OPERATION,
                                         CLOUDIFY_UPDATE_OPERATION,
                                         CLOUDIFY_UPDATE_PROJECT_OPERATION)
 
+# Number of node instances transformed by the benchmark and the time budget
+# (in seconds) which must not be exceeded
+TRANSFORM_BENCHMARK_INSTANCES = 1000
+TRANSFORM_BENCHMARK_BUDGET = 5
+
 
 class CompatTestCase(OpenStackTestBase):
 
@@ -202,6 +211,59 @@ class CompatTestCase(OpenStackTestBase):
             ], compat_node._transform_rbac_policy
         )
 
+    def test_lookup_handler_cached_per_type(self):
+        type_hierarchy = ['cloudify.nodes.Root',
+                          'cloudify.openstack.nodes.Port',
+                          'test.nodes.Port']
+        context = self.get_mock_ctx(
+            test_name='CompatTestCase',
+            test_properties=self.node_properties,
+            node_type='test.nodes.Port',
+            type_hierarchy=type_hierarchy
+        )
+        compat_node = Compat(context=context, **{})
+        self.assertEqual(compat_node.lookup_handler_for_openstack_node_v2(),
+                         compat_node._transform_port)
+        self.assertEqual(
+            compat._transformation_handler_cache[tuple(type_hierarchy)],
+            '_transform_port')
+
+        # The hierarchy is not walked again for the same node type
+        with mock.patch('openstack_plugin.compat.TRANSFORMATION_HANDLER_MAP',
+                        {}):
+            compat_node = Compat(context=context, **{})
+            self.assertEqual(
+                compat_node.lookup_handler_for_openstack_node_v2(),
+                compat_node._transform_port)
+
+    def test_transform_benchmark(self):
+        node_properties = self.node_properties
+        node_properties['keypair'] = {
+            'name': 'test-name',
+            'public_key': 'test-public-key',
+        }
+        context = self.get_mock_ctx(
+            test_name='CompatTestCase',
+            test_properties=node_properties,
+            ctx_operation_name=CLOUDIFY_CREATE_OPERATION,
+            node_type='cloudify.openstack.nodes.KeyPair',
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.openstack.nodes.KeyPair']
+        )
+        current_ctx.set(context)
+        runtime_properties = context.instance.runtime_properties
+        start = time.time()
+        for _ in range(TRANSFORM_BENCHMARK_INSTANCES):
+            # Make sure each instance does the full transformation
+            runtime_properties.pop('__compat_resource_ids', None)
+            Compat(context=context,
+                   resource_id='test-resource',
+                   openstack_config=self.openstack_config).transform()
+        duration = time.time() - start
+        self.assertLess(duration, TRANSFORM_BENCHMARK_BUDGET,
+                        'Transforming {0} instances took {1:.2f} seconds'
+                        ''.format(TRANSFORM_BENCHMARK_INSTANCES, duration))
+
     def test_default_security_group_rule(self):
         context = self.get_mock_ctx(
             test_name='CompatTestCase',
@@ -754,6 +816,140 @@ class CompatTestCase(OpenStackTestBase):
             'a95b5509-c122-4c2f-823e-884aa259afe8'
         )
 
+    @mock.patch('openstack.connect')
+    def test_transform_server_resource_ids_cached(self, mock_connection):
+        node_properties = self.node_properties
+        node_properties['server'] = {
+            'name': 'test-name',
+            'flavor': 'test_flavor',
+            'image': 'test_image',
+            'user_data': 'test-secret'
+        }
+        context = self.get_mock_ctx(
+            test_name='CompatTestCase',
+            test_properties=node_properties,
+            ctx_operation_name=CLOUDIFY_CREATE_OPERATION,
+            node_type='cloudify.openstack.nodes.Server',
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.openstack.nodes.Server']
+        )
+        mock_connection().compute.find_flavor = mock.MagicMock(
+            return_value=openstack.compute.v2.flavor.Flavor(**{
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+                'name': 'test_flavor',
+            }))
+        mock_connection().image.get_image = mock.MagicMock(
+            return_value=openstack.image.v2.image.Image(**{
+                'id': 'a95b5509-c122-4c2f-823e-884aa259afe8',
+                'name': 'test_image',
+            }))
+
+        current_ctx.set(context)
+        responses = []
+        for _ in range(2):
+            compat_node = Compat(context=context,
+                                 resource_id='test-resource',
+                                 openstack_config=self.openstack_config)
+            responses.append(compat_node.transform())
+
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(responses[1]['client_config'], self.openstack_config)
+        self.assertEqual(responses[1]['resource_config']['flavor_id'],
+                         'a95b5509-c122-4c2f-823e-884bb559afe8')
+        self.assertEqual(mock_connection().compute.find_flavor.call_count, 1)
+        self.assertEqual(mock_connection().image.get_image.call_count, 1)
+        # Only the resolved ids are kept, not the resource config
+        runtime_properties = context.instance.runtime_properties
+        self.assertEqual(runtime_properties['__compat_resource_ids'], {
+            'flavor:test_flavor': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            'image:test_image': 'a95b5509-c122-4c2f-823e-884aa259afe8',
+        })
+        self.assertNotIn('test-secret', repr(runtime_properties))
+
+    @mock.patch('openstack.connect')
+    def test_transform_server_stale_resource_id(self, mock_connection):
+        node_properties = self.node_properties
+        node_properties['server'] = {
+            'name': 'test-name',
+            'flavor': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+            'image': 'test_image'
+        }
+        context = self.get_mock_ctx(
+            test_name='CompatTestCase',
+            test_properties=node_properties,
+            test_runtime_properties={'__compat_resource_ids': {
+                'image:test_image': 'a95b5509-c122-4c2f-823e-884aa259afe8'
+            }},
+            ctx_operation_name=CLOUDIFY_CREATE_OPERATION,
+            node_type='cloudify.openstack.nodes.Server',
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.openstack.nodes.Server']
+        )
+        mock_connection().compute.find_flavor = mock.MagicMock(
+            return_value=openstack.compute.v2.flavor.Flavor(**{
+                'id': 'a95b5509-c122-4c2f-823e-884bb559afe8',
+                'name': 'test_flavor',
+            }))
+        # A new image is uploaded under the same name and the cached one is
+        # deleted
+        new_image = openstack.image.v2.image.Image(**{
+            'id': 'a95b5509-c122-4c2f-823e-884aa259afe9',
+            'name': 'test_image',
+        })
+
+        def get_image(name_or_id):
+            if name_or_id in (new_image.id, new_image.name):
+                return new_image
+            raise openstack.exceptions.NotFoundException()
+
+        mock_connection().image.get_image = \
+            mock.MagicMock(side_effect=get_image)
+        mock_connection().image.images = \
+            mock.MagicMock(return_value=iter([new_image]))
+
+        current_ctx.set(context)
+        compat_node = Compat(context=context,
+                             resource_id='test-resource',
+                             openstack_config=self.openstack_config)
+        response = compat_node.transform()
+        self.assertEqual(response['resource_config']['image_id'],
+                         new_image.id)
+
+        # The cached id is still valid, so it is only checked by id
+        mock_connection().image.get_image.reset_mock()
+        self.assertEqual(
+            compat_node.get_openstack_resource_id(
+                RESOURCE_CLASS_MAP['image'], 'image', 'test_image'),
+            new_image.id)
+        mock_connection().image.get_image.assert_called_once_with(
+            new_image.id)
+        self.assertEqual(
+            context.instance.runtime_properties['__compat_resource_ids'],
+            {'flavor:a95b5509-c122-4c2f-823e-884bb559afe8':
+                'a95b5509-c122-4c2f-823e-884bb559afe8',
+             'image:test_image': new_image.id})
+
+    def test_transform_volume_twice(self):
+        node_properties = self.node_properties
+        node_properties['volume'] = {'name': 'test-name', 'size': '20'}
+        context = self.get_mock_ctx(
+            test_name='CompatTestCase',
+            test_properties=node_properties,
+            ctx_operation_name=CLOUDIFY_CREATE_OPERATION,
+            node_type='cloudify.openstack.nodes.Volume',
+            type_hierarchy=['cloudify.nodes.Root',
+                            'cloudify.openstack.nodes.Volume']
+        )
+        current_ctx.set(context)
+        for _ in range(2):
+            context.instance.runtime_properties.pop('size', None)
+            Compat(context=context,
+                   resource_id='test-resource',
+                   openstack_config=self.openstack_config).transform()
+            # The side effects of the transformation are done on each call
+            self.assertEqual(context.instance.runtime_properties['size'],
+                             '20')
+
     @mock.patch('openstack.connect')
     def test_transform_list_server(self, mock_connection):
         node_properties = self.node_properties
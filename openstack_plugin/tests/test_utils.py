@@ -0,0 +1,418 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import time
+import shutil
+import tempfile
+import logging
+import threading
+import unittest
+
+# Third party imports
+import mock
+from cloudify.exceptions import OperationRetry
+
+# Local imports
+from openstack_sdk import api_ledger
+from openstack_sdk import metrics
+from openstack_sdk.circuit_breaker import CircuitBreakerOpenException
+from openstack_plugin import utils
+
+
+class SetupOpenstackLoggingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(SetupOpenstackLoggingTestCase, self).setUp()
+        self._reset_openstack_logging()
+
+    def tearDown(self):
+        self._reset_openstack_logging()
+        super(SetupOpenstackLoggingTestCase, self).tearDown()
+
+    @staticmethod
+    def _reset_openstack_logging():
+        handler = utils._openstack_logging['handler']
+        if handler:
+            for logger_name in utils._openstack_logging['loggers']:
+                logging.getLogger(logger_name).removeHandler(handler)
+        utils._openstack_logging.update(
+            config_key=None, handler=None, loggers=[])
+
+    @staticmethod
+    def _get_cloudify_handlers(logger_name):
+        return [handler for handler in logging.getLogger(logger_name).handlers
+                if isinstance(handler, utils.CloudifyLogHandler)]
+
+    def test_setup_logging_same_config(self):
+        first_logger = mock.MagicMock()
+        second_logger = mock.MagicMock()
+        with mock.patch('openstack_plugin.utils.setup_logging',
+                        wraps=utils.setup_logging) as mock_setup_logging:
+            utils.setup_openstack_logging({}, first_logger)
+            calls = mock_setup_logging.call_count
+            utils.setup_openstack_logging({'logging': {}}, second_logger)
+            self.assertEqual(mock_setup_logging.call_count, calls)
+
+        handlers = self._get_cloudify_handlers('openstack')
+        self.assertEqual(len(handlers), 1)
+        self.assertEqual(handlers[0].cfy_logger, second_logger)
+
+    def test_setup_logging_concurrent_operations(self):
+        first_logger = mock.MagicMock()
+        second_logger = mock.MagicMock()
+        first_ready = threading.Event()
+        second_ready = threading.Event()
+
+        def first_operation():
+            utils.setup_openstack_logging({}, first_logger)
+            first_ready.set()
+            second_ready.wait(10)
+            logging.getLogger('openstack').warning('first operation')
+
+        thread = threading.Thread(target=first_operation)
+        thread.start()
+        first_ready.wait(10)
+        utils.setup_openstack_logging({}, second_logger)
+        second_ready.set()
+        thread.join(10)
+        logging.getLogger('openstack').warning('second operation')
+
+        # Each operation logs to its own cloudify logger
+        first_logger.log.assert_called_once_with(logging.WARNING,
+                                                 'first operation')
+        second_logger.log.assert_called_once_with(logging.WARNING,
+                                                  'second operation')
+
+    def test_setup_logging_config_changed(self):
+        utils.setup_openstack_logging({}, mock.MagicMock())
+        old_handler = self._get_cloudify_handlers('openstack')[0]
+
+        utils.setup_openstack_logging({
+            'logging': {
+                'loggers': {
+                    'keystoneauth.session': 'debug'
+                }
+            }
+        }, mock.MagicMock())
+        handlers = self._get_cloudify_handlers('openstack')
+        self.assertEqual(len(handlers), 1)
+        self.assertNotEqual(handlers[0], old_handler)
+        self.assertEqual(
+            self._get_cloudify_handlers('keystoneauth.session'), handlers)
+
+
+class BufferedCloudifyLogHandlerTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _record(level=logging.DEBUG, msg='message'):
+        return logging.LogRecord(
+            'openstack', level, __file__, 0, msg, None, None)
+
+    def test_records_forwarded_on_flush(self):
+        cfy_logger = mock.MagicMock()
+        handler = utils.BufferedCloudifyLogHandler(
+            cfy_logger, queue_size=100, batch_size=10, sample_rate=10)
+        for index in range(25):
+            handler.emit(self._record(msg='message-{0}'.format(index)))
+        handler.flush()
+        self.assertEqual(
+            cfy_logger.log.call_args_list,
+            [mock.call(logging.DEBUG, 'message-{0}'.format(index))
+             for index in range(25)])
+        handler.close()
+
+    def test_records_dropped_under_pressure(self):
+        release = threading.Event()
+        cfy_logger = mock.MagicMock()
+        cfy_logger.log.side_effect = lambda *args: release.wait(5)
+        handler = utils.BufferedCloudifyLogHandler(
+            cfy_logger, queue_size=10, batch_size=1, sample_rate=2)
+        # The first record blocks the background thread
+        handler.emit(self._record())
+        while handler.queue.qsize():
+            time.sleep(0.01)
+        for _ in range(20):
+            handler.emit(self._record())
+        for _ in range(5):
+            handler.emit(self._record(level=logging.ERROR))
+        # Once the queue is filling up, only half of debug records are
+        # kept and the records are dropped when it is full
+        self.assertEqual(handler.queue.qsize(), 10)
+        self.assertEqual(handler.dropped, 15)
+
+        release.set()
+        handler.flush()
+        self.assertEqual(cfy_logger.log.call_count, 11)
+        cfy_logger.warning.assert_called_once_with(
+            '15 openstack log records were dropped')
+        handler.close()
+
+    @mock.patch('openstack_plugin.utils._openstack_logging')
+    def test_flush_openstack_logging(self, mock_openstack_logging):
+        handler = mock.MagicMock()
+        mock_openstack_logging.__getitem__.return_value = handler
+        utils.flush_openstack_logging()
+        handler.flush.assert_called_once_with()
+
+
+class RelationshipIndexTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _relationship(openstack_type, resource_id, fetches):
+        rel = mock.MagicMock()
+        rel.type_hierarchy = ['cloudify.relationships.depends_on',
+                              'cloudify.relationships.connected_to']
+        rel.target.node.type_hierarchy = [
+            'cloudify.nodes.Root',
+            'cloudify.nodes.openstack.{0}'.format(openstack_type)]
+        runtime_properties = {
+            'id': resource_id,
+            'type': openstack_type
+        }
+
+        def get_runtime_properties():
+            fetches.append(resource_id)
+            return runtime_properties
+
+        type(rel.target.instance).runtime_properties = \
+            mock.PropertyMock(side_effect=get_runtime_properties)
+        return rel
+
+    def test_relationship_index(self):
+        fetches = []
+        _ctx = mock.MagicMock()
+        _ctx.instance.relationships = [
+            self._relationship('network', 'network-1', fetches),
+            self._relationship('port', 'port-1', fetches),
+            self._relationship('security_group', 'sg-1', fetches),
+            self._relationship('security_group', 'sg-2', fetches),
+        ]
+
+        self.assertEqual(
+            utils.find_openstack_ids_of_connected_nodes_by_openstack_type(
+                _ctx, 'security_group'), ['sg-1', 'sg-2'])
+        self.assertEqual(
+            utils.get_security_groups_from_relationships(_ctx),
+            [{'id': 'sg-1'}, {'id': 'sg-2'}])
+        self.assertEqual(
+            utils.get_networks_from_relationships(_ctx),
+            [{'uuid': 'network-1'}, {'port': 'port-1'}])
+        self.assertEqual(
+            utils.find_relationship_by_node_type(
+                _ctx.instance, 'cloudify.nodes.openstack.port'),
+            _ctx.instance.relationships[1])
+        self.assertEqual(
+            len(utils.find_relationships_by_relationship_type(
+                _ctx, 'cloudify.relationships.connected_to')), 4)
+        # Runtime properties of each target are only fetched once
+        self.assertEqual(fetches, ['network-1', 'port-1', 'sg-1', 'sg-2'])
+
+    def test_relationship_index_rebuilt(self):
+        fetches = []
+        ctx_node_instance = mock.MagicMock()
+        ctx_node_instance.relationships = [
+            self._relationship('network', 'network-1', fetches)]
+        index = utils.get_relationship_index(ctx_node_instance)
+        self.assertIs(utils.get_relationship_index(ctx_node_instance), index)
+
+        ctx_node_instance.relationships.append(
+            self._relationship('network', 'network-2', fetches))
+        self.assertEqual(
+            len(utils.get_relationship_index(
+                ctx_node_instance).by_openstack_type('network')), 2)
+
+
+class ReportApiCallLedgerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(ReportApiCallLedgerTestCase, self).setUp()
+        self.ledger = api_ledger.ApiCallLedger(
+            'cloudify.interfaces.lifecycle.create')
+        self.ledger.record(api_ledger.ApiCall(
+            'compute', 'GET', '/servers/{id}', 200, 0.5, 100))
+
+    def test_report_api_call_ledger(self):
+        _ctx = mock.MagicMock()
+        utils.report_api_call_ledger(
+            _ctx, _ctx, self.ledger, {'api_ledger': {'enabled': True}})
+        _ctx.logger.info.assert_called_once_with(
+            'Openstack API calls for cloudify.interfaces.lifecycle.create: '
+            'compute: 1 calls, total 0.500s, p95 0.500s')
+
+    def test_report_api_call_ledger_disabled(self):
+        _ctx = mock.MagicMock()
+        utils.report_api_call_ledger(_ctx, _ctx, self.ledger, {})
+        utils.report_api_call_ledger(
+            _ctx, _ctx, api_ledger.ApiCallLedger(),
+            {'api_ledger': {'enabled': True}})
+        _ctx.logger.info.assert_not_called()
+
+    @mock.patch('openstack_sdk.api_ledger.ApiCallLedger.write_metrics')
+    def test_report_api_call_ledger_metrics_file(self, mock_write_metrics):
+        _ctx = mock.MagicMock()
+        _ctx.deployment.id = 'test-deployment'
+        _ctx.instance.id = 'test-instance'
+        utils.report_api_call_ledger(
+            _ctx, _ctx, self.ledger,
+            {'api_ledger': {'enabled': True,
+                            'metrics_file': '/tmp/metrics.jsonl'}})
+        mock_write_metrics.assert_called_once_with(
+            '/tmp/metrics.jsonl',
+            deployment_id='test-deployment',
+            node_instance_id='test-instance',
+            operation='cloudify.interfaces.lifecycle.create')
+
+
+class ExportOperationMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(ExportOperationMetricsTestCase, self).setUp()
+        self._ctx = mock.MagicMock()
+        self._ctx.node.type = 'cloudify.nodes.openstack.Server'
+        self.ledger = api_ledger.ApiCallLedger(
+            'cloudify.interfaces.lifecycle.create')
+        self.ledger.record(api_ledger.ApiCall(
+            'keystone:5000', 'POST', '/v3/auth/tokens', 201, 0.1, 0))
+        self.ledger.record(api_ledger.ApiCall(
+            'compute', 'GET', '/servers/{id}', 200, 0.2, 100))
+        self.client_config = {'metrics': {'enabled': True}}
+
+    @mock.patch('openstack_plugin.utils.update_metrics_store')
+    def test_export_operation_metrics(self, mock_update_metrics_store):
+        utils.export_operation_metrics(
+            self._ctx, self._ctx, self.ledger, None, 2, self.client_config)
+        batch = mock_update_metrics_store.call_args[0][0]
+        labels = {
+            'node_type': 'cloudify.nodes.openstack.Server',
+            'operation': 'cloudify.interfaces.lifecycle.create'
+        }
+        self.assertEqual(batch.counters[metrics.OPERATIONS_TOTAL], {
+            metrics._labels_key(dict(labels, outcome='success')): 1})
+        self.assertEqual(batch.counters[metrics.AUTH_REQUESTS_TOTAL], {
+            metrics._labels_key({'status': '2xx'}): 1})
+        self.assertEqual(
+            sorted(batch.counters[metrics.API_REQUESTS_TOTAL].values()),
+            [1, 1])
+        self.assertNotIn(metrics.OPERATION_RETRIES_TOTAL, batch.counters)
+
+    @mock.patch('openstack_plugin.utils.update_metrics_store')
+    def test_export_operation_metrics_retry(self, mock_update_metrics_store):
+        try:
+            try:
+                raise CircuitBreakerOpenException('compute', 10)
+            except CircuitBreakerOpenException:
+                raise OperationRetry('Retry')
+        except OperationRetry as error:
+            utils.export_operation_metrics(
+                self._ctx, self._ctx, self.ledger, error, 2,
+                self.client_config)
+        batch = mock_update_metrics_store.call_args[0][0]
+        self.assertEqual(
+            list(batch.counters[metrics.OPERATION_RETRIES_TOTAL].values()),
+            [1])
+        self.assertIn(
+            '["reason", "circuit_breaker"]',
+            list(batch.counters[metrics.OPERATION_RETRIES_TOTAL])[0])
+
+    @mock.patch('openstack_plugin.utils.update_metrics_store')
+    def test_export_operation_metrics_disabled(self,
+                                               mock_update_metrics_store):
+        utils.export_operation_metrics(
+            self._ctx, self._ctx, self.ledger, None, 2, {})
+        mock_update_metrics_store.assert_not_called()
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    @mock.patch('openstack_plugin.utils.update_metrics_store')
+    def test_export_operation_metrics_without_file_locks(
+            self, mock_update_metrics_store):
+        utils.export_operation_metrics(
+            self._ctx, self._ctx, self.ledger, None, 2, self.client_config)
+        mock_update_metrics_store.assert_not_called()
+
+
+class OperationProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(OperationProfilerTestCase, self).setUp()
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        self._ctx = mock.MagicMock()
+        self._ctx.deployment.id = 'test-deployment'
+        self._ctx.instance.id = 'test-instance'
+        self._ctx.plugin.workdir = self.workdir
+        self._ctx.node.properties = {'client_config': {}}
+        self._ctx.instance.runtime_properties = {}
+
+    def test_operation_profiler_disabled(self):
+        self.assertIsNone(utils.start_operation_profiler(self._ctx, {}))
+        utils.stop_operation_profiler(
+            self._ctx, self._ctx, None, 'cloudify.interfaces.lifecycle.create')
+        self.assertEqual(os.listdir(self.workdir), [])
+
+    def test_operation_profiler(self):
+        profiler = utils.start_operation_profiler(
+            self._ctx, {'client_config': {'profiling': {'enabled': True}}})
+        utils.stop_operation_profiler(
+            self._ctx, self._ctx, profiler,
+            'cloudify.interfaces.lifecycle.create')
+        files = sorted(os.listdir(self.workdir))
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].startswith(
+            'test-deployment_test-instance_'
+            'cloudify.interfaces.lifecycle.create_'))
+        self.assertTrue(files[0].endswith('.pstats'))
+        self.assertTrue(files[1].endswith('.txt'))
+        self._ctx.logger.info.assert_called_once()
+
+
+class CompileSecurityGroupRulesTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _rule(port_min, port_max, remote_ip_prefix, protocol='tcp'):
+        return {
+            'direction': 'ingress',
+            'protocol': protocol,
+            'port_range_min': port_min,
+            'port_range_max': port_max,
+            'remote_ip_prefix': remote_ip_prefix
+        }
+
+    def test_compile_rules_covered_by_wider_range(self):
+        rules = [
+            self._rule(22, 22, '10.0.0.0/24'),
+            self._rule(80, 80, '10.1.0.0/24'),
+            self._rule(443, 443, '10.0.1.0/24', protocol='udp'),
+            self._rule(20, 100, '10.0.0.0/16'),
+            self._rule(None, None, '10.0.1.0/24', protocol=None),
+        ]
+        compiled_rules = utils.compile_security_group_rules(rules)
+        self.assertEqual(
+            [(rule['protocol'], rule.get('port_range_min'),
+              rule['remote_ip_prefix']) for rule in compiled_rules],
+            [('tcp', 80, '10.1.0.0/24'),
+             ('tcp', 20, '10.0.0.0/16'),
+             (None, None, '10.0.1.0/24')])
+
+    def test_compile_many_port_ranges(self):
+        rules = [self._rule(port, port, '10.{0}.{1}.0/24'.format(
+            port // 256, port % 256)) for port in range(1, 3001)]
+        rules.append(self._rule(1, 65535, '10.0.0.0/16'))
+        start = time.time()
+        compiled_rules = utils.compile_security_group_rules(rules)
+        self.assertLess(time.time() - start, 2)
+        # Ports below 256 are covered by the rule with the wider range
+        self.assertEqual(len(compiled_rules), 3001 - 255)
@@ -16,16 +16,24 @@
 # Standard imports
 import sys
 import copy
+import json
+import time
+import zlib
 import logging
 import base64
 import inspect
+import hashlib
 import re
+import bisect
+import tempfile
+import ipaddress
+import threading
+from queue import Queue, Empty, Full
 
 
 # Third part imports
 import openstack.exceptions
 from openstack._log import setup_logging
-from IPy import IP
 from cloudify import compute
 from cloudify import ctx
 from cloudify.exceptions import (NonRecoverableError, OperationRetry)
@@ -34,7 +42,22 @@ from cloudify.constants import NODE_INSTANCE, RELATIONSHIP_INSTANCE
 
 # Py2/3 compatibility
 from openstack_sdk._compat import text_type
-
+from openstack_sdk.api_ledger import get_api_ledger_config
+from openstack_sdk.circuit_breaker import CircuitBreakerOpenException
+from openstack_sdk.file_state import file_lock_supported
+from openstack_sdk.metrics import (MetricsBatch,
+                                   OPERATIONS_TOTAL,
+                                   OPERATION_DURATION,
+                                   OPERATION_RETRIES_TOTAL,
+                                   API_REQUESTS_TOTAL,
+                                   API_REQUEST_DURATION,
+                                   AUTH_REQUESTS_TOTAL,
+                                   get_metrics_config,
+                                   update_metrics_store)
+from openstack_sdk.profiling import (OperationProfiler,
+                                     get_profiling_config,
+                                     get_profile_name)
+from openstack_sdk.status_poller import get_polled_status
 
 # Local imports
 from openstack_plugin.constants import (
@@ -60,10 +83,27 @@ from openstack_plugin.constants import (
     KEY_USE_CFY_LOGGER,
     KEY_GROUPS,
     KEY_LOGGERS,
+    KEY_BUFFER,
+    DEFAULT_LOGGING_BUFFER_CONFIG,
     DEFAULT_LOGGING_CONFIG,
-    LOGGING_GROUPS
+    SECURITY_GROUP_RULE_PROTOCOLS,
+    LOGGING_GROUPS,
+    RUNTIME_PAYLOAD_CONFIG,
+    DEFAULT_RUNTIME_PAYLOAD_CONFIG,
+    RESOURCE_PAYLOAD_SENSITIVE_FIELDS,
+    RESOURCE_PAYLOAD_REQUIRED_FIELDS,
+    RESOURCE_PAYLOAD_FIELDS,
+    COMPRESSED_PAYLOAD_FIELD
 )
 
+# Runtime properties as they were stored by the last checkpoint, kept per
+# thread and node instance while an operation is running
+_runtime_properties_snapshots = threading.local()
+
+# Openstack logging config applied by the last "setup_openstack_logging"
+_openstack_logging = {'config_key': None, 'handler': None, 'loggers': []}
+_openstack_logging_lock = threading.Lock()
+
 
 NODE_NAME_RE = re.compile('^(.*)_.*$')  # Anything before last underscore
 
@@ -73,6 +113,9 @@ class CloudifyLogHandler(logging.Handler):
     A logging handler for Cloudify.
     A logger attached to this handler will result in logging being passed
     through to the Cloudify logger.
+    The handler is shared by the operations running in the same process, so
+    the Cloudify logger is kept per thread. Records emitted by threads which
+    did not set it are passed to the logger set last.
     """
     def __init__(self, cfy_logger):
         """
@@ -80,8 +123,18 @@ class CloudifyLogHandler(logging.Handler):
         :param cfy_logger: current Cloudify logger
         """
         logging.Handler.__init__(self)
+        self._local = threading.local()
         self.cfy_logger = cfy_logger
 
+    @property
+    def cfy_logger(self):
+        return getattr(self._local, 'cfy_logger', self._last_cfy_logger)
+
+    @cfy_logger.setter
+    def cfy_logger(self, cfy_logger):
+        self._local.cfy_logger = cfy_logger
+        self._last_cfy_logger = cfy_logger
+
     def emit(self, record):
         """
         Callback to emit a log record.
@@ -92,6 +145,215 @@ class CloudifyLogHandler(logging.Handler):
         self.cfy_logger.log(record.levelno, message)
 
 
+class BufferedCloudifyLogHandler(CloudifyLogHandler):
+    """
+    A logging handler for Cloudify which does not block the caller.
+    Log records are added to a bounded queue and a background thread
+    forwards them in batches to the Cloudify logger. Once the queue is
+    filling up only a sample of the debug records is kept, and records are
+    dropped when the queue is full.
+    """
+    # Queue usage ratio from which debug records are sampled
+    high_watermark = 0.8
+
+    def __init__(self, cfy_logger, queue_size, batch_size, sample_rate):
+        """
+        Constructor.
+        :param cfy_logger: current Cloudify logger
+        :param int queue_size: Maximum number of records in the queue
+        :param int batch_size: Maximum number of records forwarded at once
+        :param int sample_rate: Keep one of "sample_rate" debug records
+        when the queue is filling up
+        """
+        CloudifyLogHandler.__init__(self, cfy_logger)
+        self.queue = Queue(maxsize=queue_size)
+        self.batch_size = max(batch_size, 1)
+        self.sample_rate = max(sample_rate, 1)
+        self.dropped = 0
+        self._sampled = 0
+        self._worker = threading.Thread(target=self._forward_records)
+        self._worker.daemon = True
+        self._worker.start()
+
+    def emit(self, record):
+        """
+        Callback to emit a log record, the record is only queued.
+        :param record: log record to write
+        :type record: logging.LogRecord
+        """
+        if record.levelno <= logging.DEBUG and \
+                self.queue.qsize() >= self.queue.maxsize * self.high_watermark:
+            self._sampled += 1
+            if self._sampled % self.sample_rate:
+                self.dropped += 1
+                return
+        try:
+            # Arguments may be changed by the caller before the record is
+            # forwarded, so the message is resolved at this point
+            record.msg = record.getMessage()
+            record.args = None
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self.queue.put_nowait((self.cfy_logger, record))
+        except Full:
+            self.dropped += 1
+
+    def _forward_records(self):
+        while True:
+            records = [self.queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            for cfy_logger, record in records:
+                if record is None:
+                    continue
+                try:
+                    cfy_logger.log(record.levelno, self.format(record))
+                except Exception:
+                    self.handleError(record)
+            for _ in records:
+                self.queue.task_done()
+            if any(record is None for _, record in records):
+                return
+
+    def flush(self, timeout=30):
+        """
+        Wait until all the queued records are forwarded to Cloudify logger
+        and report the number of dropped records.
+        :param int timeout: Maximum number of seconds to wait
+        """
+        deadline = time.time() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and self._worker.is_alive():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.queue.all_tasks_done.wait(remaining)
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            self.cfy_logger.warning(
+                '{0} openstack log records were dropped'.format(dropped))
+
+    def close(self):
+        """
+        Forward the remaining records and stop the background thread.
+        """
+        if self._worker.is_alive():
+            self.flush()
+            self.queue.put((self.cfy_logger, None))
+        CloudifyLogHandler.close(self)
+
+
+# Attribute used to keep the relationship index on node instance context
+RELATIONSHIP_INDEX_ATTRIBUTE = '_openstack_relationship_index'
+
+
+class RelationshipIndex(object):
+    """
+    Index for the relationships of node instance which groups them by the
+    openstack type of the target, relationship type and target node type
+    hierarchy. Each group is built on first use and runtime properties of
+    every target instance are only read once.
+    """
+    def __init__(self, relationships):
+        self.relationships = relationships
+        self.size = len(relationships)
+        self._runtime_properties = None
+        self._groups = {}
+
+    def is_valid_for(self, relationships):
+        """
+        Check if the index is built for the current relationships
+        :param list relationships: Relationships of node instance
+        :return bool: Flag to indicate if the index can be used
+        """
+        return self.relationships is relationships \
+            and self.size == len(relationships)
+
+    @property
+    def runtime_properties(self):
+        """
+        Runtime properties of target instances in the same order of the
+        relationships
+        :return list: List of runtime properties
+        """
+        if self._runtime_properties is None:
+            self._runtime_properties = \
+                [rel.target.instance.runtime_properties
+                 for rel in self.relationships]
+        return self._runtime_properties
+
+    def _group(self, name, get_keys):
+        if name not in self._groups:
+            group = {}
+            for index, rel in enumerate(self.relationships):
+                for key in get_keys(index, rel):
+                    group.setdefault(key, []).append(rel)
+            self._groups[name] = group
+        return self._groups[name]
+
+    def by_openstack_type(self, type_name):
+        """
+        :param str type_name: Openstack type of target instances
+        :return list: List of RelationshipSubjectContext
+        """
+        return list(self._group(
+            'openstack_type',
+            lambda index, _: [self.runtime_properties[index].get(
+                OPENSTACK_TYPE_PROPERTY)]).get(type_name, []))
+
+    def by_relationship_type(self, type_name):
+        """
+        :param str type_name: Relationship type, inheritance tree is followed
+        :return list: List of RelationshipSubjectContext
+        """
+        return list(self._group(
+            'relationship_type',
+            lambda _, rel: set(rel.type_hierarchy)).get(type_name, []))
+
+    def by_node_type(self, node_type):
+        """
+        :param str node_type: Node type, inheritance tree is followed
+        :return list: List of RelationshipSubjectContext
+        """
+        return list(self._group(
+            'node_type',
+            lambda _, rel: set(rel.target.node.type_hierarchy)).get(
+            node_type, []))
+
+    def get_target_runtime_properties(self, rel):
+        """
+        :param rel: Relationship of node instance
+        :return dict: Runtime properties of the relationship target instance
+        """
+        for index, current_rel in enumerate(self.relationships):
+            if current_rel is rel:
+                return self.runtime_properties[index]
+        return rel.target.instance.runtime_properties
+
+
+def get_relationship_index(ctx_node_instance):
+    """
+    This method will return the relationship index for node instance. The
+    index is kept on node instance context which lives for the current
+    operation, so relationships are only scanned once per operation
+    :param ctx_node_instance: Cloudify node instance which is an instance of
+     cloudify.context.NodeInstanceContext
+    :return: Instance of RelationshipIndex
+    """
+    relationships = ctx_node_instance.relationships
+    index = getattr(ctx_node_instance, RELATIONSHIP_INDEX_ATTRIBUTE, None)
+    if not isinstance(index, RelationshipIndex) \
+            or not index.is_valid_for(relationships):
+        index = RelationshipIndex(relationships)
+        setattr(ctx_node_instance, RELATIONSHIP_INDEX_ATTRIBUTE, index)
+    return index
+
+
 def find_relationships_by_node_type_hierarchy(ctx_node_instance, node_type):
     """
     Finds all specified relationships of the Cloudify
@@ -101,8 +363,7 @@ def find_relationships_by_node_type_hierarchy(ctx_node_instance, node_type):
     :param node_type: Cloudify node type to search node_ctx.relationships for
     :return: List of Cloudify relationships
     """
-    return [target_rel for target_rel in ctx_node_instance.relationships
-            if node_type in target_rel.target.node.type_hierarchy]
+    return get_relationship_index(ctx_node_instance).by_node_type(node_type)
 
 
 def find_relationships_by_openstack_type(_ctx, type_name):
@@ -113,9 +374,7 @@ def find_relationships_by_openstack_type(_ctx, type_name):
     :param str type_name: Node type which is connected to the current node
     :return: list of RelationshipSubjectContext
     """
-    return [rel for rel in _ctx.instance.relationships
-            if rel.target.instance.runtime_properties.get(
-                OPENSTACK_TYPE_PROPERTY) == type_name]
+    return get_relationship_index(_ctx.instance).by_openstack_type(type_name)
 
 
 def find_relationship_by_node_type(ctx_node_instance, node_type):
@@ -140,8 +399,9 @@ def find_openstack_ids_of_connected_nodes_by_openstack_type(_ctx, type_name):
     :param str type_name: Node type which is connected to the current node
     :return: List of openstack resource ids
     """
-    return [rel.target.instance.runtime_properties[RESOURCE_ID]
-            for rel in find_relationships_by_openstack_type(_ctx, type_name)]
+    index = get_relationship_index(_ctx.instance)
+    return [index.get_target_runtime_properties(rel)[RESOURCE_ID]
+            for rel in index.by_openstack_type(type_name)]
 
 
 def find_relationships_by_relationship_type(_ctx, type_name):
@@ -153,9 +413,8 @@ def find_relationships_by_relationship_type(_ctx, type_name):
     from cloudify.relationships.depends_on.
     :return: list of RelationshipSubjectContext
     """
-
-    return [rel for rel in _ctx.instance.relationships if
-            type_name in rel.type_hierarchy]
+    return get_relationship_index(_ctx.instance).by_relationship_type(
+        type_name)
 
 
 def get_resource_id_from_runtime_properties(_ctx):
@@ -212,6 +471,52 @@ def resolve_ctx(_ctx):
     return _ctx
 
 
+def _get_runtime_properties_snapshots():
+    if not hasattr(_runtime_properties_snapshots, 'instances'):
+        _runtime_properties_snapshots.instances = {}
+    return _runtime_properties_snapshots.instances
+
+
+def begin_runtime_properties_transaction(_ctx):
+    """
+    This method will start tracking the runtime properties changes done by
+    the current operation, so that checkpoints only write them to the
+    manager when they are changed
+    :param _ctx: Cloudify node context
+    """
+    _get_runtime_properties_snapshots()[_ctx.instance.id] = \
+        copy.deepcopy(dict(_ctx.instance.runtime_properties))
+
+
+def end_runtime_properties_transaction(_ctx):
+    """
+    This method will stop tracking the runtime properties changes, the
+    remaining changes are stored by cloudify once the operation is done
+    :param _ctx: Cloudify node context
+    """
+    _get_runtime_properties_snapshots().pop(_ctx.instance.id, None)
+
+
+def checkpoint_runtime_properties(_ctx):
+    """
+    This method will store the buffered runtime properties changes on the
+    manager. It must be called before triggering an external call which is
+    not idempotent, so that a retried operation does not trigger it again.
+    Nothing is written when the runtime properties are not changed since the
+    last checkpoint
+    :param _ctx: Cloudify node context
+    :return bool: True if the runtime properties were written
+    """
+    snapshots = _get_runtime_properties_snapshots()
+    runtime_properties = dict(_ctx.instance.runtime_properties)
+    if snapshots.get(_ctx.instance.id) == runtime_properties:
+        return False
+    _ctx.instance.update()
+    if _ctx.instance.id in snapshots:
+        snapshots[_ctx.instance.id] = copy.deepcopy(runtime_properties)
+    return True
+
+
 def handle_userdata(existing_userdata):
     """
     This method will be responsible for handle user data provided by the
@@ -788,6 +1093,23 @@ def get_snapshot_name(object_type, snapshot_name, snapshot_incremental):
         snapshot_name, "increment" if snapshot_incremental else "backup")
 
 
+def get_batch_id(_ctx, client_config, *keys):
+    """
+    This will return the id of the batch the current node instance submits
+    its resource to, node instances share the same batch only if they belong
+    to the same node, use the same client config and have the same keys
+    :param _ctx: Cloudify context cloudify.context.CloudifyContext
+    :param dict client_config: Openstack configuration required to connect
+    to API
+    :param keys: Values which must be the same for all members of the batch
+    :return str: Batch id
+    """
+    batch_key = json.dumps(
+        [_ctx.deployment.id, _ctx.node.id, client_config] + list(keys),
+        sort_keys=True)
+    return hashlib.sha1(batch_key.encode('utf-8')).hexdigest()
+
+
 def get_resource_name(_ctx, type_name):
     """
     This will return resource name and will generate a name based on
@@ -878,6 +1200,16 @@ def wait_until_status(resource,
     :return: Instance of the current openstack object contains the updated
     status
     """
+    # Skip the request of the resource while the status poller of the
+    # project reports it in neither the desired status nor an error status
+    polled_status = get_polled_status(resource)
+    if polled_status and polled_status != status \
+            and polled_status not in error_statuses:
+        raise OperationRetry('{0} {1} current state not ready: {2}'
+                             ''.format(resource_type,
+                                       resource.resource_id,
+                                       polled_status))
+
     # Check the openstack resource status
     openstack_resource, ready = get_ready_resource_status(resource,
                                                           resource_type,
@@ -924,22 +1256,117 @@ def generate_attachment_volume_key(prefix, volume_id, server_id):
     return '{0}-attachment-volume'.format(_ctx.instance.id)
 
 
+def _get_payload_size(value):
+    return len(json.dumps(value, default=text_type))
+
+
+def compress_payload_field(value):
+    """
+    This method will compress payload field so that it takes less space
+    when it is stored as runtime property
+    :param value: Payload field value
+    :return dict: Compressed value
+    """
+    data = json.dumps(value, default=text_type).encode('utf-8')
+    return {
+        COMPRESSED_PAYLOAD_FIELD:
+            base64.b64encode(zlib.compress(data)).decode('ascii')
+    }
+
+
+def decompress_payload_field(value):
+    """
+    This method will restore payload field compressed by
+    "compress_payload_field", any other value is returned as is
+    :param value: Payload field value
+    :return: Decompressed value
+    """
+    if isinstance(value, dict) and COMPRESSED_PAYLOAD_FIELD in value:
+        data = base64.b64decode(value[COMPRESSED_PAYLOAD_FIELD])
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+    return value
+
+
+def get_runtime_payload_config(_ctx):
+    """
+    This method will return the runtime payload config of the current node
+    merged with the default configuration
+    :param _ctx: Cloudify context cloudify.context.CloudifyContext
+    :return dict: Runtime payload configuration
+    """
+    config = dict(DEFAULT_RUNTIME_PAYLOAD_CONFIG)
+    config.update(_ctx.node.properties.get(RUNTIME_PAYLOAD_CONFIG) or {})
+    return config
+
+
+def _truncate_payload(_ctx, payload, max_size, resource_type):
+    """
+    This method will drop the largest fields from the payload until it
+    fits the maximum size
+    :param _ctx: Cloudify context cloudify.context.CloudifyContext
+    :param dict payload: The payload to truncate
+    :param int max_size: Maximum size of the payload in bytes
+    :param str resource_type: Resource openstack type
+    """
+    size = _get_payload_size(payload)
+    if size <= max_size:
+        return
+    fields = sorted(
+        [key for key in payload
+         if key not in RESOURCE_PAYLOAD_REQUIRED_FIELDS],
+        key=lambda key: _get_payload_size(payload[key]),
+        reverse=True)
+    dropped_fields = []
+    for key in fields:
+        del payload[key]
+        dropped_fields.append(key)
+        size = _get_payload_size(payload)
+        if size <= max_size:
+            break
+    _ctx.logger.warning(
+        'Payload of {0} exceeds {1} bytes, the following fields are not '
+        'stored as runtime properties: {2}'.format(resource_type,
+                                                   max_size,
+                                                   dropped_fields))
+
+
 def assign_resource_payload_as_runtime_properties(_ctx,
                                                   payload,
                                                   resource_type):
     """
     Store resource configuration in the runtime
-    properties and cleans any potentially sensitive data.
+    properties and cleans any potentially sensitive data. The stored fields
+    and their size can be limited using "runtime_payload" node property
     :param _ctx: Cloudify context cloudify.context.CloudifyContext
     :param dict payload: The payload object for resource
     :param str resource_type: Resource openstack type
     """
-    if all([getattr(ctx, 'instance'), payload, resource_type]):
-        if resource_type not in ctx.instance.runtime_properties:
-            ctx.instance.runtime_properties[resource_type] = {}
+    if all([getattr(_ctx, 'instance'), payload, resource_type]):
+        config = get_runtime_payload_config(_ctx)
+        fields = None
+        if config['projection'] and resource_type in RESOURCE_PAYLOAD_FIELDS:
+            fields = set(RESOURCE_PAYLOAD_FIELDS[resource_type])
+            fields.update(config['extra_fields'] or [])
+
+        resource_payload = dict(
+            _ctx.instance.runtime_properties.get(resource_type) or {})
         for key, value in payload.items():
-            if key not in ['user_data', 'adminPass']:
-                ctx.instance.runtime_properties[resource_type][key] = value
+            if key in RESOURCE_PAYLOAD_SENSITIVE_FIELDS:
+                continue
+            if fields is not None and key not in fields:
+                continue
+            if config['compress_threshold'] and \
+                    key not in RESOURCE_PAYLOAD_REQUIRED_FIELDS and \
+                    _get_payload_size(value) > config['compress_threshold']:
+                value = compress_payload_field(value)
+            resource_payload[key] = value
+
+        if config['max_size']:
+            _truncate_payload(_ctx,
+                              resource_payload,
+                              config['max_size'],
+                              resource_type)
+        _ctx.instance.runtime_properties[resource_type] = resource_payload
 
 
 def allow_to_run_operation_for_external_node(operation_name):
@@ -970,6 +1397,8 @@ def validate_ip_or_range_syntax(_ctx, address):
     :param _ctx: Cloudify context cloudify.context.CloudifyContext
     :param str address: Provided address
     """
+    # IPy is only needed by the few operations which handle addresses
+    from IPy import IP
     _ctx.logger.debug('Checking if {0} is a valid address'.format(address))
     try:
         IP(address)
@@ -980,6 +1409,254 @@ def validate_ip_or_range_syntax(_ctx, address):
         raise NonRecoverableError(err)
 
 
+def get_security_group_rule_key(rule):
+    """
+    This method will normalise security group rule into a canonical hashable
+    tuple, so that rules provided by the user can be compared with the
+    existing rules returned by openstack
+    :param rule: Security group rule config or instance of
+    openstack.network.v2.security_group_rule.SecurityGroupRule
+    :return tuple: (direction, ethertype, protocol, port_range_min,
+    port_range_max, remote_ip_prefix, remote_group_id)
+    """
+    remote_ip_prefix = rule.get('remote_ip_prefix') or None
+    ip_version = None
+    if remote_ip_prefix:
+        from IPy import IP
+        try:
+            ip = IP(remote_ip_prefix, make_net=True)
+            remote_ip_prefix = ip.strNormal(1)
+            ip_version = ip.version()
+        except ValueError:
+            pass
+
+    ethertype = rule.get('ethertype') or rule.get('ether_type')
+    if not ethertype:
+        ethertype = 'IPv6' if ip_version == 6 else 'IPv4'
+
+    protocol = rule.get('protocol')
+    protocol = str(protocol).lower() if protocol not in (None, '') else None
+    protocol = SECURITY_GROUP_RULE_PROTOCOLS.get(protocol, protocol)
+
+    ports = []
+    for port_key in ('port_range_min', 'port_range_max'):
+        port = rule.get(port_key)
+        ports.append(int(port) if port not in (None, '') else None)
+
+    return (
+        (rule.get('direction') or 'ingress').lower(),
+        ethertype,
+        protocol,
+        ports[0],
+        ports[1],
+        remote_ip_prefix,
+        rule.get('remote_group_id') or None,
+    )
+
+
+def _merge_address_ranges(ranges):
+    """
+    This method will merge overlapping and adjacent address ranges
+    :param list ranges: List of (start, end) integer address ranges
+    :return list: Sorted list of disjoint [start, end] address ranges
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _address_ranges_cover(ranges, starts, start, end):
+    """
+    This method will check if address range is covered by merged ranges
+    :param list ranges: Sorted list of disjoint [start, end] address ranges
+    :param list starts: Start address of each range in "ranges"
+    :param int start: Start address of the range to check
+    :param int end: End address of the range to check
+    :return bool: True if the range is covered
+    """
+    index = bisect.bisect_right(starts, start) - 1
+    return index >= 0 and ranges[index][1] >= end
+
+
+def _security_group_rule_covers(rule_key, other_key):
+    """
+    This method will check if the traffic matched by "other_key" is a subset
+    of the traffic matched by "rule_key", ignoring the remote ip prefix
+    :param tuple rule_key: Normalised key of the broader rule
+    :param tuple other_key: Normalised key of the narrower rule
+    :return bool: True if the rule covers the other rule
+    """
+    direction, ethertype, protocol, port_min, port_max = rule_key
+    if (direction, ethertype) != other_key[:2] or rule_key == other_key:
+        return False
+    if protocol is not None and protocol != other_key[2]:
+        return False
+    if port_min is None and port_max is None:
+        return True
+    if other_key[3] is None or other_key[4] is None or \
+            protocol in ('icmp', 'ipv6-icmp'):
+        # For icmp the port range holds type and code, which are not ranges
+        return (port_min, port_max) == other_key[3:]
+    return (port_min is None or port_min <= other_key[3]) and \
+        (port_max is None or port_max >= other_key[4])
+
+
+def _port_bounds(rule_key):
+    """
+    This method will return the port range of normalised rule key as bounds
+    that can be compared, missing ports match any port
+    :param tuple rule_key: Normalised key of the rule
+    :return tuple: (low, high) port bounds
+    """
+    return (-1 if rule_key[3] is None else rule_key[3],
+            65536 if rule_key[4] is None else rule_key[4])
+
+
+def _index_security_group_rules(rule_keys):
+    """
+    This method will index normalised rule keys by direction, ethertype and
+    protocol, with their port ranges sorted by the lower bound, so that the
+    rules covering a rule are found without comparing it with every rule
+    :param iterable rule_keys: Normalised keys of the rules
+    :return dict: Dict of port ranges per (direction, ethertype, protocol)
+    """
+    buckets = {}
+    for rule_key in rule_keys:
+        buckets.setdefault(rule_key[:3], []).append(rule_key)
+
+    index = {}
+    for bucket, bucket_keys in buckets.items():
+        bucket_keys.sort(key=_port_bounds)
+        bounds = [_port_bounds(rule_key) for rule_key in bucket_keys]
+        # Position of the closest previous range whose upper bound is not
+        # lower, ranges in between can be skipped while searching
+        previous = []
+        stack = []
+        for position, (_, high) in enumerate(bounds):
+            while stack and bounds[stack[-1]][1] < high:
+                stack.pop()
+            previous.append(stack[-1] if stack else -1)
+            stack.append(position)
+        index[bucket] = {
+            'keys': bucket_keys,
+            'members': set(bucket_keys),
+            'lows': [low for low, _ in bounds],
+            'highs': [high for _, high in bounds],
+            'previous': previous,
+        }
+    return index
+
+
+def _find_broader_security_group_rules(index, rule_key):
+    """
+    This method will find the rules covering a rule using the index built by
+    "_index_security_group_rules"
+    :param dict index: Index of the rules
+    :param tuple rule_key: Normalised key of the narrower rule
+    :return list: Normalised keys of the rules covering the rule
+    """
+    direction, ethertype, protocol, port_min, port_max = rule_key
+    candidates = set()
+    for other_protocol in set([None, protocol]):
+        ranges = index.get((direction, ethertype, other_protocol))
+        if not ranges:
+            continue
+        # Rules matching any port or the same port range
+        for ports in ((None, None), (port_min, port_max)):
+            other_key = (direction, ethertype, other_protocol) + ports
+            if other_key in ranges['members']:
+                candidates.add(other_key)
+        if port_min is None or port_max is None:
+            continue
+        # Rules whose port range contains the port range of the rule
+        position = bisect.bisect_right(ranges['lows'], port_min) - 1
+        while position >= 0:
+            if ranges['highs'][position] >= port_max:
+                candidates.add(ranges['keys'][position])
+                position -= 1
+            else:
+                position = ranges['previous'][position]
+    return [other_key for other_key in candidates
+            if _security_group_rule_covers(other_key, rule_key)]
+
+
+def compile_security_group_rules(rules):
+    """
+    This method will minimise the number of security group rules without
+    changing the allowed traffic. Remote ip prefixes of rules that match the
+    same traffic (direction, ethertype, protocol and port range) are merged
+    when they overlap or are adjacent, and prefixes already covered by a
+    broader rule are dropped. Rules using remote group or an invalid prefix
+    are only de-duplicated
+    :param list rules: List of security group rules config
+    :return list: Compiled list of security group rules config
+    """
+    groups = {}
+    passthrough = {}
+    for rule in rules:
+        prefix = rule.get('remote_ip_prefix') or None
+        ethertype = rule.get('ethertype') or rule.get('ether_type')
+        network = None
+        if prefix and not rule.get('remote_group_id'):
+            try:
+                network = ipaddress.ip_network(text_type(prefix),
+                                               strict=False)
+            except ValueError:
+                pass
+        if not rule.get('remote_group_id') and (network or not prefix):
+            if not ethertype and network and network.version == 6:
+                ethertype = 'IPv6'
+            key = get_security_group_rule_key(
+                dict(rule, remote_ip_prefix=None, ethertype=ethertype))[:5]
+            if not network:
+                network = ipaddress.ip_network(
+                    '::/0' if key[1] == 'IPv6' else '0.0.0.0/0')
+            if (key[1] == 'IPv6') == (network.version == 6):
+                group = groups.setdefault(
+                    key, {'rule': rule, 'any': False, 'ranges': []})
+                group['any'] = group['any'] or not prefix
+                start = int(network.network_address)
+                group['ranges'].append(
+                    (start, start + network.num_addresses - 1))
+                continue
+        passthrough.setdefault(get_security_group_rule_key(rule), rule)
+
+    for group in groups.values():
+        group['ranges'] = _merge_address_ranges(group['ranges'])
+        group['starts'] = [start for start, _ in group['ranges']]
+
+    index = _index_security_group_rules(groups)
+    compiled_rules = []
+    for key, group in groups.items():
+        broader_groups = [groups[other_key] for other_key in
+                          _find_broader_security_group_rules(index, key)]
+        address = ipaddress.IPv6Address if key[1] == 'IPv6' \
+            else ipaddress.IPv4Address
+        for start, end in group['ranges']:
+            if any(_address_ranges_cover(other['ranges'],
+                                         other['starts'],
+                                         start, end)
+                   for other in broader_groups):
+                continue
+            if group['any'] and \
+                    end - start + 1 == 2 ** address(start).max_prefixlen:
+                compiled_rules.append(copy.deepcopy(group['rule']))
+                compiled_rules[-1].pop('remote_ip_prefix', None)
+                continue
+            for network in ipaddress.summarize_address_range(address(start),
+                                                             address(end)):
+                compiled_rule = copy.deepcopy(group['rule'])
+                compiled_rule['remote_ip_prefix'] = text_type(network)
+                compiled_rules.append(compiled_rule)
+
+    compiled_rules.extend(passthrough.values())
+    return compiled_rules
+
+
 def get_target_node_from_capabilities(node_name):
     """
     This method will use cloudify context capabilities in order to find
@@ -1089,11 +1766,11 @@ def get_networks_from_relationships(_ctx):
     :return: List of networks objects
     """
     networks = []
-    for rel in _ctx.instance.relationships:
+    for runtime_properties in \
+            get_relationship_index(_ctx.instance).runtime_properties:
         network = {}
-        type_name = rel.target.instance.runtime_properties.get(
-                OPENSTACK_TYPE_PROPERTY)
-        resource_id = rel.target.instance.runtime_properties.get(RESOURCE_ID)
+        type_name = runtime_properties.get(OPENSTACK_TYPE_PROPERTY)
+        resource_id = runtime_properties.get(RESOURCE_ID)
         if type_name == NETWORK_OPENSTACK_TYPE:
             network['uuid'] = resource_id
             networks.append(network)
@@ -1110,18 +1787,25 @@ def get_security_groups_from_relationships(_ctx):
     :param _ctx: Cloudify context instance cloudify.context.CloudifyContext
     :return: List of security groups objects
     """
+    index = get_relationship_index(_ctx.instance)
     security_groups = []
-    for rel in find_relationships_by_openstack_type(_ctx, 'security_group'):
-        resource_id = rel.target.instance.runtime_properties.get(RESOURCE_ID)
+    for rel in index.by_openstack_type('security_group'):
+        resource_id = index.get_target_runtime_properties(rel).get(
+            RESOURCE_ID)
         security_groups.append({
             'id': resource_id
         })
     return security_groups
 
 
-def setup_openstack_logging(client_config, logger):
-    # Get the logging object
-    logging_config = client_config.pop('logging', dict())
+def _get_openstack_loggers_config(logging_config):
+    """
+    This method will merge logging config provided by the user with the
+    default logging config for openstack
+    :param dict logging_config: Logging config provided by the user
+    :return tuple: Flag to redirect the logs to cloudify logger and the map
+    between logger names and logging levels
+    """
     # Get a flag in order to check if we should redirect all the logs to
     # the cloudify logs
     if KEY_USE_CFY_LOGGER not in logging_config:
@@ -1164,15 +1848,240 @@ def setup_openstack_logging(client_config, logger):
         'keystoneauth.identity.base': logging.WARNING,
         'keystoneauth.identity.generic.base': logging.WARNING,
     })
-    # Check if it is allowed to redirect openstack logs to cloudify
-    ctx_log_handler = CloudifyLogHandler(logger) if use_cfy_logger else None
-
-    # Check each logger with is logging level so that we can add for
-    # each logger the cloudify handler to log all events there
-    for logger_name, logger_level in configured_loggers.items():
-        # Before set the log make sure to convert it to upper case
-        is_str = isinstance(logger_level, str)\
-                 or isinstance(logger_level, text_type)
-        if is_str:
-            logger_level = logger_level.upper()
-        setup_logging(logger_name, [ctx_log_handler], logger_level)
+    return use_cfy_logger, configured_loggers
+
+
+def setup_openstack_logging(client_config, logger):
+    """
+    This method will configure openstack loggers and redirect their logs to
+    the cloudify logger. The loggers are only configured again when the
+    logging config is changed, otherwise the existing cloudify handler is
+    pointed to the current cloudify logger for the current thread
+    :param dict client_config: Openstack client configuration
+    :param logger: Current cloudify logger
+    """
+    # Get the logging object
+    logging_config = client_config.pop('logging', dict())
+    config_key = json.dumps(logging_config, sort_keys=True, default=text_type)
+
+    with _openstack_logging_lock:
+        old_handler = _openstack_logging['handler']
+        if config_key == _openstack_logging['config_key']:
+            if old_handler:
+                old_handler.cfy_logger = logger
+            return
+
+        use_cfy_logger, configured_loggers = \
+            _get_openstack_loggers_config(logging_config)
+        # Remove the handler added by the previous config, so that handlers
+        # are swapped instead of added for every config
+        if old_handler:
+            for logger_name in _openstack_logging['loggers']:
+                logging.getLogger(logger_name).removeHandler(old_handler)
+            old_handler.close()
+
+        # Check if it is allowed to redirect openstack logs to cloudify
+        buffer_config = dict(DEFAULT_LOGGING_BUFFER_CONFIG)
+        buffer_config.update(logging_config.get(KEY_BUFFER) or {})
+        if not use_cfy_logger:
+            ctx_log_handler = None
+        elif buffer_config['enabled']:
+            ctx_log_handler = BufferedCloudifyLogHandler(
+                logger,
+                queue_size=buffer_config['queue_size'],
+                batch_size=buffer_config['batch_size'],
+                sample_rate=buffer_config['sample_rate'])
+        else:
+            ctx_log_handler = CloudifyLogHandler(logger)
+
+        # Check each logger with is logging level so that we can add for
+        # each logger the cloudify handler to log all events there
+        for logger_name, logger_level in configured_loggers.items():
+            # Before set the log make sure to convert it to upper case
+            is_str = isinstance(logger_level, str)\
+                or isinstance(logger_level, text_type)
+            if is_str:
+                logger_level = logger_level.upper()
+            setup_logging(logger_name,
+                          [ctx_log_handler] if ctx_log_handler else [],
+                          logger_level)
+
+        _openstack_logging.update(config_key=config_key,
+                                  handler=ctx_log_handler,
+                                  loggers=list(configured_loggers))
+
+
+def flush_openstack_logging():
+    """
+    This method will make sure that all the openstack log records emitted
+    by the current operation are forwarded to cloudify logger
+    """
+    with _openstack_logging_lock:
+        handler = _openstack_logging['handler']
+    if handler:
+        handler.flush()
+
+
+def report_api_call_ledger(_ctx, ctx_node, ledger, client_config=None):
+    """
+    This method will log the summary of openstack API calls sent by the
+    current operation and append it to the local metrics file if it is
+    configured
+    :param _ctx: Cloudify context instance cloudify.context.CloudifyContext
+    :param ctx_node: Cloudify node instance which is could be an instance of
+    RelationshipSubjectContext or CloudifyContext
+    :param ledger: Instance of ApiCallLedger
+    :param dict client_config: Openstack client configuration
+    """
+    config = get_api_ledger_config(client_config or {})
+    if not ledger or not ledger.calls or not config['enabled']:
+        return
+
+    _ctx.logger.info(
+        'Openstack API calls for {0}: {1}'.format(
+            ledger.name, ledger.format_summary()))
+    if config['metrics_file']:
+        try:
+            ledger.write_metrics(config['metrics_file'],
+                                 deployment_id=_ctx.deployment.id,
+                                 node_instance_id=ctx_node.instance.id,
+                                 operation=ledger.name)
+        except (IOError, OSError) as error:
+            _ctx.logger.warning(
+                'Unable to write openstack API metrics to {0}: {1}'.format(
+                    config['metrics_file'], error))
+
+
+def _get_status_class(status):
+    if not isinstance(status, int):
+        return 'error'
+    return '{0}xx'.format(status // 100)
+
+
+def export_operation_metrics(_ctx,
+                             ctx_node,
+                             ledger,
+                             error,
+                             duration,
+                             client_config=None):
+    """
+    This method will merge the metrics of the current operation into the
+    local metrics store shared between agent processes when metrics are
+    enabled, the store is exported periodically for node_exporter
+    :param _ctx: Cloudify context instance cloudify.context.CloudifyContext
+    :param ctx_node: Cloudify node instance which is could be an instance of
+    RelationshipSubjectContext or CloudifyContext
+    :param ledger: Instance of ApiCallLedger
+    :param error: Exception raised by the operation or None
+    :param float duration: Operation duration in seconds
+    :param dict client_config: Openstack client configuration
+    """
+    config = get_metrics_config(client_config or {})
+    if not config['enabled']:
+        return
+    if not file_lock_supported():
+        _ctx.logger.warning('Metrics are not collected without file locks')
+        return
+
+    if error is None:
+        outcome = 'success'
+    elif isinstance(error, OperationRetry):
+        outcome = 'retry'
+    else:
+        outcome = 'error'
+
+    batch = MetricsBatch()
+    labels = {
+        'node_type': ctx_node.node.type,
+        'operation': getattr(ledger, 'name', None) or 'unknown'
+    }
+    batch.inc(OPERATIONS_TOTAL, dict(labels, outcome=outcome))
+    batch.observe(OPERATION_DURATION, labels, duration)
+    if outcome == 'retry':
+        reason = 'circuit_breaker' \
+            if isinstance(error.__context__, CircuitBreakerOpenException) \
+            else 'operation'
+        batch.inc(OPERATION_RETRIES_TOTAL, dict(labels, reason=reason))
+
+    for call in getattr(ledger, 'calls', []):
+        status = _get_status_class(call.status)
+        service = call.service
+        if call.method == 'POST' and call.path.endswith('/auth/tokens'):
+            # Authentication requests are sent to keystone url directly
+            service = 'identity'
+            batch.inc(AUTH_REQUESTS_TOTAL, {'status': status})
+        batch.inc(API_REQUESTS_TOTAL, {
+            'service': service,
+            'method': call.method,
+            'status': status
+        })
+        batch.observe(API_REQUEST_DURATION, {'service': service},
+                      call.latency)
+
+    try:
+        update_metrics_store(batch, config)
+    except (IOError, OSError) as store_error:
+        _ctx.logger.warning(
+            'Unable to update openstack metrics store {0}: {1}'.format(
+                config['store_path'], store_error))
+
+
+def start_operation_profiler(ctx_node, kwargs):
+    """
+    This method will start profiling the current operation when it is
+    enabled by the client configuration of the node or by the environment
+    variable, the client configuration is resolved before the resource is
+    prepared so that preparing the resource is profiled as well
+    :param ctx_node: Cloudify node instance which is could be an instance of
+    RelationshipSubjectContext or CloudifyContext
+    :param kwargs: Inputs of the operation task
+    :return: Instance of OperationProfiler or None if profiling is disabled
+    """
+    client_config = {}
+    for config in (ctx_node.node.properties.get('client_config'),
+                   ctx_node.instance.runtime_properties.get('client_config'),
+                   kwargs.get('client_config')):
+        client_config.update(config or {})
+    config = get_profiling_config(client_config)
+    if not config['enabled']:
+        return None
+
+    profiler = OperationProfiler(top=config['top'],
+                                 trace_memory=config['trace_memory'],
+                                 output_dir=config['output_dir'])
+    profiler.start()
+    return profiler
+
+
+def stop_operation_profiler(_ctx, ctx_node, profiler, operation_name):
+    """
+    This method will stop profiling the current operation and write the
+    profile to the plugin work dir, or the configured output directory, as
+    "<deployment>_<node-instance>_<operation>_<timestamp>.pstats" next to a
+    text summary
+    :param _ctx: Cloudify context instance cloudify.context.CloudifyContext
+    :param ctx_node: Cloudify node instance which is could be an instance of
+    RelationshipSubjectContext or CloudifyContext
+    :param profiler: Instance of OperationProfiler or None
+    :param str operation_name: Name of the current operation
+    """
+    if not profiler:
+        return
+
+    profiler.stop()
+    output_dir = \
+        profiler.output_dir or _ctx.plugin.workdir or tempfile.gettempdir()
+    name = get_profile_name(_ctx.deployment.id,
+                            ctx_node.instance.id,
+                            operation_name,
+                            int(time.time()))
+    try:
+        profile_path, summary_path = profiler.write(name, output_dir)
+    except (IOError, OSError) as error:
+        _ctx.logger.warning(
+            'Unable to write profile of {0} to {1}: {2}'.format(
+                operation_name, output_dir, error))
+        return
+    _ctx.logger.info(
+        'Profile of {0} written to {1}, summary written to {2}'.format(
+            operation_name, profile_path, summary_path))
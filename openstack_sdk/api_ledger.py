@@ -0,0 +1,219 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import re
+import json
+import math
+import time
+import threading
+from urllib.parse import urlparse
+
+# Local imports
+from openstack_sdk.session_hooks import (wrap_session_request,
+                                         get_service_type)
+
+API_LEDGER_CONFIG = 'api_ledger'
+
+DEFAULT_API_LEDGER_CONFIG = {
+    # Summary of openstack API calls is not logged unless it is enabled
+    # explicitly
+    'enabled': False,
+    # Optional path of local JSONL file which the summary is appended to
+    'metrics_file': '',
+}
+
+# Path segments which identify a resource are replaced by this placeholder,
+# so requests for different resources share the same templated path
+PATH_ID_PLACEHOLDER = '{id}'
+PATH_ID_PATTERN = re.compile(
+    r'^([0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+    r'[0-9a-fA-F]{12}|[0-9a-fA-F]{32,}|[0-9]+)$')
+
+_ledgers = threading.local()
+
+
+class ApiCall(object):
+    __slots__ = ('service', 'method', 'path', 'status', 'latency', 'size')
+
+    def __init__(self, service, method, path, status, latency, size):
+        self.service = service
+        self.method = method
+        self.path = path
+        self.status = status
+        self.latency = latency
+        self.size = size
+
+
+class ApiCallLedger(object):
+    """
+    Record of the openstack API calls sent while running one operation
+    """
+    def __init__(self, name=None):
+        self.name = name
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+    @staticmethod
+    def _percentile(latencies, percent):
+        latencies = sorted(latencies)
+        rank = int(math.ceil(len(latencies) * percent / 100.0)) - 1
+        return latencies[max(rank, 0)]
+
+    def summary(self):
+        """
+        Summarize the recorded calls for each openstack service
+        :return dict: Map between service type and its calls count, total
+        latency, p95 latency and received bytes
+        """
+        with self._lock:
+            calls = list(self.calls)
+        services = {}
+        for call in calls:
+            services.setdefault(call.service, []).append(call)
+
+        summary = {}
+        for service, service_calls in services.items():
+            latencies = [call.latency for call in service_calls]
+            summary[service] = {
+                'calls': len(service_calls),
+                'errors': len([call for call in service_calls
+                               if not isinstance(call.status, int)
+                               or call.status >= 400]),
+                'total_latency': round(sum(latencies), 3),
+                'p95_latency': round(self._percentile(latencies, 95), 3),
+                'bytes': sum(call.size for call in service_calls),
+            }
+        return summary
+
+    def format_summary(self):
+        """
+        :return str: Compact summary which is suitable for logs
+        """
+        summary = self.summary()
+        return '; '.join(
+            '{0}: {1} calls, total {2:.3f}s, p95 {3:.3f}s'.format(
+                service,
+                summary[service]['calls'],
+                summary[service]['total_latency'],
+                summary[service]['p95_latency'])
+            for service in sorted(summary))
+
+    def write_metrics(self, metrics_file, **extra):
+        """
+        Append the summary as a JSON line to local metrics file
+        :param str metrics_file: Path of the metrics file
+        :param extra: Extra fields which identify the operation
+        """
+        metrics = dict(extra)
+        metrics.update(timestamp=time.time(), services=self.summary())
+        with open(metrics_file, 'a') as metrics_output:
+            metrics_output.write(json.dumps(metrics, sort_keys=True) + '\n')
+
+
+def get_api_ledger_config(client_config):
+    """
+    This method will return API ledger configuration merged with the default
+    configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: API ledger configuration
+    """
+    config = dict(DEFAULT_API_LEDGER_CONFIG)
+    config.update(client_config.get(API_LEDGER_CONFIG) or {})
+    return config
+
+
+def start_api_call_ledger(name=None):
+    """
+    Start recording openstack API calls sent by the current thread
+    :param str name: Name of the ledger, i.e. the operation name
+    :return: Instance of ApiCallLedger
+    """
+    _ledgers.current = ApiCallLedger(name)
+    return _ledgers.current
+
+
+def stop_api_call_ledger():
+    """
+    Stop recording openstack API calls sent by the current thread
+    :return: The stopped instance of ApiCallLedger or None
+    """
+    ledger = getattr(_ledgers, 'current', None)
+    _ledgers.current = None
+    return ledger
+
+
+def get_templated_path(url):
+    """
+    Remove query and replace resource ids in the request path
+    :param str url: Request url
+    :return str: Templated path, i.e. /servers/{id}/action
+    """
+    path = urlparse(url).path
+    return '/'.join(PATH_ID_PLACEHOLDER if PATH_ID_PATTERN.match(segment)
+                    else segment for segment in path.split('/'))
+
+
+def _get_response_size(response, stream=False):
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    # The body of streamed responses is not read yet
+    if stream:
+        return 0
+    try:
+        return len(response.content or b'')
+    except TypeError:
+        return 0
+
+
+def install_api_ledger(connection):
+    """
+    This method will install a hook on keystoneauth session used by the
+    openstack connection which records every request sent while a ledger is
+    started for the current thread
+    :param connection: Instance of openstack.connection.Connection
+    """
+    def handler(request, url, method, **kwargs):
+        ledger = getattr(_ledgers, 'current', None)
+        if ledger is None:
+            return request(url, method, **kwargs)
+
+        status = None
+        size = 0
+        start = time.time()
+        try:
+            response = request(url, method, **kwargs)
+            status = response.status_code
+            size = _get_response_size(response, kwargs.get('stream'))
+            return response
+        except Exception as error:
+            # keystoneauth raises http errors by default
+            status = getattr(error, 'http_status', None)
+            raise
+        finally:
+            ledger.record(ApiCall(get_service_type(url, kwargs),
+                                  method.upper(),
+                                  get_templated_path(url),
+                                  status,
+                                  time.time() - start,
+                                  size))
+
+    wrap_session_request(connection.session, handler)
@@ -0,0 +1,365 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Cassettes capture the openstack API traffic of real operations, so the
+# same traffic can be replayed offline in order to profile operations and
+# compare optimizations against identical responses.
+#
+# A cassette is a gzip file of JSON lines, each line is one interaction
+# (request & response) sent through the keystoneauth session. Tokens,
+# passwords and other secrets are replaced before they are written. Every
+# flush appends a new gzip member, which is read back as one stream.
+
+# Standard imports
+import re
+import gzip
+import json
+import time
+import atexit
+import base64
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+# Third party imports
+import requests
+from keystoneauth1 import exceptions as ks_exceptions
+
+# Local imports
+from openstack_sdk.session_hooks import (wrap_session_request,
+                                         get_service_type)
+
+CASSETTE_CONFIG = 'cassette'
+RECORD_MODE = 'record'
+REPLAY_MODE = 'replay'
+
+DEFAULT_CASSETTE_CONFIG = {
+    # Either "record" or "replay", the cassette is not used otherwise
+    'mode': '',
+    # Path of the cassette file
+    'path': '',
+    # Replayed responses are delayed by the recorded latency multiplied by
+    # this factor, 0 replays the responses without any delay
+    'timing_scale': 1.0,
+}
+
+SANITIZED_VALUE = '***'
+SENSITIVE_HEADERS = ('x-auth-token', 'x-subject-token', 'x-service-token',
+                     'set-cookie', 'authorization')
+SENSITIVE_FIELDS = ('password', 'adminpass', 'admin_pass', 'secret',
+                    'private_key', 'user_data', 'original_password')
+SENSITIVE_QUERY_PATTERN = re.compile(r'(password|secret|token)', re.I)
+AUTH_TOKENS_PATH = '/auth/tokens'
+
+_recorders = {}
+_players = {}
+_lock = threading.Lock()
+
+
+class CassetteMissError(Exception):
+    """
+    Raised when a request does not have a recorded interaction
+    """
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        super(CassetteMissError, self).__init__(
+            'No recorded interaction for {0} {1}'.format(method, path))
+
+
+def get_cassette_config(client_config):
+    """
+    This method will return cassette configuration merged with the default
+    configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: Cassette configuration
+    """
+    config = dict(DEFAULT_CASSETTE_CONFIG)
+    config.update(client_config.get(CASSETTE_CONFIG) or {})
+    return config
+
+
+def sanitize(value):
+    """
+    Replace the secrets in the body of a request or a response
+    :param value: Decoded JSON value
+    :return: Copy of the value without secrets
+    """
+    if isinstance(value, dict):
+        return {key: SANITIZED_VALUE
+                if key.lower() in SENSITIVE_FIELDS
+                and value[key] and not isinstance(value[key], (dict, list))
+                else sanitize(value[key]) for key in value}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    return value
+
+
+def _sanitize_headers(headers):
+    return {name: SANITIZED_VALUE if name.lower() in SENSITIVE_HEADERS
+            else value for name, value in headers.items()}
+
+
+def get_interaction_key(service, method, url, params=None):
+    """
+    Requests are matched by service, method, path and query, the host is
+    ignored since the catalog could point to different endpoints
+    :param str service: Service type or the host of the url
+    :param str method: Request method
+    :param str url: Request url
+    :param dict params: Query parameters passed separately from the url
+    :return str: Key of the interaction
+    """
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    query.extend((key, str(value)) for key, value in (params or {}).items())
+    query = [(key, SANITIZED_VALUE if SENSITIVE_QUERY_PATTERN.search(key)
+              else value) for key, value in query]
+    # Absolute urls are matched by path only, since the host could change
+    if parsed.netloc:
+        service = 'url'
+    key = '{0} {1} {2}'.format(service, method.upper(), parsed.path)
+    if query:
+        key += '?' + urlencode(sorted(query))
+    return key
+
+
+def _encode_body(content):
+    if not content:
+        return {}
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        return {'body_base64': base64.b64encode(content).decode('ascii')}
+    try:
+        return {'json': sanitize(json.loads(text))}
+    except ValueError:
+        return {'body': text}
+
+
+def _decode_body(interaction):
+    if 'json' in interaction:
+        return json.dumps(interaction['json']).encode('utf-8')
+    if 'body_base64' in interaction:
+        return base64.b64decode(interaction['body_base64'])
+    return interaction.get('body', '').encode('utf-8')
+
+
+def _encode_request_body(kwargs):
+    if kwargs.get('json') is not None:
+        return sanitize(kwargs['json'])
+    # Raw request bodies (i.e. image data) are not stored
+    return None
+
+
+def load_cassette(path):
+    """
+    :param str path: Path of the cassette file
+    :return list: Recorded interactions
+    """
+    with gzip.open(path, 'rt') as cassette_file:
+        return [json.loads(line) for line in cassette_file if line.strip()]
+
+
+class CassetteRecorder(object):
+    """
+    Record the interactions sent through keystoneauth sessions and append
+    them to the cassette file once it is flushed
+    """
+    def __init__(self, path):
+        self.path = path
+        self.interactions = []
+        self._lock = threading.Lock()
+
+    def record(self, service, method, url, kwargs, response, latency):
+        interaction = {
+            'key': get_interaction_key(
+                service, method, url, kwargs.get('params')),
+            'started_at': round(time.time() - latency, 6),
+            'latency': round(latency, 6),
+        }
+        request_body = _encode_request_body(kwargs)
+        if request_body is not None:
+            interaction['request'] = request_body
+        if isinstance(response, Exception):
+            interaction['error'] = {
+                'type': type(response).__name__,
+                'message': str(response)
+            }
+        else:
+            interaction.update(
+                status=response.status_code,
+                url=response.url,
+                headers=_sanitize_headers(dict(response.headers)),
+                **_encode_body(response.content))
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def flush(self):
+        with self._lock:
+            interactions, self.interactions = self.interactions, []
+        if not interactions:
+            return
+        with gzip.open(self.path, 'at') as cassette_file:
+            for interaction in interactions:
+                cassette_file.write(
+                    json.dumps(interaction, sort_keys=True) + '\n')
+
+
+class CassettePlayer(object):
+    """
+    Serve the recorded responses of a cassette, interactions with the same
+    key are replayed in the recorded order and the last one is repeated
+    once they are all used (i.e. polling the status of a resource)
+    """
+    def __init__(self, path):
+        self.path = path
+        self._interactions = {}
+        self._lock = threading.Lock()
+        for interaction in load_cassette(path):
+            self._interactions.setdefault(
+                interaction['key'], deque()).append(interaction)
+
+    def _next_interaction(self, key):
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                return None
+            if len(interactions) > 1:
+                return interactions.popleft()
+            return interactions[0]
+
+    @staticmethod
+    def _refresh_token(content):
+        # Recorded tokens are expired by the time they are replayed, which
+        # would make keystoneauth authenticate again for every request
+        body = json.loads(content.decode('utf-8'))
+        token = body.get('token') or {}
+        if token.get('expires_at'):
+            token['expires_at'] = (datetime.utcnow() + timedelta(
+                hours=1)).strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+        return json.dumps(body).encode('utf-8')
+
+    def play(self, service, method, url, kwargs, timing_scale=1.0):
+        """
+        :return: Instance of requests.Response with the recorded response
+        """
+        key = get_interaction_key(service, method, url, kwargs.get('params'))
+        interaction = self._next_interaction(key)
+        if not interaction:
+            raise CassetteMissError(method.upper(), key)
+
+        if timing_scale:
+            time.sleep(interaction['latency'] * timing_scale)
+
+        if 'error' in interaction:
+            error_class = getattr(ks_exceptions,
+                                  interaction['error']['type'],
+                                  ks_exceptions.ClientException)
+            raise error_class(interaction['error']['message'])
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.url = interaction.get('url') or url
+        response.headers = requests.structures.CaseInsensitiveDict(
+            interaction.get('headers') or {})
+        response.encoding = 'utf-8'
+        content = _decode_body(interaction)
+        if urlparse(url).path.endswith(AUTH_TOKENS_PATH) and \
+                'json' in interaction:
+            content = self._refresh_token(content)
+        response._content = content
+        response._content_consumed = True
+
+        if response.status_code >= 400 and kwargs.get('raise_exc', True):
+            raise ks_exceptions.from_response(response, method, url)
+        return response
+
+
+def get_cassette_recorder(path):
+    with _lock:
+        if path not in _recorders:
+            _recorders[path] = CassetteRecorder(path)
+        return _recorders[path]
+
+
+def get_cassette_player(path):
+    with _lock:
+        if path not in _players:
+            _players[path] = CassettePlayer(path)
+        return _players[path]
+
+
+def flush_cassettes():
+    """
+    Append the recorded interactions to their cassette files
+    """
+    with _lock:
+        recorders = list(_recorders.values())
+    for recorder in recorders:
+        recorder.flush()
+
+
+atexit.register(flush_cassettes)
+
+
+def install_cassette(connection, client_config):
+    """
+    This method will install a hook on keystoneauth session used by the
+    openstack connection which either records every request sent to
+    openstack or replays the recorded responses, based on the cassette
+    configuration
+    :param connection: Instance of openstack.connection.Connection
+    :param dict client_config: Openstack client configuration
+    """
+    config = get_cassette_config(client_config)
+    if config['mode'] not in (RECORD_MODE, REPLAY_MODE) or \
+            not config['path']:
+        return
+
+    if config['mode'] == REPLAY_MODE:
+        player = get_cassette_player(config['path'])
+
+        def replay_handler(request, url, method, **kwargs):
+            return player.play(get_service_type(url, kwargs),
+                               method,
+                               url,
+                               kwargs,
+                               config['timing_scale'])
+
+        wrap_session_request(connection.session, replay_handler)
+        return
+
+    recorder = get_cassette_recorder(config['path'])
+
+    def record_handler(request, url, method, **kwargs):
+        start = time.time()
+        try:
+            response = request(url, method, **kwargs)
+        except ks_exceptions.HttpError as error:
+            if error.response is not None:
+                recorder.record(get_service_type(url, kwargs), method, url,
+                                kwargs, error.response, time.time() - start)
+            raise
+        except Exception as error:
+            recorder.record(get_service_type(url, kwargs), method, url,
+                            kwargs, error, time.time() - start)
+            raise
+        recorder.record(get_service_type(url, kwargs), method, url, kwargs,
+                        response, time.time() - start)
+        return response
+
+    wrap_session_request(connection.session, record_handler)
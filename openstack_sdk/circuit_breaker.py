@@ -0,0 +1,239 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import math
+import time
+import threading
+from collections import deque
+
+# Third party imports
+from keystoneauth1 import exceptions as ks_exceptions
+
+# Local imports
+from openstack_sdk.session_hooks import (wrap_session_request,
+                                         get_service_type)
+
+CIRCUIT_BREAKER_CONFIG = 'circuit_breaker'
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+DEFAULT_CIRCUIT_BREAKER_CONFIG = {
+    # The circuit breaker is disabled unless it is enabled explicitly
+    'enabled': False,
+    # Number of failures inside the window which will open the circuit
+    'failure_threshold': 5,
+    # Sliding window in seconds used to count failures
+    'window': 60,
+    # Calls taking longer than this (in seconds) are counted as failures
+    'slow_call_duration': 30,
+    # Seconds to wait before allowing half-open probe requests
+    'reset_timeout': 30,
+    # Number of successful probes required to close the circuit again
+    'half_open_max_calls': 1,
+}
+
+# Exceptions that indicate the remote service is degraded
+FAILURE_EXCEPTIONS = (ks_exceptions.ConnectionError,
+                      ks_exceptions.HttpServerError)
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+class CircuitBreakerOpenException(Exception):
+    def __init__(self, service_type, retry_after):
+        self.service_type = service_type
+        self.retry_after = retry_after
+        super(CircuitBreakerOpenException, self).__init__(
+            'Openstack service {0} is degraded and circuit breaker is open, '
+            'retry after {1} seconds'.format(service_type, retry_after))
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker that tracks failures and slow calls for one openstack
+    service endpoint. The circuit is opened when the number of failures in
+    the sliding window reaches the threshold, so that the following calls
+    fail fast instead of waiting for the HTTP timeout. Once "reset_timeout"
+    is passed, a limited number of probe requests are allowed (half-open)
+    and the circuit is closed again when they succeed.
+    """
+    def __init__(self,
+                 name,
+                 failure_threshold,
+                 window,
+                 slow_call_duration,
+                 reset_timeout,
+                 half_open_max_calls,
+                 clock=time.time):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self._lock = threading.Lock()
+        self._failures = deque()
+        self._opened_at = None
+        self._probes = 0
+        self._probe_successes = 0
+
+    @staticmethod
+    def _retry_after(seconds):
+        return max(int(math.ceil(seconds)), 1)
+
+    def _open(self, now):
+        self.state = STATE_OPEN
+        self._opened_at = now
+        self._failures.clear()
+
+    def _close(self):
+        self.state = STATE_CLOSED
+        self._opened_at = None
+        self._failures.clear()
+
+    def before_call(self):
+        """
+        This method must be called before sending the request, it will raise
+        CircuitBreakerOpenException when the request is not allowed
+        :return bool: Flag to indicate if the current call is a probe call
+        """
+        with self._lock:
+            now = self.clock()
+            if self.state == STATE_OPEN:
+                remaining = self._opened_at + self.reset_timeout - now
+                if remaining > 0:
+                    raise CircuitBreakerOpenException(
+                        self.name, self._retry_after(remaining))
+                self.state = STATE_HALF_OPEN
+                self._probes = 0
+                self._probe_successes = 0
+
+            if self.state == STATE_HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitBreakerOpenException(
+                        self.name, self._retry_after(self.reset_timeout))
+                self._probes += 1
+                return True
+            return False
+
+    def record_result(self, probe, failed, duration=0):
+        """
+        This method must be called once the request is done
+        :param bool probe: Flag returned from "before_call"
+        :param bool failed: Flag to indicate if the request failed
+        :param float duration: Request duration in seconds
+        """
+        failed = failed or duration >= self.slow_call_duration
+        with self._lock:
+            now = self.clock()
+            if probe and self.state == STATE_HALF_OPEN:
+                self._probes -= 1
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_max_calls:
+                        self._close()
+                return
+
+            if not failed or self.state != STATE_CLOSED:
+                return
+
+            self._failures.append(now)
+            while self._failures and self._failures[0] <= now - self.window:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+
+def get_circuit_breaker_config(client_config):
+    """
+    This method will return circuit breaker configuration merged with the
+    default configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: Circuit breaker configuration
+    """
+    config = dict(DEFAULT_CIRCUIT_BREAKER_CONFIG)
+    config.update(client_config.get(CIRCUIT_BREAKER_CONFIG) or {})
+    return config
+
+
+def get_circuit_breaker(endpoint, service_type, config):
+    """
+    This method will return the circuit breaker for service endpoint. The
+    circuit breakers are shared between all resources in the current process
+    so the state is kept between different operations
+    :param str endpoint: Unique name for the openstack cloud endpoint
+    :param str service_type: Openstack service type
+    :param dict config: Circuit breaker configuration
+    :return: Instance of CircuitBreaker
+    """
+    key = (endpoint, service_type)
+    with _circuit_breakers_lock:
+        if key not in _circuit_breakers:
+            _circuit_breakers[key] = CircuitBreaker(
+                service_type,
+                failure_threshold=config['failure_threshold'],
+                window=config['window'],
+                slow_call_duration=config['slow_call_duration'],
+                reset_timeout=config['reset_timeout'],
+                half_open_max_calls=config['half_open_max_calls'])
+        return _circuit_breakers[key]
+
+
+def reset_circuit_breakers():
+    with _circuit_breakers_lock:
+        _circuit_breakers.clear()
+
+
+def install_circuit_breaker(connection, client_config):
+    """
+    This method will install circuit breaker on keystoneauth session used by
+    the openstack connection when it is enabled on client configuration
+    :param connection: Instance of openstack.connection.Connection
+    :param dict client_config: Openstack client configuration
+    """
+    config = get_circuit_breaker_config(client_config)
+    if not config['enabled']:
+        return
+
+    endpoint = '{0}:{1}'.format(client_config.get('auth_url'),
+                                client_config.get('region_name'))
+
+    def handler(request, url, method, **kwargs):
+        breaker = get_circuit_breaker(
+            endpoint, get_service_type(url, kwargs), config)
+        probe = breaker.before_call()
+        start = time.time()
+        try:
+            response = request(url, method, **kwargs)
+        except FAILURE_EXCEPTIONS:
+            breaker.record_result(probe, True, time.time() - start)
+            raise
+        except Exception:
+            breaker.record_result(probe, False, time.time() - start)
+            raise
+        breaker.record_result(probe,
+                              response.status_code >= 500,
+                              time.time() - start)
+        return response
+
+    wrap_session_request(connection.session, handler)
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 # Standard imports
+import time
 import uuid
 
 # Third party imports
@@ -23,6 +24,29 @@ import openstack.exceptions
 # Py2/3 compatibility
 from openstack_sdk._compat import text_type
 
+# Local imports
+from openstack_sdk.api_ledger import (API_LEDGER_CONFIG,
+                                      install_api_ledger)
+from openstack_sdk.cassette import (CASSETTE_CONFIG,
+                                    install_cassette)
+from openstack_sdk.file_state import FileState
+from openstack_sdk.circuit_breaker import (CIRCUIT_BREAKER_CONFIG,
+                                           install_circuit_breaker)
+from openstack_sdk.log_utils import get_resource_logger
+from openstack_sdk.metrics import METRICS_CONFIG
+from openstack_sdk.single_flight import (SINGLE_FLIGHT_CONFIG,
+                                         install_single_flight)
+from openstack_sdk.status_poller import STATUS_POLLER_CONFIG
+
+# Client config keys that are only used by the plugin and must not be passed
+# to the openstack connection
+PLUGIN_CLIENT_CONFIG_KEYS = (CIRCUIT_BREAKER_CONFIG,
+                             SINGLE_FLIGHT_CONFIG,
+                             API_LEDGER_CONFIG,
+                             METRICS_CONFIG,
+                             CASSETTE_CONFIG,
+                             STATUS_POLLER_CONFIG)
+
 
 class QuotaException(Exception):
     pass
@@ -43,8 +67,20 @@ class OpenstackResource(object):
     def __init__(self, client_config, resource_config=None, logger=None):
         self.client_config = client_config
         self.configure_ssl()
-        self.logger = logger
-        self.connection = openstack.connect(**client_config)
+        self.logger = get_resource_logger(logger)
+        connection_config = self.connection_config
+        self.connection = openstack.connect(**connection_config)
+        # Session hooks are chained, so the single flight is installed last
+        # in order to share one request (one circuit breaker call) between
+        # concurrent callers, while the API ledger is installed right after
+        # the cassette so it only records requests which are actually sent
+        # (or replayed)
+        install_cassette(self.connection, client_config)
+        install_api_ledger(self.connection)
+        install_circuit_breaker(self.connection, client_config)
+        install_single_flight(self.connection,
+                              client_config,
+                              connection_config)
         self.config = resource_config or {}
         self.name = self.config.get('name')
         self.resource_id =\
@@ -108,6 +144,11 @@ class OpenstackResource(object):
     def project_id(self):
         return self.config.get('project_id') or self.get_project_id_by_name()
 
+    @property
+    def connection_config(self):
+        return {key: value for key, value in self.client_config.items()
+                if key not in PLUGIN_CLIENT_CONFIG_KEYS}
+
     @property
     def auth_url(self):
         return self.client_config.get('auth_url')
@@ -259,3 +300,111 @@ class ResourceMixin(object):
             pass
 
         return self.get_one_match(name_or_id, self.list())
+
+
+class BatchMixin(object):
+    """
+    This mixin used by resources which are created in batches for several
+    members (node instances) at once. Each member submits itself to the
+    batch, and once the batch is full or its window is elapsed the pending
+    members are created together by the member which submits next.
+
+    The batch state is kept in a file shared by the operations running on the
+    same agent (see FileState), created resources are kept there until the
+    member which submitted them collects them.
+    """
+    # Id of the batch, members which submit to the same batch id are created
+    # together
+    batch_id = None
+
+    def _batch_state(self):
+        return FileState(
+            '{0}_{1}'.format(self.resource_type, self.batch_id),
+            default={'pending': {}, 'opened_at': None, 'results': {},
+                     'inflight': None})
+
+    def _flush_batch(self, state, batch, prepare=None):
+        inflight = batch.get('inflight')
+        if not inflight:
+            member_ids = sorted(batch['pending'])
+            self.logger.info('Creating %s members of batch %s',
+                             len(member_ids), self.batch_id)
+            inflight = {
+                'members': member_ids,
+                'configs': [batch['pending'][member_id]
+                            for member_id in member_ids],
+                'shared': None,
+                'state': {},
+            }
+            batch['inflight'] = inflight
+            batch['pending'] = {}
+            batch['opened_at'] = None
+        # The creation is not started yet, otherwise it is resumed using the
+        # state saved by the previous attempt
+        if not inflight['state'] and prepare:
+            inflight['shared'] = prepare()
+
+        created = self.create_batch(inflight['configs'],
+                                    inflight['state'],
+                                    lambda: state.save(batch))
+        if created is None:
+            self.logger.info('Batch %s is not created yet', self.batch_id)
+            return
+        for member_id, resource in zip(inflight['members'], created):
+            if isinstance(resource, Exception):
+                batch['results'][member_id] = {'error': text_type(resource)}
+            else:
+                batch['results'][member_id] = {'resource': resource,
+                                               'shared': inflight['shared']}
+        batch['inflight'] = None
+
+    def create_batch(self, member_configs, state, checkpoint):
+        """
+        Create the resources of the pending members of the batch
+        :param list member_configs: Configs submitted by the members
+        :param dict state: State of the creation which is kept until the
+        batch is created, it is empty on the first attempt
+        :param checkpoint: Callable which saves the state, so that it is
+        not lost if the next requests fail
+        :return list: List aligned with the member configs, each item is
+        either a dict with the fields of the created resource or the error
+        raised while trying to create it, None if the resources are not
+        created yet and the creation must be resumed later
+        """
+        raise NotImplementedError()
+
+    def submit(self, member_id, window, size, member_config=None,
+               prepare=None):
+        """
+        Submit a member to the batch, submitting again with the same member
+        id returns the resource created for it once the batch is flushed
+        :param str member_id: Unique id of the batch member
+        :param int window: Number of seconds the batch waits for other
+        members once the first one is submitted
+        :param int size: Maximum number of members of the batch, the batch is
+        flushed once it has this number of pending members
+        :param dict member_config: Config of the member resource
+        :param prepare: Callable invoked once before the batch is flushed,
+        its result is returned to all the members of the batch as "shared"
+        :return dict: Dict with "resource" and "shared" keys once the
+        resource of the member is created, or with "error" key if it could
+        not be created, None if the batch is not flushed yet
+        """
+        state = self._batch_state()
+        with state.lock():
+            batch = state.load()
+            inflight = batch.get('inflight')
+            if inflight:
+                # Members of the batch being created wait for it to be
+                # resolved instead of creating their resources again
+                self._flush_batch(state, batch, prepare)
+            elif member_id not in batch['results']:
+                if member_id not in batch['pending']:
+                    batch['pending'][member_id] = member_config
+                    batch['opened_at'] = batch['opened_at'] or time.time()
+                if len(batch['pending']) >= size or \
+                        time.time() - batch['opened_at'] >= window:
+                    self._flush_batch(state, batch, prepare)
+            result = batch['results'].pop(member_id, None)
+            state.save(batch)
+        return result
@@ -0,0 +1,85 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import copy
+import json
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLockUnavailableException(Exception):
+    def __init__(self, path):
+        self.path = path
+        super(FileLockUnavailableException, self).__init__(
+            'File locks are not supported on this platform, state {0} '
+            'shared by the operations of the agent cannot be used'.format(
+                path))
+
+
+def file_lock_supported():
+    """
+    This method will check if file locks are supported, features which share
+    state between the operations of the agent are not available without them
+    :return bool: True if file locks are supported
+    """
+    return fcntl is not None
+
+
+class FileState(object):
+    """
+    JSON state kept in a file of the temp directory and shared by the
+    operations running on the same agent. Operations run in separate
+    processes, so the state must only be loaded and saved while holding the
+    exclusive file lock of the state.
+    """
+    def __init__(self, name, default=None, path=None):
+        """
+        :param str name: Name of the state, unique for each shared state
+        :param dict default: State returned when the state is not saved yet
+        :param str path: Path of the state file, the state is saved in the
+        temp directory using its name by default
+        """
+        self.path = path or os.path.join(
+            tempfile.gettempdir(), 'cloudify_openstack_{0}.json'.format(name))
+        self.default = default or {}
+
+    @contextmanager
+    def lock(self):
+        if not file_lock_supported():
+            raise FileLockUnavailableException(self.path)
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        try:
+            with open(self.path) as state_file:
+                return json.load(state_file)
+        except (IOError, ValueError):
+            return copy.deepcopy(self.default)
+
+    def save(self, state):
+        with open(self.path, 'w') as state_file:
+            json.dump(state, state_file)
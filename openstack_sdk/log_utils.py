@@ -0,0 +1,75 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Resources log with "%" style arguments, i.e.
+# self.logger.debug('Found server with this result: %s', server)
+# so that resources and their nested payloads are only converted to string
+# when the record is actually emitted.
+
+# Standard imports
+import logging
+
+# Maximum number of characters logged for each log argument
+LOG_ARG_MAX_LENGTH = 2048
+
+
+class TruncatedRepr(object):
+    """
+    Wrap a log argument so that it is converted to string only when the log
+    record is emitted, the result is truncated when it is too long
+    """
+    __slots__ = ('value', 'max_length')
+
+    def __init__(self, value, max_length=LOG_ARG_MAX_LENGTH):
+        self.value = value
+        self.max_length = max_length
+
+    def _truncate(self, text):
+        if len(text) <= self.max_length:
+            return text
+        return '{0}... ({1} characters truncated)'.format(
+            text[:self.max_length], len(text) - self.max_length)
+
+    def __str__(self):
+        return self._truncate(str(self.value))
+
+    def __repr__(self):
+        return self._truncate(repr(self.value))
+
+
+class ResourceLogger(logging.LoggerAdapter):
+    """
+    Logger used by openstack resources. Log arguments are not touched when
+    the level is disabled, otherwise they are wrapped with "TruncatedRepr"
+    """
+    def __init__(self, logger, max_length=LOG_ARG_MAX_LENGTH):
+        super(ResourceLogger, self).__init__(logger, {})
+        self.max_length = max_length
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            args = tuple(TruncatedRepr(arg, self.max_length) for arg in args)
+            self.logger.log(level, msg, *args, **kwargs)
+
+
+def get_resource_logger(logger):
+    """
+    This method will return the logger used by openstack resources
+    :param logger: Logger provided to the resource
+    :return: Instance of ResourceLogger or None if no logger is provided
+    """
+    if logger is None or isinstance(logger, ResourceLogger):
+        return logger
+    return ResourceLogger(logger)
@@ -0,0 +1,238 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Metrics are aggregated in a local JSON store shared between all the
+# processes running on the same agent. Every operation merges its own
+# metrics into the store while holding a file lock, and the store is
+# rendered using Prometheus text format, so it can be collected by the
+# textfile collector of node_exporter.
+
+# Standard imports
+import os
+import json
+import time
+import tempfile
+
+# Local imports
+from openstack_sdk.file_state import FileState
+
+METRICS_CONFIG = 'metrics'
+
+DEFAULT_METRICS_CONFIG = {
+    # Metrics are not collected unless it is enabled explicitly
+    'enabled': False,
+    # Local file used to aggregate metrics between agent processes
+    'store_path': os.path.join(tempfile.gettempdir(),
+                               'cloudify_openstack_metrics.json'),
+    # Path of the file watched by node_exporter textfile collector, it
+    # must end with ".prom"
+    'textfile_path': '',
+    # Minimum number of seconds between two exports of the textfile
+    'export_interval': 60,
+}
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+OPERATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+REQUEST_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+OPERATIONS_TOTAL = 'cloudify_openstack_operations_total'
+OPERATION_DURATION = 'cloudify_openstack_operation_duration_seconds'
+OPERATION_RETRIES_TOTAL = 'cloudify_openstack_operation_retries_total'
+API_REQUESTS_TOTAL = 'cloudify_openstack_api_requests_total'
+API_REQUEST_DURATION = 'cloudify_openstack_api_request_duration_seconds'
+AUTH_REQUESTS_TOTAL = 'cloudify_openstack_auth_requests_total'
+
+METRICS = {
+    OPERATIONS_TOTAL: (
+        COUNTER, 'Number of operations by node type and outcome.', None),
+    OPERATION_DURATION: (
+        HISTOGRAM, 'Duration of operations in seconds.', OPERATION_BUCKETS),
+    OPERATION_RETRIES_TOTAL: (
+        COUNTER, 'Number of operations retried by reason.', None),
+    API_REQUESTS_TOTAL: (
+        COUNTER, 'Number of openstack API requests by service.', None),
+    API_REQUEST_DURATION: (
+        HISTOGRAM,
+        'Duration of openstack API requests in seconds.',
+        REQUEST_BUCKETS),
+    AUTH_REQUESTS_TOTAL: (
+        COUNTER, 'Number of keystone authentication requests.', None),
+}
+
+
+def _labels_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+class MetricsBatch(object):
+    """
+    Metrics collected by one operation before they are merged into the
+    shared store
+    """
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        series = self.counters.setdefault(name, {})
+        key = _labels_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        series = self.histograms.setdefault(name, {})
+        histogram = series.setdefault(_labels_key(labels), {
+            'buckets': [0] * len(buckets),
+            'sum': 0,
+            'count': 0,
+        })
+        for index, bucket in enumerate(buckets):
+            if value <= bucket:
+                histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+    def merge_into(self, data):
+        """
+        Add the collected metrics to the metrics loaded from the store
+        :param dict data: Metrics loaded from the store
+        """
+        counters = data.setdefault('counters', {})
+        for name, series in self.counters.items():
+            stored = counters.setdefault(name, {})
+            for key, value in series.items():
+                stored[key] = stored.get(key, 0) + value
+
+        histograms = data.setdefault('histograms', {})
+        for name, series in self.histograms.items():
+            stored = histograms.setdefault(name, {})
+            for key, histogram in series.items():
+                if key not in stored:
+                    stored[key] = histogram
+                    continue
+                stored_histogram = stored[key]
+                stored_histogram['buckets'] = [
+                    current + new for current, new in
+                    zip(stored_histogram['buckets'], histogram['buckets'])]
+                stored_histogram['sum'] += histogram['sum']
+                stored_histogram['count'] += histogram['count']
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{{{0}}}'.format(','.join(
+        '{0}="{1}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+                '\n', '\\n'))
+        for name, value in labels))
+
+
+def render_textfile(data):
+    """
+    Render the metrics using Prometheus text exposition format
+    :param dict data: Metrics loaded from the store
+    :return str: Metrics in text format
+    """
+    lines = []
+    for name in sorted(METRICS):
+        metric_type, description, buckets = METRICS[name]
+        if metric_type == COUNTER:
+            series = data.get('counters', {}).get(name)
+        else:
+            series = data.get('histograms', {}).get(name)
+        if not series:
+            continue
+
+        lines.append('# HELP {0} {1}'.format(name, description))
+        lines.append('# TYPE {0} {1}'.format(name, metric_type))
+        for key in sorted(series):
+            labels = [tuple(label) for label in json.loads(key)]
+            if metric_type == COUNTER:
+                lines.append('{0}{1} {2}'.format(
+                    name, _format_labels(labels), series[key]))
+                continue
+
+            histogram = series[key]
+            for bucket, count in zip(buckets, histogram['buckets']):
+                lines.append('{0}_bucket{1} {2}'.format(
+                    name, _format_labels(labels + [('le', bucket)]), count))
+            lines.append('{0}_bucket{1} {2}'.format(
+                name,
+                _format_labels(labels + [('le', '+Inf')]),
+                histogram['count']))
+            lines.append('{0}_sum{1} {2}'.format(
+                name, _format_labels(labels), histogram['sum']))
+            lines.append('{0}_count{1} {2}'.format(
+                name, _format_labels(labels), histogram['count']))
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    try:
+        with os.fdopen(fd, 'w') as temp_file:
+            temp_file.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def get_metrics_config(client_config):
+    """
+    This method will return metrics configuration merged with the default
+    configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: Metrics configuration
+    """
+    config = dict(DEFAULT_METRICS_CONFIG)
+    config.update(client_config.get(METRICS_CONFIG) or {})
+    if not config['store_path']:
+        config['store_path'] = DEFAULT_METRICS_CONFIG['store_path']
+    return config
+
+
+def update_metrics_store(batch, config, clock=time.time):
+    """
+    Merge the metrics collected by the current operation into the shared
+    store, and export the textfile once "export_interval" is passed since
+    the last export
+    :param batch: Instance of MetricsBatch
+    :param dict config: Metrics configuration
+    :param clock: Callable which returns the current time
+    :return bool: Flag to indicate if the textfile is exported
+    """
+    store = FileState('metrics', path=config['store_path'])
+    with store.lock():
+        # Start from scratch when the store is missing or corrupted
+        data = store.load()
+        batch.merge_into(data)
+
+        exported = False
+        now = clock()
+        textfile_path = config['textfile_path']
+        if textfile_path and \
+                now - data.get('exported_at', 0) >= config['export_interval']:
+            _write_atomic(textfile_path, render_textfile(data))
+            data['exported_at'] = now
+            exported = True
+        _write_atomic(store.path, json.dumps(data))
+    return exported
@@ -0,0 +1,154 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Profiling is used to find out where the time and the memory of a slow
+# operation go. The operation is run under cProfile and tracemalloc, then
+# the raw profile is written as a ".pstats" file, which can be loaded with
+# pstats or snakeviz, next to a text summary of the top functions and of
+# the top allocations.
+
+# Standard imports
+import io
+import os
+import re
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+PROFILING_CONFIG = 'profiling'
+PROFILING_ENV = 'CLOUDIFY_OPENSTACK_PROFILING'
+PROFILING_ENV_VALUES = ('1', 'true', 'yes', 'on')
+
+DEFAULT_PROFILING_CONFIG = {
+    # Operations are not profiled unless it is enabled explicitly or
+    # "CLOUDIFY_OPENSTACK_PROFILING" environment variable is set
+    'enabled': False,
+    # Directory where profiles are written, defaults to the plugin work dir
+    'output_dir': '',
+    # Number of functions and allocations listed in the summary
+    'top': 30,
+    # If true, memory allocations are traced as well
+    'trace_memory': True,
+}
+
+_unsafe_chars = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def get_profiling_config(client_config):
+    """
+    This method will return profiling configuration merged with the default
+    configuration, the environment variable enables profiling of every
+    operation without updating the blueprint
+    :param dict client_config: Openstack client configuration
+    :return dict: Profiling configuration
+    """
+    config = dict(DEFAULT_PROFILING_CONFIG)
+    config.update(client_config.get(PROFILING_CONFIG) or {})
+    if os.environ.get(PROFILING_ENV, '').lower() in PROFILING_ENV_VALUES:
+        config['enabled'] = True
+    return config
+
+
+def get_profile_name(*parts):
+    """
+    :param parts: Parts of the name (i.e. deployment, node instance and
+    operation)
+    :return str: Name safe to be used as a file name
+    """
+    return '_'.join(_unsafe_chars.sub('-', str(part))
+                    for part in parts if part)
+
+
+class OperationProfiler(object):
+    """
+    Profile the cpu time and the memory allocations of an operation
+    """
+    def __init__(self, top=30, trace_memory=True, output_dir=''):
+        self.top = top
+        self.trace_memory = trace_memory
+        self.output_dir = output_dir
+        self.duration = None
+        self.peak_memory = None
+        self._profile = cProfile.Profile()
+        self._started_at = None
+        self._started_tracemalloc = False
+        self._snapshot = None
+        self._memory_stats = []
+
+    def start(self):
+        if self.trace_memory:
+            # Memory could be already traced by the caller, in which case it
+            # must be left running once the operation is done
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            # reset_peak is only available since python 3.9
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._snapshot = tracemalloc.take_snapshot()
+        self._started_at = time.time()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self.duration = time.time() - self._started_at
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            snapshot = snapshot.filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),))
+            self._memory_stats = \
+                snapshot.compare_to(self._snapshot, 'lineno')[:self.top]
+            self._snapshot = None
+
+    def get_summary(self):
+        """
+        :return str: Summary of the top functions and allocations
+        """
+        stream = io.StringIO()
+        stream.write('Duration: {0:.3f}s\n'.format(self.duration or 0))
+        if self.peak_memory is not None:
+            stream.write('Peak traced memory: {0:.1f} KiB\n'.format(
+                self.peak_memory / 1024.0))
+        stream.write('\nTop {0} functions by cumulative time:\n'.format(
+            self.top))
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        if self._memory_stats:
+            stream.write('Top {0} allocations:\n'.format(self.top))
+            for stat in self._memory_stats:
+                stream.write('{0}\n'.format(stat))
+        return stream.getvalue()
+
+    def write(self, name, output_dir=None):
+        """
+        Write the profile and its summary to the output directory
+        :param str name: Base name of the files
+        :param str output_dir: Directory where the files are written, it
+        overrides the output directory of the profiler
+        :return tuple: Paths of the profile and the summary
+        """
+        output_dir = output_dir or self.output_dir
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        profile_path = os.path.join(output_dir, name + '.pstats')
+        summary_path = os.path.join(output_dir, name + '.txt')
+        self._profile.dump_stats(profile_path)
+        with open(summary_path, 'w') as summary_file:
+            summary_file.write(self.get_summary())
+        return profile_path, summary_path
@@ -16,8 +16,20 @@
 # Based on this documentation:
 # https://docs.openstack.org/openstacksdk/latest/user/proxies/compute.html.
 
+# Standard imports
+import re
+import copy
+import time
+import uuid
+
+# Third party imports
+import openstack.exceptions
+
 # Local imports
-from openstack_sdk.common import (OpenstackResource, ResourceMixin)
+from openstack_sdk.common import (OpenstackResource,
+                                  ResourceMixin,
+                                  BatchMixin)
+from openstack_sdk.file_state import FileState
 
 
 class OpenstackServer(OpenstackResource):
@@ -38,58 +50,48 @@ class OpenstackServer(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this server: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this server: %s', name_or_id)
         server = self.connection.compute.find_server(
             name_or_id, ignore_missing=False
         )
-        self.logger.debug(
-            'Found server with this result: {0}'.format(server))
+        self.logger.debug('Found server with this result: %s', server)
         return server
 
     def create(self):
         self.logger.debug(
-            'Attempting to create server with these args: {0}'.format(
-                self.config))
+            'Attempting to create server with these args: %s', self.config)
         server = self.connection.compute.create_server(**self.config)
-        self.logger.info(
-            'Created server with this result: {0}'.format(server))
+        self.logger.info('Created server with this result: %s', server)
         return server
 
     def delete(self):
         server = self.get()
-        self.logger.debug(
-            'Attempting to delete this server: {0}'.format(server))
+        self.logger.debug('Attempting to delete this server: %s', server)
         result = self.connection.compute.delete_server(server)
-        self.logger.debug(
-            'Deleted server with this result: {0}'.format(result))
+        self.logger.debug('Deleted server with this result: %s', result)
         return result
 
     def reboot(self, reboot_type):
         server = self.get()
-        self.logger.debug(
-            'Attempting to reboot this server: {0}'.format(server))
+        self.logger.debug('Attempting to reboot this server: %s', server)
         self.connection.compute.reboot_server(server, reboot_type)
         return None
 
     def resume(self):
         server = self.get()
-        self.logger.debug(
-            'Attempting to resume this server: {0}'.format(server))
+        self.logger.debug('Attempting to resume this server: %s', server)
         self.connection.compute.resume_server(server)
         return None
 
     def suspend(self):
         server = self.get()
-        self.logger.debug(
-            'Attempting to suspend this server: {0}'.format(server))
+        self.logger.debug('Attempting to suspend this server: %s', server)
         self.connection.compute.suspend_server(server)
         return None
 
     def backup(self, name, backup_type, rotation):
         server = self.get()
-        self.logger.debug(
-            'Attempting to backup this server: {0}'.format(server))
+        self.logger.debug('Attempting to backup this server: %s', server)
         self.connection.compute.backup_server(server,
                                               name,
                                               backup_type,
@@ -99,20 +101,21 @@ class OpenstackServer(OpenstackResource):
     def rebuild(self, image, name=None, admin_password='', **attr):
         server = self.get()
         name = name or server.name
-        attr['image'] = image
-        self.logger.debug(
-            'Attempting to rebuild this server: {0}'.format(server))
+        self.logger.debug('Attempting to rebuild this server: %s', server)
 
+        # Pass the image only once and by keyword, so it does not clash with
+        # the positional arguments of the rebuild_server proxy method
         self.connection.compute.rebuild_server(server,
-                                               name,
-                                               admin_password,
+                                               image=image,
+                                               name=name,
+                                               admin_password=admin_password,
                                                **attr)
         return None
 
     def create_image(self, name, metadata=None):
         server = self.get()
         self.logger.debug(
-            'Attempting to create image for this server: {0}'.format(server))
+            'Attempting to create image for this server: %s', server)
         self.connection.compute.create_server_image(
             server, name, metadata=metadata
         )
@@ -121,32 +124,28 @@ class OpenstackServer(OpenstackResource):
     def update(self, new_config=None):
         server = self.get()
         self.logger.debug(
-            'Attempting to update this server: {0} with args {1}'.format(
-                server, new_config))
+            'Attempting to update this server: %s with args %s',
+            server, new_config)
         result = self.connection.compute.update_server(server, **new_config)
-        self.logger.debug(
-            'Updated server with this result: {0}'.format(result))
+        self.logger.debug('Updated server with this result: %s', result)
         return result
 
     def start(self):
         server = self.get()
-        self.logger.debug(
-            'Attempting to start this server: {0}'.format(server))
+        self.logger.debug('Attempting to start this server: %s', server)
         self.connection.compute.start_server(server)
         return None
 
     def stop(self):
         server = self.get()
-        self.logger.debug(
-            'Attempting to stop this server: {0}'.format(server))
+        self.logger.debug('Attempting to stop this server: %s', server)
         self.connection.compute.stop_server(server)
         return None
 
     def get_server_password(self):
         server = self.get()
         self.logger.debug(
-            'Attempting to get server'
-            ' password for this server: {0}'.format(server))
+            'Attempting to get server password for this server: %s', server)
         return self.connection.compute.get_server_password(server)
 
     def list_volume_attachments(self):
@@ -155,71 +154,64 @@ class OpenstackServer(OpenstackResource):
 
     def get_volume_attachment(self, attachment_id):
         self.logger.debug(
-            'Attempting to find this volume attachment: {0}'
-            ''.format(attachment_id))
+            'Attempting to find this volume attachment: %s', attachment_id)
         volume_attachment = \
             self.connection.compute.get_volume_attachment(
                 attachment_id, self.resource_id)
         self.logger.debug(
-            'Found volume attachment with this result: {0}'
-            ''.format(volume_attachment))
+            'Found volume attachment with this result: %s', volume_attachment)
         return volume_attachment
 
     def create_volume_attachment(self, attachment_config):
         self.logger.debug(
-            'Attempting to create volume attachment'
-            ' with these args: {0}'.format(self.config))
+            'Attempting to create volume attachment with these args: %s',
+            self.config)
         volume_attachment = \
             self.connection.compute.create_volume_attachment(
                 self.resource_id, **attachment_config)
         self.logger.debug(
-            'Created volume attachment with this result: {0}'
-            ''.format(volume_attachment))
+            'Created volume attachment with this result: %s',
+            volume_attachment)
         return volume_attachment
 
     def delete_volume_attachment(self, attachment_id):
         self.logger.debug(
-            'Attempting to delete this volume attachment: {0}'
-            ''.format(attachment_id))
+            'Attempting to delete this volume attachment: %s', attachment_id)
         self.connection.compute.delete_volume_attachment(attachment_id,
                                                          self.resource_id)
         self.logger.debug(
-            'Volume attachment {0} was deleted successfully'
-            ''.format(attachment_id))
+            'Volume attachment %s was deleted successfully', attachment_id)
         return None
 
     def create_server_interface(self, interface_config):
         self.logger.debug(
-            'Attempting to create server interface with these args:'
-            '{0}'.format(interface_config))
+            'Attempting to create server interface with these args:%s',
+            interface_config)
         result = \
             self.connection.compute.create_server_interface(
                 self.resource_id, **interface_config)
         self.logger.debug(
-            'Created server interface with this result: {0}'.format(result))
+            'Created server interface with this result: %s', result)
         return result
 
     def delete_server_interface(self, interface_id):
         self.logger.debug(
-            'Attempting to delete server interface with these args:'
-            '{0}'.format(interface_id))
+            'Attempting to delete server interface with these args:%s',
+            interface_id)
         self.connection.compute.delete_server_interface(
             interface_id, server=self.resource_id)
         self.logger.debug(
-            'Server interface {0} was deleted successfully'
-            ''.format(interface_id))
+            'Server interface %s was deleted successfully', interface_id)
         return None
 
     def get_server_interface(self, interface_id):
         self.logger.debug(
-            'Attempting to find this server interface: {0}'
-            ''.format(interface_id))
+            'Attempting to find this server interface: %s', interface_id)
         server_interface = \
             self.connection.compute.get_server_interface(
                 interface_id, self.resource_id)
         self.logger.debug(
-            'Found server interface with this result: {0}'
-            ''.format(server_interface))
+            'Found server interface with this result: %s', server_interface)
         return server_interface
 
     def server_interfaces(self):
@@ -228,49 +220,406 @@ class OpenstackServer(OpenstackResource):
 
     def add_security_group_to_server(self, security_group_id):
         self.logger.debug(
-            'Attempting to add security group {0} to server {1}'
-            ''.format(security_group_id, self.resource_id))
+            'Attempting to add security group %s to server %s',
+            security_group_id, self.resource_id)
         self.connection.compute.add_security_group_to_server(
             self.resource_id, security_group_id)
         self.logger.debug(
-            'Security group {0} was added to server {1} '
-            'successfully'.format(security_group_id, self.resource_id))
+            'Security group %s was added to server %s successfully',
+            security_group_id, self.resource_id)
         return None
 
     def remove_security_group_from_server(self, security_group_id):
         self.logger.debug(
-            'Attempting to remove security group {0} from server {1}'
-            ''.format(security_group_id, self.resource_id))
+            'Attempting to remove security group %s from server %s',
+            security_group_id, self.resource_id)
         self.connection.compute.remove_security_group_from_server(
             self.resource_id, security_group_id)
         self.logger.debug(
-            'Security group {0} was removed from server {1} '
-            'successfully'.format(security_group_id, self.resource_id))
+            'Security group %s was removed from server %s successfully',
+            security_group_id, self.resource_id)
         return None
 
     def add_floating_ip_to_server(self, floating_ip, fixed_ip=None):
         self.logger.debug(
-            'Attempting to add floating ip {0} to server {1}'
-            ''.format(floating_ip, self.resource_id))
+            'Attempting to add floating ip %s to server %s',
+            floating_ip, self.resource_id)
         self.connection.compute.add_floating_ip_to_server(
             self.resource_id, floating_ip, fixed_address=fixed_ip)
         self.logger.debug(
-            'Floating ip {0} was added to server {1} successfully'
-            ''.format(floating_ip, self.resource_id))
+            'Floating ip %s was added to server %s successfully',
+            floating_ip, self.resource_id)
         return None
 
     def remove_floating_ip_from_server(self, floating_ip):
         self.logger.debug(
-            'Attempting to remove floating ip {0} from server {1}'
-            ''.format(floating_ip, self.resource_id))
+            'Attempting to remove floating ip %s from server %s',
+            floating_ip, self.resource_id)
         self.connection.compute.remove_floating_ip_from_server(
             self.resource_id, floating_ip)
         self.logger.debug(
-            'Floating ip {0} was removed from server {1} '
-            'successfully'.format(floating_ip, self.resource_id))
+            'Floating ip %s was removed from server %s successfully',
+            floating_ip, self.resource_id)
+        return None
+
+    def get_metadata(self):
+        self.logger.debug(
+            'Attempting to get metadata of server %s', self.resource_id)
+        result = self.connection.compute.get_server_metadata(
+            self.resource_id)
+        return result.metadata
+
+    def set_metadata(self, metadata):
+        self.logger.debug(
+            'Attempting to set metadata %s of server %s',
+            metadata, self.resource_id)
+        result = self.connection.compute.set_server_metadata(
+            self.resource_id, **metadata)
+        self.logger.debug(
+            'Set server metadata with this result: %s', result.metadata)
+        return result.metadata
+
+    def delete_metadata(self, keys):
+        self.logger.debug(
+            'Attempting to delete metadata %s of server %s',
+            keys, self.resource_id)
+        self.connection.compute.delete_server_metadata(self.resource_id,
+                                                       keys)
         return None
 
 
+class OpenstackServerPool(OpenstackServer):
+    """
+    Pool of servers booted ahead of time from the same configuration, the
+    servers of the pool are tracked using their metadata, so that any agent
+    can claim a server or return it to the pool.
+
+    Nova does not provide compare-and-swap on metadata, so a claim is an
+    update of the description of the first port of the server which is sent
+    with the revision number of the port (compare-and-swap), only one caller
+    succeeds when two callers claim the same server. Servers without a port
+    cannot be claimed, so the servers of the pool must have a network.
+    """
+    resource_type = 'server_pool'
+
+    POOL_METADATA = 'cloudify_server_pool'
+    STATE_METADATA = 'cloudify_server_pool_state'
+    CLAIM_METADATA = 'cloudify_server_pool_claim'
+    CLAIM_PREFIX = 'cloudify_server_pool:claimed:'
+    STATE_AVAILABLE = 'available'
+    STATE_CLAIMED = 'claimed'
+    STATUS_ACTIVE = 'ACTIVE'
+    STATUS_SHUTOFF = 'SHUTOFF'
+    STATUS_ERROR = 'ERROR'
+
+    def _lock(self):
+        return FileState('{0}_{1}'.format(self.resource_type,
+                                          self.name)).lock()
+
+    def _get_server(self, server_id):
+        server = OpenstackServer(self.client_config, logger=self.logger)
+        server.resource_id = server_id
+        return server
+
+    def _pool_metadata(self):
+        metadata = dict(self.config.get('metadata') or {})
+        metadata.update({
+            self.POOL_METADATA: self.name,
+            self.STATE_METADATA: self.STATE_AVAILABLE
+        })
+        return metadata
+
+    def _get_claim_port(self, server_id):
+        """
+        :param str server_id: Id of the server of the pool
+        :return: Port used to claim the server or None if it has no port
+        """
+        ports = sorted(self.connection.network.ports(device_id=server_id),
+                       key=lambda port: port.id)
+        return ports[0] if ports else None
+
+    def _claim_port(self, server_id, description):
+        """
+        :param str server_id: Id of the server of the pool
+        :param str description: Description of the port of a claimed server
+        :return bool: True if the server is claimed by the caller
+        """
+        port = self._get_claim_port(server_id)
+        if not port:
+            self.logger.warning(
+                'Server %s of pool %s does not have a port, it cannot be '
+                'claimed', server_id, self.name)
+            return False
+        # The claim is retried by the same caller
+        if port.description == description:
+            return True
+        # Claimed by another caller which did not update the metadata yet
+        if (port.description or '').startswith(self.CLAIM_PREFIX):
+            return False
+        try:
+            self.connection.network.update_port(
+                port, if_revision=port.revision_number,
+                description=description)
+        except openstack.exceptions.PreconditionFailedException:
+            self.logger.debug(
+                'Server %s of pool %s was claimed by another caller',
+                server_id, self.name)
+            return False
+        return True
+
+    def _release_port(self, server_id):
+        port = self._get_claim_port(server_id)
+        if port and (port.description or '').startswith(self.CLAIM_PREFIX):
+            self.connection.network.update_port(port, description='')
+
+    def _generate_server_name(self):
+        return '{0}-{1}'.format(self.name, uuid.uuid4().hex[:8])
+
+    def list_pool_servers(self, state=None):
+        """
+        :param str state: Only list the servers in this pool state
+        :return list: Servers of the pool
+        """
+        # Nova filters the servers by name using a regular expression, the
+        # servers of the pool are named by "_generate_server_name"
+        query = {'name': '^{0}-[0-9a-f]{{8}}$'.format(re.escape(self.name))}
+        servers = []
+        for server in self.list(query=query):
+            metadata = server.metadata or {}
+            if metadata.get(self.POOL_METADATA) != self.name:
+                continue
+            if state and metadata.get(self.STATE_METADATA) != state:
+                continue
+            servers.append(server)
+        return servers
+
+    def delete_pool_server(self, server_id):
+        """
+        :param str server_id: Id of the server of the pool to delete
+        """
+        return self._get_server(server_id).delete()
+
+    def refill(self, size):
+        """
+        Boot servers until the pool has the requested number of available
+        servers, servers in error state are replaced. It does not wait for
+        the servers to be active since nova boots them asynchronously
+        :param int size: Number of available servers of the pool
+        :return list: Booted servers
+        """
+        # Servers which are still booting are listed as available, the
+        # count and the boot are done under the lock so that concurrent
+        # refills do not boot the same missing servers
+        with self._lock():
+            available = []
+            for server in self.list_pool_servers(self.STATE_AVAILABLE):
+                if server.status == self.STATUS_ERROR:
+                    self.logger.info(
+                        'Deleting server %s of pool %s in error state',
+                        server.id, self.name)
+                    self.delete_pool_server(server.id)
+                    continue
+                available.append(server)
+
+            booted = []
+            for _ in range(size - len(available)):
+                config = copy.deepcopy(self.config)
+                config['name'] = self._generate_server_name()
+                config['metadata'] = self._pool_metadata()
+                server = OpenstackServer(self.client_config, config,
+                                         self.logger)
+                booted.append(server.create())
+        return booted
+
+    def _complete_claim(self, server, claim_id):
+        pool_server = self._get_server(server.id)
+        pool_server.set_metadata({
+            self.STATE_METADATA: self.STATE_CLAIMED,
+            self.CLAIM_METADATA: claim_id
+        })
+        self.logger.info('Claimed server %s of pool %s',
+                         server.id, self.name)
+        if server.status == self.STATUS_SHUTOFF:
+            pool_server.start()
+        return server.id
+
+    def claim(self, claim_id):
+        """
+        Claim an active server of the pool, claiming again with the same
+        id returns the server already claimed
+        :param str claim_id: Unique id of the claim
+        :return str: Id of the claimed server or None if the pool is empty
+        """
+        description = '{0}{1}'.format(self.CLAIM_PREFIX, claim_id)
+        # The claim is retried by the same caller, the claimed server may be
+        # renamed already so it is found using the port it was claimed with
+        for port in self.connection.network.ports(description=description):
+            if port.device_id:
+                server = self._get_server(port.device_id).get()
+                metadata = server.metadata or {}
+                if metadata.get(self.CLAIM_METADATA) == claim_id:
+                    return server.id
+                return self._complete_claim(server, claim_id)
+
+        # Servers stopped before they were returned to the pool are started
+        # once they are claimed, active servers are used first
+        servers = [server for server in
+                   self.list_pool_servers(self.STATE_AVAILABLE)
+                   if server.status in (self.STATUS_ACTIVE,
+                                        self.STATUS_SHUTOFF)]
+        for server in sorted(servers,
+                             key=lambda item: (
+                                 item.status != self.STATUS_ACTIVE,
+                                 item.created_at or '')):
+            if self._claim_port(server.id, description):
+                return self._complete_claim(server, claim_id)
+        return None
+
+    def release(self, server_id, max_size, security_groups=None):
+        """
+        Scrub a claimed server and return it to the pool, the server is
+        rebuilt from the image of the pool which resets its disk, name and
+        metadata
+        :param str server_id: Id of the claimed server
+        :param int max_size: Maximum number of available servers of the pool
+        :param list security_groups: Security groups attached to the server
+        once it was claimed
+        :return bool: True if the server is returned to the pool, False if
+        the server must be deleted instead
+        """
+        image = self.config.get('image_id')
+        if not image:
+            return False
+
+        with self._lock():
+            available = self.list_pool_servers(self.STATE_AVAILABLE)
+            if len(available) >= max_size:
+                return False
+
+            server = self._get_server(server_id)
+            for security_group in security_groups or []:
+                server.remove_security_group_from_server(
+                    security_group.get('id'))
+            # The metadata still marks the server as claimed until it is
+            # rebuilt, so it is not claimed again before it is scrubbed
+            self._release_port(server_id)
+            server.rebuild(image,
+                           name=self._generate_server_name(),
+                           metadata=self._pool_metadata())
+        self.logger.info('Returned server %s to pool %s', server_id,
+                         self.name)
+        return True
+
+
+class OpenstackServerBatch(BatchMixin, OpenstackServer):
+    """
+    Batch of identical servers requested by node instances of the same node,
+    the servers of the batch are booted using a single nova request with
+    "min_count" and "max_count", so either all of them are booted or none.
+
+    Nova names the servers of a multi-create request using the name of the
+    request followed by the index of each server, which is used to assign
+    the servers to the members of the batch in order.
+
+    The token and the id of the first server of the request are saved as soon
+    as nova accepts it, so the servers are looked up again instead of being
+    booted twice if listing them fails.
+    """
+    resource_type = 'server_batch'
+
+    BATCH_METADATA = 'cloudify_server_batch'
+    # Number of seconds to wait for all the servers of the request to be
+    # listed, the servers found are deleted once it is exceeded
+    RESOLVE_TIMEOUT = 300
+    # Fields of the booted servers which are returned to the members
+    SERVER_FIELDS = ('id', 'name', 'status', 'reservation_id')
+
+    @staticmethod
+    def _name_index(server):
+        match = re.search(r'-(\d+)$', server.name or '')
+        return (int(match.group(1)) if match else 0, server.name, server.id)
+
+    def list_batch_servers(self, server_id, batch_token):
+        """
+        :param str server_id: Id of one server of the multi-create request
+        :param str batch_token: Token added to the metadata of the servers
+        of the multi-create request
+        :return list: Servers of the multi-create request ordered by their
+        index
+        """
+        reservation_id = self.find_server(server_id).reservation_id
+        # The reservation id is not visible to all users, servers are listed
+        # by their name in that case
+        if reservation_id:
+            query = {'reservation_id': reservation_id}
+        else:
+            query = {'name': '^{0}-[0-9]+$'.format(re.escape(self.name))}
+        servers = [server for server in self.list(query=query)
+                   if (server.metadata or {}).get(self.BATCH_METADATA) ==
+                   batch_token]
+        return sorted(servers, key=self._name_index)
+
+    def _delete_batch_servers(self, servers):
+        for server in servers:
+            self.logger.warning('Deleting server %s of batch %s which is not '
+                                'assigned to any member', server.id,
+                                self.batch_id)
+            try:
+                self.connection.compute.delete_server(server.id)
+            except openstack.exceptions.SDKException as error:
+                self.logger.error('Failed to delete server %s: %s',
+                                  server.id, error)
+
+    def create_batch(self, member_configs, state, checkpoint):
+        count = len(member_configs)
+        if not state.get('server_id'):
+            batch_token = uuid.uuid4().hex
+            config = copy.deepcopy(self.config)
+            config['metadata'] = dict(config.get('metadata') or {},
+                                      **{self.BATCH_METADATA: batch_token})
+            config.update(min_count=count, max_count=count)
+            self.logger.debug(
+                'Attempting to create %s servers with these args: %s',
+                count, config)
+            try:
+                server = self.connection.compute.create_server(**config)
+            except openstack.exceptions.SDKException as error:
+                return [error] * count
+            state.update(token=batch_token,
+                         server_id=server.id,
+                         created_at=time.time())
+            checkpoint()
+
+        expired = time.time() - state['created_at'] >= self.RESOLVE_TIMEOUT
+        try:
+            servers = self.list_batch_servers(state['server_id'],
+                                              state['token'])
+        except openstack.exceptions.SDKException as error:
+            if not expired:
+                self.logger.warning('Failed to list servers of batch %s: %s',
+                                    self.batch_id, error)
+                return None
+            return [error] * count
+        if len(servers) < count and not expired:
+            self.logger.info('Found %s of %s servers of batch %s',
+                             len(servers), count, self.batch_id)
+            return None
+        self.logger.info('Created %s servers of batch %s with reservation %s',
+                         len(servers), self.batch_id,
+                         servers[0].reservation_id if servers else None)
+
+        if len(servers) < count:
+            # Members boot their servers alone, so the servers found are not
+            # left running next to them
+            self._delete_batch_servers(servers)
+            missing = openstack.exceptions.ResourceNotFound(
+                'Servers of batch {0} are not found'.format(self.batch_id))
+            return [missing] * count
+        self._delete_batch_servers(servers[count:])
+        return [{field: server[field] for field in self.SERVER_FIELDS}
+                for server in servers[:count]]
+
+
 class OpenstackHostAggregate(ResourceMixin, OpenstackResource):
     service_type = 'compute'
     resource_type = 'aggregate'
@@ -289,72 +638,61 @@ class OpenstackHostAggregate(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this aggregate: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this aggregate: %s', name_or_id)
         aggregate = self.find_resource(name_or_id)
-        self.logger.debug(
-            'Found aggregate with this result: {0}'.format(aggregate))
+        self.logger.debug('Found aggregate with this result: %s', aggregate)
         return aggregate
 
     def create(self):
         self.logger.debug(
-            'Attempting to create aggregate with these args: {0}'.format(
-                self.config))
+            'Attempting to create aggregate with these args: %s', self.config)
         aggregate = self.connection.compute.create_aggregate(**self.config)
-        self.logger.debug(
-            'Created aggregate with this result: {0}'.format(aggregate))
+        self.logger.debug('Created aggregate with this result: %s', aggregate)
         return aggregate
 
     def update(self, new_config=None):
         aggregate = self.get()
         self.logger.debug(
-            'Attempting to update this aggregate: {0} with args {1}'.format(
-                aggregate, new_config))
+            'Attempting to update this aggregate: %s with args %s',
+            aggregate, new_config)
         result =\
             self.connection.compute.update_aggregate(aggregate, **new_config)
-        self.logger.debug(
-            'Updated aggregate with this result: {0}'.format(result))
+        self.logger.debug('Updated aggregate with this result: %s', result)
         return result
 
     def delete(self):
         aggregate = self.get()
-        self.logger.debug(
-            'Attempting to delete this aggregate: {0}'.format(aggregate))
+        self.logger.debug('Attempting to delete this aggregate: %s', aggregate)
         result = self.connection.compute.delete_aggregate(aggregate)
-        self.logger.debug(
-            'Deleted aggregate with this result: {0}'.format(result))
+        self.logger.debug('Deleted aggregate with this result: %s', result)
         return result
 
     def set_metadata(self, metadata):
         aggregate = self.get()
         self.logger.debug(
-            'Attempting to set metadata to this aggregate: {0}'
-            ''.format(aggregate))
+            'Attempting to set metadata to this aggregate: %s', aggregate)
         result = \
             self.connection.compute.set_aggregate_metadata(aggregate, metadata)
         self.logger.debug(
-            'Set metadata to aggregate with this result: {0}'.format(
-                result))
+            'Set metadata to aggregate with this result: %s', result)
         return result
 
     def add_host(self, host):
         aggregate = self.get()
         self.logger.debug(
-            'Attempting to add host to this aggregate: {0}'
-            ''.format(aggregate))
+            'Attempting to add host to this aggregate: %s', aggregate)
         result = self.connection.compute.add_host_to_aggregate(aggregate, host)
         self.logger.debug(
-            'Added host to aggregate with this result: {0}'.format(result))
+            'Added host to aggregate with this result: %s', result)
         return result
 
     def remove_host(self, host):
         aggregate = self.get()
-        self.logger.debug(
-            'Attempting to delete this aggregate: {0}'.format(aggregate))
+        self.logger.debug('Attempting to delete this aggregate: %s', aggregate)
         result = \
             self.connection.compute.remove_host_from_aggregate(aggregate, host)
         self.logger.debug(
-            'Deleted host to aggregate with this result: {0}'.format(result))
+            'Deleted host to aggregate with this result: %s', result)
         return result
 
 
@@ -375,31 +713,30 @@ class OpenstackServerGroup(OpenstackResource):
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find this server group: {0}'.format(name_or_id))
+            'Attempting to find this server group: %s', name_or_id)
         server_group = self.connection.compute.find_server_group(
             name_or_id, ignore_missing=False
         )
         self.logger.debug(
-            'Found server group with this result: {0}'.format(server_group))
+            'Found server group with this result: %s', server_group)
         return server_group
 
     def create(self):
         self.logger.debug(
-            'Attempting to create server group with these args: {0}'.format(
-                self.config))
+            'Attempting to create server group with these args: %s',
+            self.config)
         server_group =\
             self.connection.compute.create_server_group(**self.config)
         self.logger.debug(
-            'Created server group with this result: {0}'.format(server_group))
+            'Created server group with this result: %s', server_group)
         return server_group
 
     def delete(self):
         server_group = self.get()
         self.logger.debug(
-            'Attempting to delete this server group: {0}'.format(server_group))
+            'Attempting to delete this server group: %s', server_group)
         result = self.connection.compute.delete_server_group(server_group)
-        self.logger.debug(
-            'Deleted server group with this result: {0}'.format(result))
+        self.logger.debug('Deleted server group with this result: %s', result)
         return result
 
 
@@ -418,30 +755,24 @@ class OpenstackKeyPair(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this key pair: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this key pair: %s', name_or_id)
         key_pair = self.connection.compute.find_keypair(name_or_id,
                                                         ignore_missing=False)
-        self.logger.debug(
-            'Found key pair with this result: {0}'.format(key_pair))
+        self.logger.debug('Found key pair with this result: %s', key_pair)
         return key_pair
 
     def create(self):
         self.logger.debug(
-            'Attempting to create key pair with these args: {0}'.format(
-                self.config))
+            'Attempting to create key pair with these args: %s', self.config)
         key_pair = self.connection.compute.create_keypair(**self.config)
-        self.logger.debug(
-            'Created key pair with this result: {0}'.format(key_pair))
+        self.logger.debug('Created key pair with this result: %s', key_pair)
         return key_pair
 
     def delete(self):
         key_pair = self.get()
-        self.logger.debug(
-            'Attempting to delete this key pair: {0}'.format(key_pair))
+        self.logger.debug('Attempting to delete this key pair: %s', key_pair)
         result = self.connection.compute.delete_keypair(key_pair)
-        self.logger.debug(
-            'Deleted key pair with this result: {0}'.format(result))
+        self.logger.debug('Deleted key pair with this result: %s', result)
         return result
 
 
@@ -462,44 +793,38 @@ class OpenstackFlavor(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug('Attempting to find this flavor: {0}'
-                          ''.format(name_or_id))
+        self.logger.debug('Attempting to find this flavor: %s', name_or_id)
         flavor = self.connection.compute.find_flavor(
             name_or_id, ignore_missing=False)
-        self.logger.debug(
-            'Found flavor with this result: {0}'.format(flavor))
+        self.logger.debug('Found flavor with this result: %s', flavor)
         return flavor
 
     def create(self):
         self.logger.debug(
-            'Attempting to create flavor with these args: {0}'.format(
-                self.config))
+            'Attempting to create flavor with these args: %s', self.config)
         flavor = self.connection.compute.create_flavor(**self.config)
-        self.logger.debug(
-            'Created flavor image with this result: {0}'.format(flavor))
+        self.logger.debug('Created flavor image with this result: %s', flavor)
         return flavor
 
     def delete(self):
         flavor = self.get()
-        self.logger.debug(
-            'Attempting to delete this flavor: {0}'.format(flavor))
+        self.logger.debug('Attempting to delete this flavor: %s', flavor)
         result = self.connection.compute.delete_flavor(flavor)
-        self.logger.debug(
-            'Deleted flavor with this result: {0}'.format(result))
+        self.logger.debug('Deleted flavor with this result: %s', result)
         return result
 
     def set_flavor_specs(self, flavor_id, extra_specs):
         self.logger.debug(
-            'Attempting to set flavor {0} specs with these args: {1}'.format(
-                flavor_id, extra_specs))
+            'Attempting to set flavor %s specs with these args: %s',
+            flavor_id, extra_specs)
 
         self.connection.compute.create_flavor_extra_specs(flavor_id,
                                                           extra_specs)
 
     def add_flavor_access(self, flavor_id, tenant):
         self.logger.debug(
-            'Attempting to set flavor {0} access with these args: {1}'.format(
-                flavor_id, tenant))
+            'Attempting to set flavor %s access with these args: %s',
+            flavor_id, tenant)
         project = self.connection.identity.find_project(tenant,
                                                         ignore_missing=False)
         self.connection.compute.flavor_add_tenant_access(flavor_id,
@@ -32,31 +32,25 @@ class OpenstackZone(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this zone: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this zone: %s', name_or_id)
         zone = self.connection.dns.find_zone(
             name_or_id, ignore_missing=False
         )
-        self.logger.debug(
-            'Found zone with this result: {0}'.format(zone))
+        self.logger.debug('Found zone with this result: %s', zone)
         return zone
 
     def create(self):
         self.logger.debug(
-            'Attempting to create zone with these args: {0}'.format(
-                self.config))
+            'Attempting to create zone with these args: %s', self.config)
         zone = self.connection.dns.create_zone(**self.config)
-        self.logger.info(
-            'Created zone with this result: {0}'.format(zone))
+        self.logger.info('Created zone with this result: %s', zone)
         return zone
 
     def delete(self):
         zone = self.get()
-        self.logger.debug(
-            'Attempting to delete this zone: {0}'.format(zone))
+        self.logger.debug('Attempting to delete this zone: %s', zone)
         result = self.connection.dns.delete_zone(zone)
-        self.logger.debug(
-            'Deleted zone with this result: {0}'.format(result))
+        self.logger.debug('Deleted zone with this result: %s', result)
         return result
 
 
@@ -75,33 +69,27 @@ class OpenstackRecordSet(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this recordset: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this recordset: %s', name_or_id)
         recordset = self.connection.dns.find_recordset(
             zone_id, name_or_id, ignore_missing=False
         )
-        self.logger.debug(
-            'Found recordset with this result: {0}'.format(recordset))
+        self.logger.debug('Found recordset with this result: %s', recordset)
         return recordset
 
     def create(self):
         self.logger.debug(
-            'Attempting to create recordset with these args: {0}'.format(
-                self.config))
+            'Attempting to create recordset with these args: %s', self.config)
         self.zone_id = self.config.pop('zone_id', None)
         recordset = \
             self.connection.dns.create_recordset(self.zone_id, **self.config)
-        self.logger.info(
-            'Created recordset with this result: {0}'.format(recordset))
+        self.logger.info('Created recordset with this result: %s', recordset)
         self.zone_id = recordset['zone_id']
         return recordset
 
     def delete(self):
         recordset = self.get()
-        self.logger.debug(
-            'Attempting to delete this recordset: {0}'.format(recordset))
+        self.logger.debug('Attempting to delete this recordset: %s', recordset)
         result = self.connection.dns.delete_recordset(recordset)
-        self.logger.debug(
-            'Deleted recordset with this result: {0}'.format(result))
+        self.logger.debug('Deleted recordset with this result: %s', result)
         self.zone_id = ''
         return result
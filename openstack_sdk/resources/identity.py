@@ -44,34 +44,32 @@ class OpenstackUser(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this user: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this user: %s', name_or_id)
         user = self.find_resource(name_or_id)
-        self.logger.debug('Found user with this result: {0}'.format(user))
+        self.logger.debug('Found user with this result: %s', user)
         return user
 
     def create(self):
         self.logger.debug(
-            'Attempting to create user with these args: {0}'.format(
-                self.config))
+            'Attempting to create user with these args: %s', self.config)
         user = self.connection.identity.create_user(**self.config)
-        self.logger.debug('Created user with this result: {0}'.format(user))
+        self.logger.debug('Created user with this result: %s', user)
         return user
 
     def delete(self):
         user = self.get()
-        self.logger.debug('Attempting to delete this user: {0}'.format(user))
+        self.logger.debug('Attempting to delete this user: %s', user)
         result = self.connection.identity.delete_user(user)
-        self.logger.debug('Deleted user with this result: {0}'.format(result))
+        self.logger.debug('Deleted user with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         user = new_config.pop('user', None) or self.get()
         self.logger.debug(
-            'Attempting to update this user: {0} with args {1}'.format(
-                user, new_config))
+            'Attempting to update this user: %s with args %s',
+            user, new_config)
         result = self.connection.identity.update_user(user, **new_config)
-        self.logger.debug('Updated user with this result: {0}'.format(result))
+        self.logger.debug('Updated user with this result: %s', result)
         return result
 
 
@@ -96,34 +94,32 @@ class OpenstackGroup(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this group: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this group: %s', name_or_id)
         group = self.find_resource(name_or_id)
-        self.logger.debug('Found group with this result: {0}'.format(group))
+        self.logger.debug('Found group with this result: %s', group)
         return group
 
     def create(self):
         self.logger.debug(
-            'Attempting to create group with these args: {0}'.format(
-                self.config))
+            'Attempting to create group with these args: %s', self.config)
         group = self.connection.identity.create_group(**self.config)
-        self.logger.debug('Created group with this result: {0}'.format(group))
+        self.logger.debug('Created group with this result: %s', group)
         return group
 
     def delete(self):
         group = self.get()
-        self.logger.debug('Attempting to delete this group: {0}'.format(group))
+        self.logger.debug('Attempting to delete this group: %s', group)
         result = self.connection.identity.delete_group(group)
-        self.logger.debug('Deleted group with this result: {0}'.format(result))
+        self.logger.debug('Deleted group with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         group = new_config.pop('group', None) or self.get()
         self.logger.debug(
-            'Attempting to update this group: {0} with args {1}'.format(
-                group, new_config))
+            'Attempting to update this group: %s with args %s',
+            group, new_config)
         result = self.connection.identity.update_group(group, **new_config)
-        self.logger.debug('Updated group with this result: {0}'.format(result))
+        self.logger.debug('Updated group with this result: %s', result)
         return result
 
 
@@ -149,10 +145,10 @@ class OpenstackRole(ResourceMixin, OpenstackResource):
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find this role: {0}'.format(
-                self.name if not self.resource_id else self.resource_id))
+            'Attempting to find this role: %s',
+            self.name if not self.resource_id else self.resource_id)
         role = self.find_resource(name_or_id)
-        self.logger.debug('Found role with this result: {0}'.format(role))
+        self.logger.debug('Found role with this result: %s', role)
         return role
 
     def assign_project_role_to_user(self, project_id, user_id, role_id):
@@ -162,8 +158,8 @@ class OpenstackRole(ResourceMixin, OpenstackResource):
             'role': role_id
         }
         self.logger.debug(
-            'Attempting to assign role to user for this project: {0}'.format(
-                self.name if not self.resource_id else self.resource_id))
+            'Attempting to assign role to user for this project: %s',
+            self.name if not self.resource_id else self.resource_id)
 
         self.connection.identity.assign_project_role_to_user(**params)
 
@@ -174,36 +170,32 @@ class OpenstackRole(ResourceMixin, OpenstackResource):
             'role': role_id
         }
         self.logger.debug(
-            'Attempting to assign role to group for this project: {0}'.format(
-                self.name if not self.resource_id else self.resource_id))
+            'Attempting to assign role to group for this project: %s',
+            self.name if not self.resource_id else self.resource_id)
 
         self.connection.identity.assign_project_role_to_group(**params)
 
     def create(self):
         self.logger.debug(
-            'Attempting to create role with these args: {0}'.format(
-                self.config))
+            'Attempting to create role with these args: %s', self.config)
         role = self.connection.identity.create_role(**self.config)
-        self.logger.debug('Created role with this result: {0}'.format(role))
+        self.logger.debug('Created role with this result: %s', role)
         return role
 
     def delete(self):
         role = self.get()
-        self.logger.debug(
-            'Attempting to delete this role: {0}'.format(role))
+        self.logger.debug('Attempting to delete this role: %s', role)
         result = self.connection.identity.delete_role(role)
-        self.logger.debug(
-            'Deleted role with this result: {0}'.format(result))
+        self.logger.debug('Deleted role with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         role = self.get()
         self.logger.debug(
-            'Attempting to update this role: {0} with args {1}'.format(
-                role, new_config))
+            'Attempting to update this role: %s with args %s',
+            role, new_config)
         result = self.connection.identity.update_role(role, **new_config)
-        self.logger.debug(
-            'Updated role with this result: {0}'.format(result))
+        self.logger.debug('Updated role with this result: %s', result)
         return result
 
 
@@ -261,8 +253,7 @@ class OpenstackProject(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not \
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this project: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this project: %s', name_or_id)
         try:
             project = self.connection.identity.get_project(name_or_id)
         except openstack.exceptions.NotFoundException:
@@ -270,36 +261,30 @@ class OpenstackProject(OpenstackResource):
                 name_or_id, ignore_missing=False
             )
 
-        self.logger.debug(
-            'Found project with this result: {0}'.format(project))
+        self.logger.debug('Found project with this result: %s', project)
         return project
 
     def create(self):
         self.logger.debug(
-            'Attempting to create project with these args: {0}'.format(
-                self.config))
+            'Attempting to create project with these args: %s', self.config)
         project = self.connection.identity.create_project(**self.config)
-        self.logger.debug(
-            'Created project with this result: {0}'.format(project))
+        self.logger.debug('Created project with this result: %s', project)
         return project
 
     def delete(self):
         project = self.get()
-        self.logger.debug(
-            'Attempting to delete this project: {0}'.format(project))
+        self.logger.debug('Attempting to delete this project: %s', project)
         result = self.connection.identity.delete_project(project)
-        self.logger.debug(
-            'Deleted project with this result: {0}'.format(result))
+        self.logger.debug('Deleted project with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         project = new_config.pop('project', None) or self.get()
         self.logger.debug(
-            'Attempting to update this project: {0} with args {1}'.format(
-                project, new_config))
+            'Attempting to update this project: %s with args %s',
+            project, new_config)
         result = self.connection.identity.update_project(project, **new_config)
-        self.logger.debug(
-            'Updated project with this result: {0}'.format(result))
+        self.logger.debug('Updated project with this result: %s', result)
         return result
 
 
@@ -321,42 +306,35 @@ class OpenstackDomain(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not \
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this domain: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this domain: %s', name_or_id)
         try:
             domain = self.connection.identity.get_domain(name_or_id)
         except openstack.exceptions.NotFoundException:
             domain = self.connection.identity.find_domain(
                 name_or_id, ignore_missing=False
             )
-        self.logger.debug(
-            'Found domain with this result: {0}'.format(domain))
+        self.logger.debug('Found domain with this result: %s', domain)
         return domain
 
     def create(self):
         self.logger.debug(
-            'Attempting to create domain with these args: {0}'.format(
-                self.config))
+            'Attempting to create domain with these args: %s', self.config)
         domain = self.connection.identity.create_domain(**self.config)
-        self.logger.debug(
-            'Created domain with this result: {0}'.format(domain))
+        self.logger.debug('Created domain with this result: %s', domain)
         return domain
 
     def delete(self):
         domain = self.get()
-        self.logger.debug(
-            'Attempting to delete this domain: {0}'.format(domain))
+        self.logger.debug('Attempting to delete this domain: %s', domain)
         result = self.connection.identity.delete_domain(domain)
-        self.logger.debug(
-            'Deleted domain with this result: {0}'.format(result))
+        self.logger.debug('Deleted domain with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         domain = self.get()
         self.logger.debug(
-            'Attempting to update this domain: {0} with args {1}'.format(
-                domain, new_config))
+            'Attempting to update this domain: %s with args %s',
+            domain, new_config)
         result = self.connection.identity.update_domain(domain, **new_config)
-        self.logger.debug(
-            'Updated domain with this result: {0}'.format(result))
+        self.logger.debug('Updated domain with this result: %s', result)
         return result
@@ -41,34 +41,29 @@ class OpenstackImage(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug('Attempting to find this image: {0}'
-                          ''.format(name_or_id))
+        self.logger.debug('Attempting to find this image: %s', name_or_id)
         image = self.find_resource(name_or_id)
-        self.logger.debug('Found image with this result: {0}'.format(image))
+        self.logger.debug('Found image with this result: %s', image)
         return image
 
     def create(self):
         self.logger.debug(
-            'Attempting to create image with these args: {0}'.format(
-                self.config))
+            'Attempting to create image with these args: %s', self.config)
         image = self.connection.image.upload_image(**self.config)
-        self.logger.debug(
-            'Created image with this result: {0}'.format(image))
+        self.logger.debug('Created image with this result: %s', image)
         return image
 
     def delete(self):
         image = self.get()
-        self.logger.debug(
-            'Attempting to delete this image: {0}'.format(image))
+        self.logger.debug('Attempting to delete this image: %s', image)
         self.connection.image.delete_image(image)
         return None
 
     def update(self, new_config=None):
         image = new_config.pop('image', None) or self.get()
         self.logger.debug(
-            'Attempting to update this image: {0} with args {1}'.format(
-                image, new_config))
+            'Attempting to update this image: %s with args %s',
+            image, new_config)
         result = self.connection.image.update_image(image, **new_config)
-        self.logger.debug(
-            'Updated image with this result: {0}'.format(result))
+        self.logger.debug('Updated image with this result: %s', result)
         return result
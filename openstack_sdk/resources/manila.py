@@ -21,6 +21,7 @@ from manilaclient import client
 from manilaclient.common.apiclient import exceptions
 
 from ..common import OpenstackResource
+from ..log_utils import get_resource_logger
 
 
 class ManilaResource(OpenstackResource):
@@ -30,7 +31,7 @@ class ManilaResource(OpenstackResource):
             client_config['client_version'] = '2'
         self.client_config = client_config
         self.configure_ssl()
-        self.logger = logger
+        self.logger = get_resource_logger(logger)
         self.connection = client.Client(**client_config)
         self.config = resource_config or {}
         self.name = self.config.get('name')
@@ -67,27 +68,24 @@ class OpenstackShareNetwork(ManilaResource):
         if not name_or_id:
             name_or_id = self.resource_id or self.name
         self.logger.debug(
-            'Attempting to find this network share: {0}'.format(name_or_id))
+            'Attempting to find this network share: %s', name_or_id)
         share = self.connection.share_networks.get(name_or_id)
-        self.logger.debug(
-            'Found network share with this result: {0}'.format(share))
+        self.logger.debug('Found network share with this result: %s', share)
         return share
 
     def create(self):
         self.logger.debug(
-            'Attempting to create network share with these args: {0}'.format(
-                self.config))
+            'Attempting to create network share with these args: %s',
+            self.config)
         share = self.connection.share_networks.create(**self.config)
-        self.logger.debug(
-            'Created network share with this result: {0}'.format(share))
+        self.logger.debug('Created network share with this result: %s', share)
         return share
 
     def delete(self):
         share = self.get()
         if not share:
             return
-        self.logger.debug(
-            'Attempting to delete this network share: {0}'.format(share))
+        self.logger.debug('Attempting to delete this network share: %s', share)
         share.delete()
         self.logger.debug('Deleted network share .')
 
@@ -110,20 +108,16 @@ class OpenstackFileShare(ManilaResource):
     def find_share(self, name_or_id=None):
         if not name_or_id:
             name_or_id = self.resource_id or self.name
-        self.logger.debug(
-            'Attempting to find this share: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this share: %s', name_or_id)
         share = self.connection.shares.get(name_or_id)
-        self.logger.debug(
-            'Found share with this result: {0}'.format(share))
+        self.logger.debug('Found share with this result: %s', share)
         return share
 
     def create(self):
         self.logger.debug(
-            'Attempting to create share with these args: {0}'.format(
-                self.config))
+            'Attempting to create share with these args: %s', self.config)
         share = self.connection.shares.create(**self.config)
-        self.logger.debug(
-            'Created share with this result: {0}'.format(share))
+        self.logger.debug('Created share with this result: %s', share)
         return share
 
     def update(self):
@@ -131,45 +125,38 @@ class OpenstackFileShare(ManilaResource):
         if not share:
             return
         self.logger.debug(
-            'Attempting to update share with these args: {0}'.format(
-                self.config))
+            'Attempting to update share with these args: %s', self.config)
         result = share.update(**self.config)
-        self.logger.debug(
-            'Updated share with this result: {0}'.format(result))
+        self.logger.debug('Updated share with this result: %s', result)
         return result
 
     def delete(self):
         share = self.get()
         if not share:
             return
-        self.logger.debug(
-            'Attempting to delete this share: {0}'.format(share))
+        self.logger.debug('Attempting to delete this share: %s', share)
         response, body = share.delete()
         self.logger.debug(
-            'Deleted share with this response: {0}, body {1}'.format(
-                response, body))
+            'Deleted share with this response: %s, body %s', response, body)
         return response
 
     def allow(self, **params):
         self.logger.debug(
-            'Attempting to allow share with these params: {0}'.format(
-                params))
+            'Attempting to allow share with these params: %s', params)
         share = self.get()
         if not share:
             return
         result = share.allow(**params)
-        self.logger.debug(
-            'Allowed share with this result: {0}'.format(result))
+        self.logger.debug('Allowed share with this result: %s', result)
         return result
 
     def deny(self, ip):
-        self.logger.debug('Denying this share to {0}'.format(ip))
+        self.logger.debug('Denying this share to %s', ip)
         share = self.get()
         if not share:
             return
         result = share.deny(ip)
-        self.logger.debug(
-            'Denied share with this result: {0}'.format(result))
+        self.logger.debug('Denied share with this result: %s', result)
         return result
 
     def get_locations(self):
@@ -17,11 +17,60 @@
 # Based on this documentation:
 # https://docs.openstack.org/openstacksdk/latest/user/proxies/network.html.
 
+# Standard imports
+import copy
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 # Third part imports
 import openstack.exceptions
 
 # Local imports
-from openstack_sdk.common import (OpenstackResource, ResourceMixin)
+from openstack_sdk.common import (OpenstackResource,
+                                  ResourceMixin,
+                                  BatchMixin)
+from openstack_sdk.file_state import FileState
+
+
+def _create_in_bulk(logger, configs, chunk_size, create_bulk, create_one,
+                    resource_name):
+    """
+    This method will create resources using neutron bulk API, resources are
+    sent in chunks and if one chunk fails then resources on that chunk are
+    created one by one so that the failure is reported per resource
+    :param logger: Logger of the calling resource
+    :param list configs: List of resources config
+    :param int chunk_size: Maximum number of resources sent on each request
+    :param create_bulk: Callable which creates a list of resources at once
+    :param create_one: Callable which creates one resource from its config
+    :param str resource_name: Name of the resources used in the logs
+    :return list: List aligned with the configs provided, each item is
+    either the created resource or the error raised while trying to create it
+    """
+    results = []
+    for index in range(0, len(configs), chunk_size):
+        chunk = configs[index:index + chunk_size]
+        logger.debug('Attempting to create %s %s', len(chunk), resource_name)
+        try:
+            created = list(create_bulk(chunk))
+        except openstack.exceptions.SDKException as error:
+            logger.debug('Failed to create %s in bulk: %s, creating them one '
+                         'by one', resource_name, error)
+            created = []
+
+        # Neutron bulk create is atomic, so either all resources on the chunk
+        # are created or none of them
+        if len(created) == len(chunk):
+            results.extend(created)
+            continue
+
+        for config in chunk:
+            try:
+                results.append(create_one(**config))
+            except openstack.exceptions.SDKException as error:
+                results.append(error)
+    logger.debug('Created %s with this result: %s', resource_name, results)
+    return results
 
 
 class OpenstackNetwork(OpenstackResource):
@@ -47,8 +96,7 @@ class OpenstackNetwork(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this network: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this network: %s', name_or_id)
         try:
             network = self.connection.network.get_network(
                 name_or_id
@@ -58,36 +106,30 @@ class OpenstackNetwork(OpenstackResource):
                 name_or_id,
                 ignore_missing=False
             )
-        self.logger.debug(
-            'Found network with this result: {0}'.format(network))
+        self.logger.debug('Found network with this result: %s', network)
         return network
 
     def create(self):
         self.logger.debug(
-            'Attempting to create network with these args: {0}'.format(
-                self.config))
+            'Attempting to create network with these args: %s', self.config)
         network = self.connection.network.create_network(**self.config)
-        self.logger.debug(
-            'Created network with this result: {0}'.format(network))
+        self.logger.debug('Created network with this result: %s', network)
         return network
 
     def delete(self):
         network = self.get()
-        self.logger.debug(
-            'Attempting to delete this network: {0}'.format(network))
+        self.logger.debug('Attempting to delete this network: %s', network)
         result = self.connection.network.delete_network(network)
-        self.logger.debug(
-            'Deleted network with this result: {0}'.format(result))
+        self.logger.debug('Deleted network with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         network = self.get()
         self.logger.debug(
-            'Attempting to update this network: {0} with args {1}'.format(
-                network, new_config))
+            'Attempting to update this network: %s with args %s',
+            network, new_config)
         result = self.connection.network.update_network(network, **new_config)
-        self.logger.debug(
-            'Updated network with this result: {0}'.format(result))
+        self.logger.debug('Updated network with this result: %s', result)
         return result
 
 
@@ -116,8 +158,7 @@ class OpenstackSubnet(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this subnet: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this subnet: %s', name_or_id)
         try:
             subnet = self.connection.network.get_subnet(name_or_id)
         except openstack.exceptions.NotFoundException:
@@ -126,36 +167,30 @@ class OpenstackSubnet(OpenstackResource):
                     name_or_id,
                     ignore_missing=False
                 )
-        self.logger.debug(
-            'Found subnet with this result: {0}'.format(subnet))
+        self.logger.debug('Found subnet with this result: %s', subnet)
         return subnet
 
     def create(self):
         self.logger.debug(
-            'Attempting to create subnet with these args: {0}'.format(
-                self.config))
+            'Attempting to create subnet with these args: %s', self.config)
         subnet = self.connection.network.create_subnet(**self.config)
-        self.logger.debug(
-            'Created subnet with this result: {0}'.format(subnet))
+        self.logger.debug('Created subnet with this result: %s', subnet)
         return subnet
 
     def delete(self):
         subnet = self.get()
-        self.logger.debug(
-            'Attempting to delete this subnet: {0}'.format(subnet))
+        self.logger.debug('Attempting to delete this subnet: %s', subnet)
         result = self.connection.network.delete_subnet(subnet)
-        self.logger.debug(
-            'Deleted subnet with this result: {0}'.format(result))
+        self.logger.debug('Deleted subnet with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         subnet = self.get()
         self.logger.debug(
-            'Attempting to update this subnet: {0} with args {1}'.format(
-                subnet, new_config))
+            'Attempting to update this subnet: %s with args %s',
+            subnet, new_config)
         result = self.connection.network.update_subnet(subnet, **new_config)
-        self.logger.debug(
-            'Updated subnet with this result: {0}'.format(result))
+        self.logger.debug('Updated subnet with this result: %s', result)
         return result
 
 
@@ -182,8 +217,7 @@ class OpenstackPort(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this port: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this port: %s', name_or_id)
 
         try:
             port = self.connection.network.get_port(name_or_id)
@@ -193,38 +227,126 @@ class OpenstackPort(OpenstackResource):
                     name_or_id,
                     ignore_missing=False
                 )
-        self.logger.debug(
-            'Found port with this result: {0}'.format(port))
+        self.logger.debug('Found port with this result: %s', port)
         return port
 
     def create(self):
         self.logger.debug(
-            'Attempting to create port with these args: {0}'.format(
-                self.config))
+            'Attempting to create port with these args: %s', self.config)
         port = self.connection.network.create_port(**self.config)
-        self.logger.debug(
-            'Created port with this result: {0}'.format(port))
+        self.logger.debug('Created port with this result: %s', port)
         return port
 
     def delete(self):
         port = self.get()
-        self.logger.debug(
-            'Attempting to delete this port: {0}'.format(port))
+        self.logger.debug('Attempting to delete this port: %s', port)
         result = self.connection.network.delete_port(port)
-        self.logger.debug(
-            'Deleted port with this result: {0}'.format(result))
+        self.logger.debug('Deleted port with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         port = self.get()
         self.logger.debug(
-            'Attempting to update this port: {0} with args {1}'.format(
-                port, new_config))
+            'Attempting to update this port: %s with args %s',
+            port, new_config)
         result = self.connection.network.update_port(port, **new_config)
-        self.logger.debug(
-            'Updated port with this result: {0}'.format(result))
+        self.logger.debug('Updated port with this result: %s', result)
         return result
 
+    def create_ports(self, ports, chunk_size=100):
+        """
+        This method will create ports using neutron bulk API, ports are sent
+        in chunks and if one chunk fails then ports on that chunk are created
+        one by one so that the failure is reported per port
+        :param list ports: List of ports config
+        :param int chunk_size: Maximum number of ports sent on each request
+        :return list: List aligned with the ports provided, each item is
+        either the created port or the error raised while trying to create it
+        """
+        return _create_in_bulk(self.logger,
+                               ports,
+                               chunk_size,
+                               self.connection.network.create_ports,
+                               self.connection.network.create_port,
+                               'ports')
+
+
+class OpenstackPortBatch(BatchMixin, OpenstackPort):
+    """
+    Batch of ports requested by node instances of the same node which share
+    the same network and security groups configuration, the ports of the
+    batch are created using neutron bulk API.
+
+    When neutron accepts tags on create, the ports are tagged with a batch
+    tag which is saved before the bulk request is sent, so that a batch
+    resumed after a failure only creates the ports which are not found.
+    """
+    resource_type = 'port_batch'
+
+    # Fields of the created ports which are returned to the members
+    PORT_FIELDS = ('id', 'name', 'fixed_ips', 'mac_address',
+                   'allowed_address_pairs')
+    BATCH_TAG_PREFIX = 'cloudify-port-batch-'
+    TAGS_EXTENSION = 'tag-ports-during-bulk-creation'
+
+    def _supports_create_tags(self):
+        return bool(
+            self.connection.network.find_extension(self.TAGS_EXTENSION))
+
+    def list_batch_ports(self, batch_tag):
+        """
+        :param str batch_tag: Tag added to all the ports of the batch
+        :return dict: Ports of the batch by the index of their member
+        """
+        ports = {}
+        prefix = '{0}-'.format(batch_tag)
+        for port in self.list(query={'tags': batch_tag}):
+            for tag in port.tags or []:
+                if tag.startswith(prefix):
+                    ports[int(tag[len(prefix):])] = port
+        return ports
+
+    def create_batch(self, member_configs, state, checkpoint):
+        created = {}
+        if not state.get('started'):
+            state['started'] = True
+            state['tag'] = None
+            if self._supports_create_tags():
+                state['tag'] = '{0}{1}'.format(self.BATCH_TAG_PREFIX,
+                                               uuid.uuid4().hex)
+            # Saved before the bulk request is sent, so that a retry looks
+            # for the ports created by this attempt
+            checkpoint()
+        elif state['tag']:
+            created = self.list_batch_ports(state['tag'])
+            self.logger.info('Found %s of %s ports of batch %s',
+                             len(created), len(member_configs), self.batch_id)
+        else:
+            self.logger.warning(
+                'Ports of batch %s created by the previous attempt cannot be '
+                'found without tags, creating them again', self.batch_id)
+
+        missing = [index for index in range(len(member_configs))
+                   if index not in created]
+        configs = []
+        for index in missing:
+            config = copy.deepcopy(member_configs[index])
+            if state['tag']:
+                config['tags'] = list(config.get('tags') or []) + [
+                    state['tag'], '{0}-{1}'.format(state['tag'], index)]
+            configs.append(config)
+        created.update(zip(missing,
+                           self.create_ports(configs,
+                                             chunk_size=len(configs) or 1)))
+
+        results = []
+        for index in range(len(member_configs)):
+            port = created[index]
+            if not isinstance(port, Exception):
+                port = {field: port[field] for field in self.PORT_FIELDS}
+            results.append(port)
+        return results
+
 
 class OpenstackRouter(OpenstackResource):
     # SDK documentation link:
@@ -250,8 +372,7 @@ class OpenstackRouter(OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this router: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this router: %s', name_or_id)
 
         try:
             router = self.connection.network.get_router(name_or_id)
@@ -261,58 +382,49 @@ class OpenstackRouter(OpenstackResource):
                     name_or_id,
                     ignore_missing=False
                 )
-        self.logger.debug(
-            'Found router with this result: {0}'.format(router))
+        self.logger.debug('Found router with this result: %s', router)
         return router
 
     def create(self):
         self.logger.debug(
-            'Attempting to create router with these args: {0}'.format(
-                self.config))
+            'Attempting to create router with these args: %s', self.config)
         router = self.connection.network.create_router(**self.config)
-        self.logger.debug(
-            'Created router with this result: {0}'.format(router))
+        self.logger.debug('Created router with this result: %s', router)
         return router
 
     def delete(self):
         router = self.get()
-        self.logger.debug(
-            'Attempting to delete this router: {0}'.format(router))
+        self.logger.debug('Attempting to delete this router: %s', router)
         result = self.connection.network.delete_router(router)
-        self.logger.debug(
-            'Deleted router with this result: {0}'.format(result))
+        self.logger.debug('Deleted router with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         router = self.get()
         self.logger.debug(
-            'Attempting to update this router: {0} with args {1}'.format(
-                router, new_config))
+            'Attempting to update this router: %s with args %s',
+            router, new_config)
         result = self.connection.network.update_router(router, **new_config)
-        self.logger.debug(
-            'Updated router with this result: {0}'.format(result))
+        self.logger.debug('Updated router with this result: %s', result)
         return result
 
     def add_interface(self, kwargs):
         router = self.get()
         self.logger.debug(
-            'Attempting to add {0} interface this router: {1}'.format(
-                kwargs, router))
+            'Attempting to add %s interface this router: %s', kwargs, router)
         result = self.connection.network.add_interface_to_router(
             router, **kwargs)
-        self.logger.debug(
-            'Added this interface to router: {0}'.format(result))
+        self.logger.debug('Added this interface to router: %s', result)
         return result
 
     def remove_interface(self, kwargs):
         router = self.get()
         self.logger.debug(
-            'Attempting to remove {0} interface this router: {1}'.format(
-                kwargs, router))
+            'Attempting to remove %s interface this router: %s',
+            kwargs, router)
         result = self.connection.network.remove_interface_from_router(
             router, **kwargs)
-        self.logger.debug(
-            'Removed this interface to router: {0}'.format(result))
+        self.logger.debug('Removed this interface to router: %s', result)
         return result
 
 
@@ -340,7 +452,7 @@ class OpenstackFloatingIP(OpenstackResource):
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find this floating ip: {0}'.format(name_or_id))
+            'Attempting to find this floating ip: %s', name_or_id)
 
         try:
             floating_ip = self.connection.network.get_ip(name_or_id)
@@ -350,37 +462,251 @@ class OpenstackFloatingIP(OpenstackResource):
                     name_or_id,
                     ignore_missing=False
                 )
-        self.logger.debug(
-            'Found ip with this result: {0}'.format(floating_ip))
+        self.logger.debug('Found ip with this result: %s', floating_ip)
         return floating_ip
 
     def create(self):
         self.logger.debug(
-            'Attempting to create floating ip with these args: {0}'.format(
-                self.config))
+            'Attempting to create floating ip with these args: %s',
+            self.config)
         floating_ip = self.connection.network.create_ip(**self.config)
         self.logger.debug(
-            'Created floating ip with this result: {0}'.format(floating_ip))
+            'Created floating ip with this result: %s', floating_ip)
         return floating_ip
 
     def delete(self):
         floating_ip = self.get()
         self.logger.debug(
-            'Attempting to delete this floating ip: {0}'.format(floating_ip))
+            'Attempting to delete this floating ip: %s', floating_ip)
         self.connection.network.delete_ip(floating_ip)
         return None
 
     def update(self, new_config=None):
         floating_ip = self.get()
         self.logger.debug(
-            'Attempting to update this floating ip: {0} with args {1}'.format(
-                floating_ip, new_config))
+            'Attempting to update this floating ip: %s with args %s',
+            floating_ip, new_config)
         result = self.connection.network.update_ip(floating_ip, **new_config)
-        self.logger.debug(
-            'Updated floating ip with this result: {0}'.format(result))
+        self.logger.debug('Updated floating ip with this result: %s', result)
         return result
 
 
+class OpenstackFloatingIPPool(OpenstackFloatingIP):
+    """
+    Pool of floating ips allocated ahead of time on the same floating
+    network. Floating ips of the pool are tagged with the pool name, and the
+    state of each one is kept in its description, so any agent can claim a
+    floating ip or return it to the pool.
+
+    Claims are a single update of the floating ip which is sent with the
+    revision number of the listed floating ip (compare-and-swap), so when
+    two callers claim the same floating ip only one of them succeeds.
+    Refilling the pool and returning floating ips to it are serialized
+    using the file lock of the pool.
+    """
+    resource_type = 'floating_ip_pool'
+
+    TAG_PREFIX = 'cloudify-floating-ip-pool-'
+    STATE_AVAILABLE = 'cloudify_floating_ip_pool:available'
+    CLAIM_PREFIX = 'cloudify_floating_ip_pool:claimed:'
+    # Fields of the pool configuration which are not sent when floating ips
+    # of the pool are allocated
+    POOL_FIELDS = ('id', 'name', 'description', 'port_id',
+                   'fixed_ip_address', 'floating_ip_address')
+    TAGS_EXTENSION = 'tag-creation'
+
+    @property
+    def pool_tag(self):
+        return '{0}{1}'.format(self.TAG_PREFIX, self.name)
+
+    def _lock(self):
+        return FileState('{0}_{1}'.format(self.resource_type,
+                                          self.name)).lock()
+
+    def _supports_create_tags(self):
+        return bool(
+            self.connection.network.find_extension(self.TAGS_EXTENSION))
+
+    def _allocate(self, description, create_tags, **attrs):
+        config = {key: value for key, value in self.config.items()
+                  if key not in self.POOL_FIELDS and value}
+        config.update(attrs)
+        if create_tags:
+            # The floating ip is tagged by the same request which creates it
+            return self.connection.network.create_ip(
+                description=description, tags=[self.pool_tag], **config)
+
+        floating_ip = self.connection.network.create_ip(
+            description=description, **config)
+        try:
+            self.connection.network.set_tags(floating_ip, [self.pool_tag])
+        except openstack.exceptions.SDKException:
+            # Floating ips which are not tagged are not tracked by the pool
+            self.connection.network.delete_ip(floating_ip)
+            raise
+        return floating_ip
+
+    def _adopt_untagged_ips(self, description):
+        """
+        Tag the floating ips which were allocated with the description of the
+        pool but not tagged, which happens when the allocation stops between
+        the create request and the tags request
+        :param str description: Description of the untagged floating ips
+        :return list: Adopted floating ips
+        """
+        query = {'description': description}
+        if self.config.get('floating_network_id'):
+            query['floating_network_id'] = self.config['floating_network_id']
+        adopted = []
+        for floating_ip in self.list(query):
+            if floating_ip.tags:
+                continue
+            self.connection.network.set_tags(floating_ip, [self.pool_tag])
+            self.logger.info('Adopted untagged floating ip %s by pool %s',
+                             floating_ip.id, self.name)
+            adopted.append(floating_ip)
+        return adopted
+
+    def list_pool_ips(self):
+        """
+        :return list: Floating ips of the pool
+        """
+        query = {'tags': self.pool_tag}
+        if self.config.get('floating_network_id'):
+            query['floating_network_id'] = self.config['floating_network_id']
+        return list(self.list(query))
+
+    def list_available_ips(self):
+        """
+        :return list: Floating ips of the pool which are not claimed
+        """
+        return [floating_ip for floating_ip in self.list_pool_ips()
+                if floating_ip.description == self.STATE_AVAILABLE
+                and not floating_ip.port_id]
+
+    def refill(self, size):
+        """
+        Allocate floating ips until the pool has the requested number of
+        available floating ips
+        :param int size: Number of available floating ips of the pool
+        :return list: Allocated floating ips
+        """
+        with self._lock():
+            create_tags = self._supports_create_tags()
+            if not create_tags:
+                self._adopt_untagged_ips(self.STATE_AVAILABLE)
+            available = self.list_available_ips()
+            allocated = []
+            for _ in range(size - len(available)):
+                allocated.append(
+                    self._allocate(self.STATE_AVAILABLE, create_tags))
+        self.logger.debug('Allocated %s floating ip(s) for pool %s',
+                          len(allocated), self.name)
+        return allocated
+
+    def claim(self, claim_id, port_id=None, fixed_ip_address=None):
+        """
+        Claim an available floating ip of the pool, and associate it with
+        the port in the same update request. Claiming again with the same
+        id returns the floating ip already claimed
+        :param str claim_id: Unique id of the claim
+        :param str port_id: Port associated with the floating ip
+        :param str fixed_ip_address: Fixed ip of the port associated with
+        the floating ip
+        :return: Claimed floating ip or None if the pool is empty
+        """
+        description = '{0}{1}'.format(self.CLAIM_PREFIX, claim_id)
+        available = []
+        for floating_ip in self.list_pool_ips():
+            if floating_ip.description == description:
+                return floating_ip
+            if floating_ip.description == self.STATE_AVAILABLE and \
+                    not floating_ip.port_id:
+                available.append(floating_ip)
+
+        attrs = {'description': description}
+        if port_id:
+            attrs['port_id'] = port_id
+        if fixed_ip_address:
+            attrs['fixed_ip_address'] = fixed_ip_address
+        for floating_ip in sorted(available,
+                                  key=lambda item: item.created_at or ''):
+            try:
+                claimed = self.connection.network.update_ip(
+                    floating_ip,
+                    if_revision=floating_ip.revision_number,
+                    **attrs)
+            except openstack.exceptions.PreconditionFailedException:
+                self.logger.debug(
+                    'Floating ip %s of pool %s was claimed by another caller',
+                    floating_ip.id, self.name)
+                continue
+            self.logger.info('Claimed floating ip %s of pool %s',
+                             claimed.floating_ip_address, self.name)
+            return claimed
+        return None
+
+    def allocate(self, claim_id, port_id=None, fixed_ip_address=None):
+        """
+        Allocate a floating ip of the pool which is already claimed, which is
+        used when the pool is empty
+        :param str claim_id: Unique id of the claim
+        :param str port_id: Port associated with the floating ip
+        :param str fixed_ip_address: Fixed ip of the port associated with
+        the floating ip
+        :return: Allocated floating ip
+        """
+        description = '{0}{1}'.format(self.CLAIM_PREFIX, claim_id)
+        create_tags = self._supports_create_tags()
+        if not create_tags:
+            # The floating ip allocated by a previous attempt of the claim
+            for floating_ip in self._adopt_untagged_ips(description):
+                return floating_ip
+
+        attrs = {}
+        if port_id:
+            attrs['port_id'] = port_id
+        if fixed_ip_address:
+            attrs['fixed_ip_address'] = fixed_ip_address
+        return self._allocate(description, create_tags, **attrs)
+
+    def release(self, floating_ip_id, max_size):
+        """
+        Return a claimed floating ip to the pool, the floating ip is
+        disassociated from its port in the same update request
+        :param str floating_ip_id: Id of the claimed floating ip
+        :param int max_size: Maximum number of available floating ips of the
+        pool
+        :return bool: True if the floating ip is returned to the pool, False
+        if the floating ip must be deleted instead
+        """
+        with self._lock():
+            if len(self.list_available_ips()) >= max_size:
+                return False
+            self.connection.network.update_ip(
+                floating_ip_id, description=self.STATE_AVAILABLE,
+                port_id=None)
+        self.logger.info('Returned floating ip %s to pool %s',
+                         floating_ip_id, self.name)
+        return True
+
+    def delete_available_ips(self):
+        """
+        Delete the available floating ips of the pool, floating ips which are
+        claimed meanwhile are not deleted
+        :return int: Number of deleted floating ips
+        """
+        deleted = 0
+        for floating_ip in self.list_available_ips():
+            try:
+                self.connection.network.delete_ip(
+                    floating_ip, if_revision=floating_ip.revision_number)
+            except openstack.exceptions.PreconditionFailedException:
+                continue
+            deleted += 1
+        return deleted
+
+
 class OpenstackSecurityGroup(OpenstackResource):
     # SDK documentation link:
     # https://bit.ly/2PCsWA0
@@ -405,7 +731,7 @@ class OpenstackSecurityGroup(OpenstackResource):
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find this security group: {0}'.format(name_or_id))
+            'Attempting to find this security group: %s', name_or_id)
         try:
             security_group = \
                 self.connection.network.get_security_group(
@@ -418,40 +744,37 @@ class OpenstackSecurityGroup(OpenstackResource):
                     ignore_missing=False
                 )
         self.logger.debug(
-            'Found security group '
-            'with this result: {0}'.format(security_group))
+            'Found security group with this result: %s', security_group)
         return security_group
 
     def create(self):
         self.logger.debug(
-            'Attempting to create security group with these args: {0}'.format(
-                self.config))
+            'Attempting to create security group with these args: %s',
+            self.config)
         security_group = self.connection.network.create_security_group(
             **self.config)
         self.logger.debug(
-            'Created security group with this result: {0}'.format(
-                security_group))
+            'Created security group with this result: %s', security_group)
         return security_group
 
     def delete(self):
         security_group = self.get()
         self.logger.debug(
-            'Attempting to delete this security_group: {0}'.format(
-                security_group))
+            'Attempting to delete this security_group: %s', security_group)
         result = self.connection.network.delete_security_group(security_group)
         self.logger.debug(
-            'Deleted security group with this result: {0}'.format(result))
+            'Deleted security group with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         security_group = self.get()
-        self.logger.debug('Attempting to update this '
-                          'security group: {0} with args {1}'.format(
-                              security_group, new_config))
+        self.logger.debug(
+            'Attempting to update this security group: %s with args %s',
+            security_group, new_config)
         result = self.connection.network.update_security_group(
             security_group, **new_config)
         self.logger.debug(
-            'Updated security group with this result: {0}'.format(result))
+            'Updated security group with this result: %s', result)
         return result
 
 
@@ -479,8 +802,7 @@ class OpenstackSecurityGroupRule(OpenstackResource):
             name_or_id = self.name if not\
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find '
-            'this security group rule: {0}'.format(name_or_id))
+            'Attempting to find this security group rule: %s', name_or_id)
         try:
             security_group_rule = \
                 self.connection.network.get_security_group_rule(
@@ -493,31 +815,72 @@ class OpenstackSecurityGroupRule(OpenstackResource):
                     ignore_missing=False
                 )
         self.logger.debug(
-            'Found security group rule '
-            'with this result: {0}'.format(security_group_rule))
+            'Found security group rule with this result: %s',
+            security_group_rule)
         return security_group_rule
 
     def create(self):
-        self.logger.debug('Attempting to create security group rule '
-                          'with these args: {0}'.format(self.config))
+        self.logger.debug(
+            'Attempting to create security group rule with these args: %s',
+            self.config)
         security_group_rule = \
             self.connection.network.create_security_group_rule(**self.config)
         self.logger.debug(
-            'Created security group rule with this result: {0}'.format(
-                security_group_rule))
+            'Created security group rule with this result: %s',
+            security_group_rule)
         return security_group_rule
 
     def delete(self):
         security_group_rule = self.get()
         self.logger.debug(
-            'Attempting to delete this security group rule: {0}'.format(
-                security_group_rule))
+            'Attempting to delete this security group rule: %s',
+            security_group_rule)
         result = self.connection.network.delete_security_group_rule(
             security_group_rule)
         self.logger.debug(
-            'Deleted security group with this result: {0}'.format(result))
+            'Deleted security group with this result: %s', result)
         return result
 
+    def create_rules(self, rules, chunk_size=100):
+        """
+        This method will create security group rules using neutron bulk API,
+        rules are sent in chunks and if one chunk fails then rules on that
+        chunk are created one by one so that the failure is reported per rule
+        :param list rules: List of security group rules config
+        :param int chunk_size: Maximum number of rules sent on each request
+        :return list: List aligned with the rules provided, each item is
+        either the created security group rule or the error raised while
+        trying to create it
+        """
+        return _create_in_bulk(
+            self.logger,
+            rules,
+            chunk_size,
+            self.connection.network.create_security_group_rules,
+            self.connection.network.create_security_group_rule,
+            'security group rules')
+
+    def delete_rules(self, rule_ids, max_workers=10):
+        """
+        This method will delete security group rules concurrently
+        :param list rule_ids: List of security group rules ids
+        :param int max_workers: Maximum number of concurrent requests
+        """
+        if not rule_ids:
+            return
+
+        def delete_rule(rule_id):
+            return self.connection.network.delete_security_group_rule(
+                rule_id, ignore_missing=True)
+
+        self.logger.debug(
+            'Attempting to delete these security group rules: %s', rule_ids)
+        with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(rule_ids))) as executor:
+            # Consume the results so that the first error is raised
+            list(executor.map(delete_rule, rule_ids))
+        self.logger.debug('Deleted security group rules: %s', rule_ids)
+
 
 class OpenstackRBACPolicy(ResourceMixin, OpenstackResource):
     # SDK documentation link:
@@ -543,7 +906,7 @@ class OpenstackRBACPolicy(ResourceMixin, OpenstackResource):
                 self.resource_id else self.resource_id
 
         self.logger.debug(
-            'Attempting to find this rbac policy: {0}'.format(name_or_id))
+            'Attempting to find this rbac policy: %s', name_or_id)
         try:
             rbac_policy = \
                 self.connection.network.get_rbac_policy(self.resource_id)
@@ -554,35 +917,33 @@ class OpenstackRBACPolicy(ResourceMixin, OpenstackResource):
             )
 
         self.logger.debug(
-            'Found rbac policy with this result: {0}'.format(rbac_policy))
+            'Found rbac policy with this result: %s', rbac_policy)
         return rbac_policy
 
     def create(self):
-        self.logger.debug('Attempting to create rbac policy '
-                          'with these args: {0}'.format(self.config))
+        self.logger.debug(
+            'Attempting to create rbac policy with these args: %s',
+            self.config)
         rbac_policy = \
             self.connection.network.create_rbac_policy(**self.config)
         self.logger.debug(
-            'Created rbac policy with this result: {0}'.format(rbac_policy))
+            'Created rbac policy with this result: %s', rbac_policy)
         return rbac_policy
 
     def delete(self):
         rbac_policy = self.get()
         self.logger.debug(
-            'Attempting to delete this rbac policy: {0}'.format(
-                rbac_policy))
+            'Attempting to delete this rbac policy: %s', rbac_policy)
         result = self.connection.network.delete_rbac_policy(rbac_policy)
-        self.logger.debug(
-            'Deleted rbac policy with this result: {0}'.format(result))
+        self.logger.debug('Deleted rbac policy with this result: %s', result)
         return result
 
     def update(self, new_config=None):
         rbac_policy = self.get()
         self.logger.debug(
-            'Attempting to update this rbac policy: {0} with args {1}'
-            ''.format(rbac_policy, new_config))
+            'Attempting to update this rbac policy: %s with args %s',
+            rbac_policy, new_config)
         result = self.connection.network.update_rbac_policy(
             rbac_policy, **new_config)
-        self.logger.debug(
-            'Updated rbac policy with this result: {0}'.format(result))
+        self.logger.debug('Updated rbac policy with this result: %s', result)
         return result
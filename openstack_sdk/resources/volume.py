@@ -38,26 +38,21 @@ class OpenstackVolume(ResourceMixin, OpenstackResource):
         if not name_or_id:
             name_or_id = self.name if not \
                 self.resource_id else self.resource_id
-        self.logger.debug(
-            'Attempting to find this volume: {0}'.format(name_or_id))
+        self.logger.debug('Attempting to find this volume: %s', name_or_id)
         volume = self.find_resource(name_or_id)
-        self.logger.debug(
-            'Found volume with this result: {0}'.format(volume))
+        self.logger.debug('Found volume with this result: %s', volume)
         return volume
 
     def create(self):
         self.logger.debug(
-            'Attempting to create volume with these args: {0}'.format(
-                self.config))
+            'Attempting to create volume with these args: %s', self.config)
         volume = self.connection.block_storage.create_volume(**self.config)
-        self.logger.debug(
-            'Created volume with this result: {0}'.format(volume))
+        self.logger.debug('Created volume with this result: %s', volume)
         return volume
 
     def delete(self):
         volume = self.get()
-        self.logger.debug(
-            'Attempting to delete this volume: {0}'.format(volume))
+        self.logger.debug('Attempting to delete this volume: %s', volume)
         self.connection.block_storage.delete_volume(volume)
         return None
 
@@ -81,26 +76,25 @@ class OpenstackVolumeType(ResourceMixin, OpenstackResource):
             name_or_id = self.name if not \
                 self.resource_id else self.resource_id
         self.logger.debug(
-            'Attempting to find this volume type: {0}'
-            ''.format(self.resource_id))
+            'Attempting to find this volume type: %s', self.resource_id)
         volume_type = self.find_resource(name_or_id)
         self.logger.debug(
-            'Found volume type with this result: {0}'.format(volume_type))
+            'Found volume type with this result: %s', volume_type)
         return volume_type
 
     def create(self):
         self.logger.debug(
-            'Attempting to create volume type with these args: {0}'.format(
-                self.config))
+            'Attempting to create volume type with these args: %s',
+            self.config)
         volume_type = self.connection.block_storage.create_type(**self.config)
         self.logger.debug(
-            'Created volume type with this result: {0}'.format(volume_type))
+            'Created volume type with this result: %s', volume_type)
         return volume_type
 
     def delete(self):
         volume_type = self.get()
         self.logger.debug(
-            'Attempting to delete this volume type: {0}'.format(volume_type))
+            'Attempting to delete this volume type: %s', volume_type)
         self.connection.block_storage.delete_type(volume_type)
         return None
 
@@ -112,41 +106,37 @@ class OpenstackVolumeBackup(OpenstackResource):
     def list(self, query=None):
         query = query or {}
         self.logger.debug('Attempting to list backups')
-        result = self.connection.block_storage.backups(query)
+        result = self.connection.block_storage.backups(**query)
         return result
 
     def get(self):
         self.logger.debug(
-            'Attempting to find this backup: {0}'.format(self.resource_id))
+            'Attempting to find this backup: %s', self.resource_id)
         backup = self.connection.block_storage.get_backup(self.resource_id)
-        self.logger.debug(
-            'Found backup with this result: {0}'.format(backup))
+        self.logger.debug('Found backup with this result: %s', backup)
         return backup
 
     def create(self):
         self.logger.debug(
-            'Attempting to create backup with these args: {0}'.format(
-                self.config))
+            'Attempting to create backup with these args: %s', self.config)
         volume = self.connection.block_storage.create_backup(**self.config)
-        self.logger.debug(
-            'Created backup with this result: {0}'.format(volume))
+        self.logger.debug('Created backup with this result: %s', volume)
         return volume
 
     def restore(self, backup_id, volume_id, name):
         self.logger.debug(
-            'Attempting to restore backup this volume: {0}'.format(volume_id))
+            'Attempting to restore backup this volume: %s', volume_id)
         result = \
             self.connection.block_storage.restore_backup(backup_id,
                                                          volume_id,
                                                          name)
         self.logger.debug(
-            'Restored backup volume with this result: {0}'.format(result))
+            'Restored backup volume with this result: %s', result)
         return result
 
     def delete(self):
         volume = self.get()
-        self.logger.debug(
-            'Attempting to delete this backup: {0}'.format(volume))
+        self.logger.debug('Attempting to delete this backup: %s', volume)
         self.connection.block_storage.delete_backup(volume)
         return None
 
@@ -158,28 +148,24 @@ class OpenstackVolumeSnapshot(OpenstackResource):
     def list(self, query=None):
         query = query or {}
         self.logger.debug('Attempting to list snapshots')
-        result = self.connection.block_storage.snapshots(query)
+        result = self.connection.block_storage.snapshots(**query)
         return result
 
     def get(self):
         self.logger.debug(
-            'Attempting to find this snapshot: {0}'.format(self.resource_id))
+            'Attempting to find this snapshot: %s', self.resource_id)
         snapshot = self.connection.block_storage.get_snapshot(self.resource_id)
-        self.logger.debug(
-            'Found snapshot with this result: {0}'.format(snapshot))
+        self.logger.debug('Found snapshot with this result: %s', snapshot)
         return snapshot
 
     def create(self):
         self.logger.debug(
-            'Attempting to create snapshot with these args: {0}'.format(
-                self.config))
+            'Attempting to create snapshot with these args: %s', self.config)
         snapshot = self.connection.block_storage.create_snapshot(**self.config)
-        self.logger.debug(
-            'Created snapshot with this result: {0}'.format(snapshot))
+        self.logger.debug('Created snapshot with this result: %s', snapshot)
         return snapshot
 
     def delete(self):
         snapshot = self.get()
-        self.logger.debug(
-            'Attempting to delete this snapshot: {0}'.format(snapshot))
+        self.logger.debug('Attempting to delete this snapshot: %s', snapshot)
         self.connection.block_storage.delete_snapshot(snapshot)
@@ -0,0 +1,56 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Helpers used to hook into the keystoneauth session used by openstacksdk.
+# Every HTTP request issued by the SDK proxies (compute, network, ...etc)
+# goes through "session.request", so hooking there allows to act on all
+# the requests for any openstack service without touching the SDK itself.
+
+# Standard imports
+from urllib.parse import urlparse
+
+
+def wrap_session_request(session, handler):
+    """
+    This method will chain a handler in front of the "request" method of
+    keystoneauth session, the handler is called with the original request
+    method followed by the same arguments passed to "session.request"
+    :param session: Instance of keystoneauth1.session.Session
+    :param handler: Callable with the following signature
+    handler(request, url, method, **kwargs)
+    """
+    request = session.request
+
+    def wrapped_request(url, method, **kwargs):
+        return handler(request, url, method, **kwargs)
+
+    session.request = wrapped_request
+
+
+def get_service_type(url, kwargs):
+    """
+    This method will lookup the service type for request sent by keystoneauth
+    session, requests sent by the SDK proxies always contain "endpoint_filter"
+    while requests sent directly (i.e. authentication) contain absolute url
+    :param str url: Request url
+    :param dict kwargs: Request kwargs passed to "session.request"
+    :return str: Service type or the host of the url
+    """
+    endpoint_filter = kwargs.get('endpoint_filter') or {}
+    service_type = \
+        endpoint_filter.get('service_type') or kwargs.get('service_type')
+    if service_type:
+        return service_type
+    return urlparse(url).netloc or 'unknown'
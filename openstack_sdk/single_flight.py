@@ -0,0 +1,198 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import json
+import time
+import hashlib
+import threading
+
+# Local imports
+from openstack_sdk.session_hooks import (wrap_session_request,
+                                         get_service_type)
+
+SINGLE_FLIGHT_CONFIG = 'single_flight'
+
+DEFAULT_SINGLE_FLIGHT_CONFIG = {
+    # Concurrent identical read requests are not shared unless it is
+    # enabled explicitly
+    'enabled': False,
+    # Number of seconds to keep successful responses, 0 means the response
+    # is only shared with requests that are in flight at the same time
+    'ttl': 0,
+}
+
+# Only read requests are safe to be shared between callers
+SINGLE_FLIGHT_METHODS = ('GET', 'HEAD')
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Make sure that only one call is executed for the same key at the same
+    time. Callers that ask for a key which is already in flight wait for
+    that call and share its result (or its error). Results can optionally
+    be kept for a short time so that later callers reuse them as well.
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = {}
+
+    def _get_cached(self, key, now):
+        cached = self._results.get(key)
+        if cached and cached[0] > now:
+            return cached
+        self._results.pop(key, None)
+        return None
+
+    def _store(self, key, result, ttl, now):
+        for cached_key, cached in list(self._results.items()):
+            if cached[0] <= now:
+                del self._results[cached_key]
+        self._results[key] = (now + ttl, result)
+
+    def do(self, key, func, ttl=0, cacheable=None):
+        """
+        Execute "func" once for all concurrent callers of the same key
+        :param key: Hashable key which identifies the call
+        :param func: Callable without arguments to execute
+        :param ttl: Number of seconds to keep the result
+        :param cacheable: Optional callable which decides if the result can
+        be kept for "ttl" seconds
+        :return: The result of "func"
+        """
+        with self._lock:
+            cached = self._get_cached(key, self.clock())
+            if cached:
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if ttl and call.error is None \
+                        and (cacheable is None or cacheable(call.result)):
+                    self._store(key, call.result, ttl, self.clock())
+            call.event.set()
+        return call.result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight_config(client_config):
+    """
+    This method will return single flight configuration merged with the
+    default configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: Single flight configuration
+    """
+    config = dict(DEFAULT_SINGLE_FLIGHT_CONFIG)
+    config.update(client_config.get(SINGLE_FLIGHT_CONFIG) or {})
+    return config
+
+
+def get_credentials_key(connection_config):
+    """
+    Requests sent with different credentials may return different results,
+    so they must never be shared. This will generate a digest that
+    identifies the credentials without keeping any of them in memory
+    :param dict connection_config: Config used to create the connection
+    :return str: Digest for the connection config
+    """
+    serialized = json.dumps(connection_config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def get_request_key(credentials_key, url, method, kwargs):
+    """
+    Generate the key for request which contains the endpoint, path and query
+    :param str credentials_key: Digest generated from the connection config
+    :param str url: Request url
+    :param str method: Request method
+    :param dict kwargs: Request kwargs passed to "session.request"
+    :return tuple: Request key
+    """
+    request_options = json.dumps({
+        'endpoint_filter': kwargs.get('endpoint_filter'),
+        'endpoint_override': kwargs.get('endpoint_override'),
+        'params': kwargs.get('params'),
+        'headers': kwargs.get('headers'),
+        'microversion': kwargs.get('microversion'),
+    }, sort_keys=True, default=str)
+    return (credentials_key,
+            get_service_type(url, kwargs),
+            method.upper(),
+            url,
+            request_options)
+
+
+def install_single_flight(connection, client_config, connection_config):
+    """
+    This method will install single flight on keystoneauth session used by
+    the openstack connection when it is enabled on client configuration, so
+    concurrent identical read requests share one HTTP call
+    :param connection: Instance of openstack.connection.Connection
+    :param dict client_config: Openstack client configuration
+    :param dict connection_config: Config used to create the connection
+    """
+    config = get_single_flight_config(client_config)
+    if not config['enabled']:
+        return
+
+    credentials_key = get_credentials_key(connection_config)
+
+    def cacheable(response):
+        return response.status_code < 400
+
+    def handler(request, url, method, **kwargs):
+        if method.upper() not in SINGLE_FLIGHT_METHODS \
+                or kwargs.get('stream'):
+            return request(url, method, **kwargs)
+
+        return _single_flight.do(
+            get_request_key(credentials_key, url, method, kwargs),
+            lambda: request(url, method, **kwargs),
+            ttl=config['ttl'],
+            cacheable=cacheable)
+
+    wrap_session_request(connection.session, handler)
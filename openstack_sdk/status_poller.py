@@ -0,0 +1,132 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import time
+
+# Local imports
+from openstack_sdk.file_state import FileState, file_lock_supported
+from openstack_sdk.single_flight import get_credentials_key
+
+STATUS_POLLER_CONFIG = 'status_poller'
+
+DEFAULT_STATUS_POLLER_CONFIG = {
+    # Statuses are fetched by each operation unless it is enabled explicitly
+    'enabled': False,
+    # Number of seconds between two list requests of the same project
+    'interval': 10,
+}
+
+# Resource types which can be polled, nova returns only the servers changed
+# since the last poll, while all the volumes are listed on each poll
+POLLED_RESOURCE_TYPES = ('server', 'volume')
+CHANGES_SINCE_RESOURCE_TYPES = ('server',)
+
+# Number of seconds subtracted from "changes-since" filter in order to
+# tolerate clock skew between the agent and nova
+CHANGES_SINCE_MARGIN = 60
+
+
+def get_status_poller_config(client_config):
+    """
+    This method will return status poller configuration merged with the
+    default configuration
+    :param dict client_config: Openstack client configuration
+    :return dict: Status poller configuration
+    """
+    config = dict(DEFAULT_STATUS_POLLER_CONFIG)
+    config.update(client_config.get(STATUS_POLLER_CONFIG) or {})
+    return config
+
+
+class StatusPoller(object):
+    """
+    Poll the statuses of all the resources of the same type in a project
+    using one list request per interval, instead of one request per resource.
+    The statuses are kept in a file cache shared by the operations running on
+    the same agent (see FileState), so only the first operation which reads
+    the cache once the interval is elapsed sends the request.
+    """
+    def __init__(self, resource, interval, clock=time.time):
+        """
+        :param resource: Instance of the openstack resource used in order to
+        list the resources of the project
+        :param int interval: Number of seconds between two list requests
+        :param clock: Callable which returns the current time
+        """
+        self.resource = resource
+        self.interval = interval
+        self.clock = clock
+        self.key = get_credentials_key(resource.connection_config)
+
+        self.state = FileState(
+            'status_{0}_{1}'.format(resource.resource_type, self.key),
+            default={'polled_at': None, 'statuses': {}})
+
+    def _poll(self, cache, now):
+        query = {}
+        incremental = cache['polled_at'] and \
+            self.resource.resource_type in CHANGES_SINCE_RESOURCE_TYPES
+        if incremental:
+            query['changes_since'] = time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ',
+                time.gmtime(cache['polled_at'] - CHANGES_SINCE_MARGIN))
+        else:
+            cache['statuses'] = {}
+
+        self.resource.logger.debug(
+            'Polling statuses of %ss with query %s',
+            self.resource.resource_type, query)
+        for item in self.resource.list(query=query):
+            cache['statuses'][item.id] = item.status
+        cache['polled_at'] = now
+
+    def get_status(self, resource_id):
+        """
+        Return the status of the resource from the cache, the cache is
+        refreshed first if the interval is elapsed since the last poll
+        :param str resource_id: Id of the resource
+        :return str: Status of the resource, None if the resource is not
+        listed by the last poll
+        """
+        with self.state.lock():
+            cache = self.state.load()
+            now = self.clock()
+            if not cache['polled_at'] or \
+                    now - cache['polled_at'] >= self.interval:
+                self._poll(cache, now)
+                self.state.save(cache)
+        return cache['statuses'].get(resource_id)
+
+
+def get_polled_status(resource, clock=time.time):
+    """
+    This method will return the status of the resource reported by the
+    status poller of its project, when it is enabled on client configuration
+    :param resource: Instance of the openstack resource
+    :param clock: Callable which returns the current time
+    :return str: Status of the resource, None if the status poller is not
+    enabled or the status of the resource is not known
+    """
+    config = get_status_poller_config(resource.client_config)
+    if not (config['enabled'] and resource.resource_id) or \
+            resource.resource_type not in POLLED_RESOURCE_TYPES:
+        return None
+    if not file_lock_supported():
+        resource.logger.warning('Status poller is not available without '
+                                'file locks, fetching status directly')
+        return None
+    poller = StatusPoller(resource, config['interval'], clock=clock)
+    return poller.get_status(resource.resource_id)
@@ -20,6 +20,7 @@ import mock
 import openstack.compute.v2.server
 import openstack.compute.v2.volume_attachment
 import openstack.compute.v2.server_interface
+import openstack.exceptions
 
 # Local imports
 from openstack_sdk.tests import base
@@ -339,6 +340,9 @@ class ServerTestCase(base.OpenStackSDKTestBase):
 
         response = self.server_instance.rebuild('12323')
         self.assertIsNone(response)
+        _, kwargs = self.fake_client.rebuild_server.call_args
+        self.assertEqual(kwargs['image'], '12323')
+        self.assertEqual(kwargs['admin_password'], '')
 
     def test_create_image(self):
         server = openstack.compute.v2.server.Server(**{
@@ -755,3 +759,150 @@ class ServerTestCase(base.OpenStackSDKTestBase):
         response = self.server_instance.remove_floating_ip_from_server(
             'a34b5509-d122-4d2f-823e-884bb559afe2')
         self.assertIsNone(response)
+
+    def test_set_server_metadata(self):
+        self.server_instance.resource_id = \
+            'a34b5509-d122-4d2f-823e-884bb559afe8'
+        self.fake_client.set_server_metadata = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(
+                id='a34b5509-d122-4d2f-823e-884bb559afe8',
+                metadata={'k': 'v'}))
+
+        response = self.server_instance.set_metadata({'k': 'v'})
+        self.assertEqual(response, {'k': 'v'})
+        self.fake_client.set_server_metadata.assert_called_once_with(
+            'a34b5509-d122-4d2f-823e-884bb559afe8', k='v')
+
+    def test_get_server_metadata(self):
+        self.server_instance.resource_id = \
+            'a34b5509-d122-4d2f-823e-884bb559afe8'
+        self.fake_client.get_server_metadata = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(
+                id='a34b5509-d122-4d2f-823e-884bb559afe8',
+                metadata={'k': 'v'}))
+
+        response = self.server_instance.get_metadata()
+        self.assertEqual(response, {'k': 'v'})
+
+    def test_delete_server_metadata(self):
+        self.server_instance.resource_id = \
+            'a34b5509-d122-4d2f-823e-884bb559afe8'
+        self.fake_client.delete_server_metadata = \
+            mock.MagicMock(return_value=None)
+
+        response = self.server_instance.delete_metadata(['k'])
+        self.assertIsNone(response)
+        self.fake_client.delete_server_metadata.assert_called_once_with(
+            'a34b5509-d122-4d2f-823e-884bb559afe8', ['k'])
+
+    def test_create_server_batch(self):
+        server_batch = compute.OpenstackServerBatch(
+            client_config=self.client_config,
+            resource_config={'name': 'test-server',
+                             'image_id': '1',
+                             'flavor_id': '2'},
+            logger=mock.MagicMock())
+        server_batch.connection = self.connection
+        servers = []
+
+        def create_server(**config):
+            self.assertEqual(config['min_count'], 3)
+            self.assertEqual(config['max_count'], 3)
+            # Servers are listed in a different order than their index
+            for index in (2, 3, 1):
+                servers.append(openstack.compute.v2.server.Server(
+                    id=str(index),
+                    name='test-server-{0}'.format(index),
+                    status='BUILD',
+                    metadata=config['metadata'],
+                    reservation_id='r-1'))
+            return openstack.compute.v2.server.Server(id='1')
+
+        self.fake_client.create_server = \
+            mock.MagicMock(side_effect=create_server)
+        self.fake_client.find_server = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(
+                id='1', reservation_id='r-1'))
+        self.fake_client.servers = \
+            mock.MagicMock(side_effect=lambda *_, **__: iter(servers))
+
+        response = server_batch.create_batch([None, None, None], {},
+                                             mock.MagicMock())
+        self.assertEqual([server['id'] for server in response],
+                         ['1', '2', '3'])
+        self.assertEqual(response[0]['name'], 'test-server-1')
+        self.assertEqual(
+            self.fake_client.servers.call_args[1], {'reservation_id': 'r-1'})
+
+    def test_create_server_batch_failed(self):
+        server_batch = compute.OpenstackServerBatch(
+            client_config=self.client_config,
+            resource_config={'name': 'test-server'},
+            logger=mock.MagicMock())
+        server_batch.connection = self.connection
+        error = openstack.exceptions.BadRequestException(
+            message='Quota exceeded')
+        self.fake_client.create_server = mock.MagicMock(side_effect=error)
+
+        response = server_batch.create_batch([None, None], {},
+                                             mock.MagicMock())
+        self.assertEqual(response, [error, error])
+
+    def test_resume_server_batch(self):
+        server_batch = compute.OpenstackServerBatch(
+            client_config=self.client_config,
+            resource_config={'name': 'test-server'},
+            logger=mock.MagicMock())
+        server_batch.connection = self.connection
+        self.fake_client.create_server = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(id='1'))
+        self.fake_client.find_server = mock.MagicMock(
+            side_effect=openstack.exceptions.HttpException(
+                message='Service unavailable'))
+        state = {}
+        checkpoint = mock.MagicMock()
+
+        # The request is saved before its servers are listed
+        self.assertIsNone(
+            server_batch.create_batch([None, None], state, checkpoint))
+        checkpoint.assert_called_once_with()
+        self.assertEqual(state['server_id'], '1')
+
+        self.fake_client.find_server = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(
+                id='1', reservation_id='r-1'))
+        self.fake_client.servers = mock.MagicMock(return_value=iter([
+            openstack.compute.v2.server.Server(
+                id=str(index),
+                name='test-server-{0}'.format(index),
+                metadata={server_batch.BATCH_METADATA: state['token']})
+            for index in (1, 2)]))
+        response = server_batch.create_batch([None, None], state, checkpoint)
+        self.assertEqual([server['id'] for server in response], ['1', '2'])
+        self.fake_client.create_server.assert_called_once()
+
+    def test_server_batch_not_found(self):
+        server_batch = compute.OpenstackServerBatch(
+            client_config=self.client_config,
+            resource_config={'name': 'test-server'},
+            logger=mock.MagicMock())
+        server_batch.connection = self.connection
+        self.fake_client.find_server = mock.MagicMock(
+            return_value=openstack.compute.v2.server.Server(
+                id='1', reservation_id='r-1'))
+        self.fake_client.servers = mock.MagicMock(return_value=iter([
+            openstack.compute.v2.server.Server(
+                id='1',
+                name='test-server-1',
+                metadata={server_batch.BATCH_METADATA: 'token'})]))
+        self.fake_client.delete_server = mock.MagicMock(return_value=None)
+        state = {'token': 'token', 'server_id': '1', 'created_at': 0}
+
+        # The servers found are deleted once the batch is given up
+        response = server_batch.create_batch([None, None], state,
+                                             mock.MagicMock())
+        self.assertEqual(len(response), 2)
+        for error in response:
+            self.assertIsInstance(
+                error, openstack.exceptions.ResourceNotFound)
+        self.fake_client.delete_server.assert_called_once_with('1')
@@ -0,0 +1,163 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import logging
+import unittest
+
+# Third party imports
+import mock
+
+# Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.file_state import FileLockUnavailableException
+from openstack_sdk.resources.networks import (OpenstackNetwork,
+                                              OpenstackFloatingIPPool)
+
+
+class FloatingIPPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(FloatingIPPoolTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer().start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.logger = logging.getLogger('test_floating_ip_pool')
+        network = OpenstackNetwork(
+            client_config=self.fake_openstack.client_config,
+            resource_config={'name': 'external'},
+            logger=self.logger).create()
+        self.network_id = network.id
+        self.pool = self._pool(network.id)
+
+    def _pool(self, floating_network_id):
+        return OpenstackFloatingIPPool(
+            client_config=self.fake_openstack.client_config,
+            resource_config={'name': 'test-pool',
+                             'floating_network_id': floating_network_id},
+            logger=self.logger)
+
+    def test_refill(self):
+        allocated = self.pool.refill(2)
+        self.assertEqual(len(allocated), 2)
+        self.assertEqual(self.pool.refill(2), [])
+
+        available = self.pool.list_available_ips()
+        self.assertEqual(len(available), 2)
+        for floating_ip in available:
+            self.assertEqual(floating_ip.tags,
+                             ['cloudify-floating-ip-pool-test-pool'])
+
+    def test_refill_with_create_tags(self):
+        self.fake_openstack.add_resource('network', 'extensions', {
+            'alias': OpenstackFloatingIPPool.TAGS_EXTENSION,
+            'name': 'Tag creation extension'})
+        self.fake_openstack.reset_requests()
+
+        self.assertEqual(len(self.pool.refill(2)), 2)
+        # Floating ips are tagged by the create requests
+        self.assertEqual(
+            self.fake_openstack.count_requests('PUT', '/tags'), 0)
+        for floating_ip in self.pool.list_available_ips():
+            self.assertEqual(floating_ip.tags,
+                             ['cloudify-floating-ip-pool-test-pool'])
+
+    def test_refill_adopt_untagged_ips(self):
+        # Allocation stopped before the floating ip is tagged
+        untagged = self.fake_openstack.add_resource(
+            'network', 'floatingips', {
+                'floating_network_id': self.network_id,
+                'description': OpenstackFloatingIPPool.STATE_AVAILABLE})
+
+        self.assertEqual(len(self.pool.refill(2)), 1)
+        available = self.pool.list_available_ips()
+        self.assertEqual(len(available), 2)
+        self.assertIn(untagged['id'],
+                      [floating_ip.id for floating_ip in available])
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    def test_refill_without_file_locks(self):
+        self.assertRaises(FileLockUnavailableException, self.pool.refill, 1)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/floatingips'), 0)
+
+    def test_claim(self):
+        self.pool.refill(1)
+        self.fake_openstack.reset_requests()
+
+        claimed = self.pool.claim('claim-1', port_id='port-1')
+        self.assertEqual(claimed.port_id, 'port-1')
+        self.assertEqual(claimed.description,
+                         OpenstackFloatingIPPool.CLAIM_PREFIX + 'claim-1')
+        # One list request and one update request
+        self.assertEqual(
+            self.fake_openstack.count_requests('PUT'), 1)
+
+        self.assertEqual(self.pool.claim('claim-1').id, claimed.id)
+        self.assertIsNone(self.pool.claim('claim-2'))
+
+    def test_concurrent_claim(self):
+        self.pool.refill(2)
+        listed = self.pool.list_pool_ips()
+        first = self.pool.claim('claim-1')
+
+        # The second caller listed the floating ips before the first claim,
+        # so the update of the same floating ip fails and the next one is
+        # claimed instead
+        with mock.patch.object(self.pool, 'list_pool_ips',
+                               return_value=listed):
+            second = self.pool.claim('claim-2')
+        self.assertNotEqual(first.id, second.id)
+        floating_ip = self.fake_openstack.get_resource(
+            'network', 'floatingips', first.id)
+        self.assertEqual(floating_ip['description'],
+                         OpenstackFloatingIPPool.CLAIM_PREFIX + 'claim-1')
+
+    def test_release(self):
+        self.pool.refill(1)
+        claimed = self.pool.claim('claim-1', port_id='port-1')
+
+        self.assertTrue(self.pool.release(claimed.id, max_size=1))
+        floating_ip = self.fake_openstack.get_resource(
+            'network', 'floatingips', claimed.id)
+        self.assertIsNone(floating_ip['port_id'])
+        self.assertEqual(floating_ip['description'],
+                         OpenstackFloatingIPPool.STATE_AVAILABLE)
+
+        # The pool is full
+        claimed = self.pool.allocate('claim-2')
+        self.assertFalse(self.pool.release(claimed.id, max_size=1))
+
+        self.assertEqual(self.pool.delete_available_ips(), 1)
+        self.assertEqual(self.pool.list_available_ips(), [])
+
+    def test_allocate_adopt_untagged_ip(self):
+        description = OpenstackFloatingIPPool.CLAIM_PREFIX + 'claim-1'
+        untagged = self.fake_openstack.add_resource(
+            'network', 'floatingips', {
+                'floating_network_id': self.network_id,
+                'description': description})
+        self.fake_openstack.reset_requests()
+
+        allocated = self.pool.allocate('claim-1', port_id='port-1')
+        self.assertEqual(allocated.id, untagged['id'])
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/floatingips'), 0)
+        self.assertEqual(self.pool.claim('claim-1').id, untagged['id'])
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    def test_release_without_file_locks(self):
+        self.assertRaises(FileLockUnavailableException,
+                          self.pool.release, 'floating-ip-1', 1)
+        self.assertEqual(self.fake_openstack.count_requests('PUT'), 0)
@@ -18,6 +18,7 @@ import mock
 
 # Third party imports
 import openstack.network.v2.port
+from openstack import exceptions
 
 # Local imports
 from openstack_sdk.tests import base
@@ -297,3 +298,36 @@ class PortTestCase(base.OpenStackSDKTestBase):
 
         response = self.port_instance.delete()
         self.assertIsNone(response)
+
+    def test_create_ports_in_chunks(self):
+        ports = [{'name': 'test_port_{0}'.format(index),
+                  'network_id': '18'} for index in range(5)]
+
+        def create_ports(chunk):
+            return iter([
+                openstack.network.v2.port.Port(id=port['name'], **port)
+                for port in chunk])
+
+        self.fake_client.create_ports = \
+            mock.MagicMock(side_effect=create_ports)
+
+        response = self.port_instance.create_ports(ports, chunk_size=2)
+        self.assertEqual(self.fake_client.create_ports.call_count, 3)
+        self.assertEqual([port.id for port in response],
+                         ['test_port_{0}'.format(index)
+                          for index in range(5)])
+
+    def test_create_ports_report_failed_ports(self):
+        ports = [{'name': 'test_port_1', 'network_id': '18'},
+                 {'name': 'test_port_2', 'network_id': '18'}]
+        error = exceptions.BadRequestException(message='Invalid port')
+        new_port = openstack.network.v2.port.Port(
+            id='a95b5509-c122-4c2f-823e-884bb559afe8', **ports[0])
+
+        self.fake_client.create_ports = \
+            mock.MagicMock(side_effect=exceptions.BadRequestException())
+        self.fake_client.create_port = \
+            mock.MagicMock(side_effect=[new_port, error])
+
+        response = self.port_instance.create_ports(ports)
+        self.assertEqual(response, [new_port, error])
@@ -18,6 +18,7 @@ import mock
 
 # Third party imports
 import openstack.network.v2.security_group_rule
+from openstack import exceptions
 
 # Local imports
 from openstack_sdk.tests import base
@@ -149,3 +150,51 @@ class SecurityGroupRuleTestCase(base.OpenStackSDKTestBase):
 
         response = self.security_group_rule_instance.delete()
         self.assertIsNone(response)
+
+    def test_create_rules_in_chunks(self):
+        rules = [{'direction': 'ingress',
+                  'port_range_min': port,
+                  'port_range_max': port,
+                  'protocol': 'tcp',
+                  'security_group_id': '10'} for port in range(5)]
+
+        def create_rules(chunk):
+            return iter([
+                openstack.network.v2.security_group_rule.SecurityGroupRule(
+                    id=str(rule['port_range_min']), **rule)
+                for rule in chunk])
+
+        self.fake_client.create_security_group_rules = \
+            mock.MagicMock(side_effect=create_rules)
+
+        response = self.security_group_rule_instance.create_rules(
+            rules, chunk_size=2)
+        self.assertEqual(
+            self.fake_client.create_security_group_rules.call_count, 3)
+        self.assertEqual([rule.id for rule in response],
+                         ['0', '1', '2', '3', '4'])
+
+    def test_create_rules_report_failed_rules(self):
+        rules = [{'direction': 'ingress', 'security_group_id': '10'},
+                 {'direction': 'egress', 'security_group_id': '10'}]
+        error = exceptions.BadRequestException(message='Invalid rule')
+        new_rule = openstack.network.v2.security_group_rule.SecurityGroupRule(
+            id='a95b5509-c122-4c2f-823e-884bb559afe8', **rules[0])
+
+        self.fake_client.create_security_group_rules = \
+            mock.MagicMock(side_effect=exceptions.BadRequestException())
+        self.fake_client.create_security_group_rule = \
+            mock.MagicMock(side_effect=[new_rule, error])
+
+        response = self.security_group_rule_instance.create_rules(rules)
+        self.assertEqual(response, [new_rule, error])
+
+    def test_delete_rules(self):
+        self.fake_client.delete_security_group_rule = \
+            mock.MagicMock(return_value=None)
+
+        self.security_group_rule_instance.delete_rules(['1', '2', '3'])
+        self.assertEqual(
+            self.fake_client.delete_security_group_rule.call_count, 3)
+        self.fake_client.delete_security_group_rule.assert_any_call(
+            '2', ignore_missing=True)
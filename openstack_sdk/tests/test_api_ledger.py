@@ -0,0 +1,107 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import mock
+
+# Third party imports
+from keystoneauth1 import exceptions as ks_exceptions
+
+# Local imports
+from openstack_sdk import api_ledger
+
+
+class ApiLedgerTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        api_ledger.stop_api_call_ledger()
+        super(ApiLedgerTestCase, self).tearDown()
+
+    def test_templated_path(self):
+        self.assertEqual(
+            api_ledger.get_templated_path(
+                'https://compute:8774/v2.1/servers/'
+                'a95b5509-c122-4c2f-823e-884bb559afe8/action?force=1'),
+            '/v2.1/servers/{id}/action')
+        self.assertEqual(
+            api_ledger.get_templated_path('/os-hypervisors/12/servers'),
+            '/os-hypervisors/{id}/servers')
+        self.assertEqual(api_ledger.get_templated_path('/networks'),
+                         '/networks')
+
+    def test_install_api_ledger(self):
+        def request(url, method, **kwargs):
+            if url.startswith('/volumes'):
+                raise ks_exceptions.NotFound(http_status=404)
+            return mock.MagicMock(status_code=200,
+                                  headers={'Content-Length': '10'})
+
+        connection = mock.MagicMock()
+        connection.session.request = request
+        api_ledger.install_api_ledger(connection)
+
+        # Requests are not recorded unless a ledger is started
+        connection.session.request(
+            '/servers', 'GET', endpoint_filter={'service_type': 'compute'})
+
+        ledger = api_ledger.start_api_call_ledger('create')
+        for server_id in ('a95b5509-c122-4c2f-823e-884bb559afe8',
+                          'a95b5509-c122-4c2f-823e-884bb559afe9'):
+            connection.session.request(
+                '/servers/{0}'.format(server_id), 'get',
+                endpoint_filter={'service_type': 'compute'})
+        self.assertRaises(ks_exceptions.NotFound,
+                          connection.session.request,
+                          '/volumes/1', 'GET',
+                          endpoint_filter={'service_type': 'volume'})
+        self.assertEqual(api_ledger.stop_api_call_ledger(), ledger)
+
+        self.assertEqual(
+            [(call.service, call.method, call.path, call.status, call.size)
+             for call in ledger.calls],
+            [('compute', 'GET', '/servers/{id}', 200, 10),
+             ('compute', 'GET', '/servers/{id}', 200, 10),
+             ('volume', 'GET', '/volumes/{id}', 404, 0)])
+        summary = ledger.summary()
+        self.assertEqual(summary['compute']['calls'], 2)
+        self.assertEqual(summary['compute']['errors'], 0)
+        self.assertEqual(summary['compute']['bytes'], 20)
+        self.assertEqual(summary['volume']['errors'], 1)
+
+    def test_summary(self):
+        ledger = api_ledger.ApiCallLedger('create')
+        for latency in range(1, 21):
+            ledger.record(api_ledger.ApiCall(
+                'network', 'GET', '/v2.0/ports', 200, latency / 10.0, 0))
+        self.assertEqual(ledger.summary()['network']['p95_latency'], 1.9)
+        self.assertEqual(ledger.summary()['network']['total_latency'], 21)
+        self.assertEqual(ledger.format_summary(),
+                         'network: 20 calls, total 21.000s, p95 1.900s')
+
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        metrics_file = os.path.join(metrics_dir, 'metrics.jsonl')
+        for _ in range(2):
+            ledger.write_metrics(metrics_file, operation='create')
+        with open(metrics_file) as metrics_input:
+            lines = [json.loads(line) for line in metrics_input]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]['operation'], 'create')
+        self.assertEqual(lines[0]['services']['network']['calls'], 20)
@@ -0,0 +1,115 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import shutil
+import logging
+import tempfile
+import unittest
+
+# Third party imports
+import mock
+import openstack.exceptions
+
+# Local imports
+from openstack_sdk import cassette
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.networks import OpenstackNetwork
+
+
+class CassetteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(CassetteTestCase, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'cassette.jsonl.gz')
+        self.logger = logging.getLogger('test_cassette')
+
+    def tearDown(self):
+        cassette._recorders.clear()
+        cassette._players.clear()
+        super(CassetteTestCase, self).tearDown()
+
+    def _network(self, client_config, mode, resource_config=None, **config):
+        client_config = dict(client_config)
+        client_config['cassette'] = dict(config, mode=mode, path=self.path)
+        return OpenstackNetwork(client_config=client_config,
+                                resource_config=resource_config,
+                                logger=self.logger)
+
+    def _record(self):
+        with FakeOpenstackServer() as fake_openstack:
+            client_config = fake_openstack.client_config
+            network = self._network(client_config, cassette.RECORD_MODE,
+                                    {'name': 'test-network'})
+            network.resource_id = network.create().id
+            network.get()
+            network.delete()
+            self.assertRaises(openstack.exceptions.ResourceNotFound,
+                              network.get)
+            cassette.flush_cassettes()
+            return client_config, network.resource_id, \
+                fake_openstack.count_requests()
+
+    def test_record_sanitized(self):
+        self._record()
+        interactions = cassette.load_cassette(self.path)
+        auth = [interaction for interaction in interactions
+                if interaction['key'].endswith('/auth/tokens')]
+        self.assertEqual(len(auth), 1)
+        self.assertEqual(auth[0]['headers']['X-Subject-Token'], '***')
+        self.assertEqual(
+            auth[0]['request']['auth']['identity']['password']['user'][
+                'password'], '***')
+        self.assertIn('network POST /networks',
+                      [interaction['key'] for interaction in interactions])
+
+    def test_replay(self):
+        client_config, network_id, requests_count = self._record()
+        sleep = mock.MagicMock()
+        # The fake server is stopped, so every response is replayed
+        with mock.patch('openstack_sdk.cassette.time.sleep', sleep):
+            network = self._network(client_config, cassette.REPLAY_MODE,
+                                    {'name': 'test-network'},
+                                    timing_scale=2)
+            self.assertEqual(network.create().id, network_id)
+            network.resource_id = network_id
+            self.assertEqual(network.get().name, 'test-network')
+            network.delete()
+            self.assertRaises(openstack.exceptions.ResourceNotFound,
+                              network.get)
+
+        recorded = cassette.load_cassette(self.path)
+        self.assertEqual(len(recorded), requests_count)
+        self.assertEqual(sleep.call_count, requests_count)
+        self.assertEqual(
+            sum(call[0][0] for call in sleep.call_args_list),
+            sum(interaction['latency'] * 2 for interaction in recorded))
+
+    def test_replay_missing_interaction(self):
+        client_config, _, _ = self._record()
+        network = self._network(client_config, cassette.REPLAY_MODE,
+                                timing_scale=0)
+        self.assertRaises(cassette.CassetteMissError,
+                          network.find_network, 'missing-network')
+
+    def test_install_cassette_disabled(self):
+        connection = mock.MagicMock()
+        request = connection.session.request
+        cassette.install_cassette(connection, {})
+        cassette.install_cassette(connection, {'cassette': {'mode': 'record'}})
+        self.assertEqual(connection.session.request, request)
@@ -0,0 +1,149 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import unittest
+import mock
+
+# Third party imports
+from keystoneauth1 import exceptions as ks_exceptions
+
+# Local imports
+from openstack_sdk import circuit_breaker
+from openstack_sdk.common import OpenstackResource
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(CircuitBreakerTestCase, self).setUp()
+        self.clock = FakeClock()
+        self.breaker = circuit_breaker.CircuitBreaker(
+            'volume',
+            failure_threshold=3,
+            window=60,
+            slow_call_duration=10,
+            reset_timeout=30,
+            half_open_max_calls=1,
+            clock=self.clock)
+
+    def tearDown(self):
+        circuit_breaker.reset_circuit_breakers()
+        super(CircuitBreakerTestCase, self).tearDown()
+
+    def _fail(self, times=1, duration=0):
+        for _ in range(times):
+            probe = self.breaker.before_call()
+            self.breaker.record_result(probe, True, duration)
+
+    def test_open_after_threshold(self):
+        self._fail(2)
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_CLOSED)
+        self._fail()
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_OPEN)
+
+        self.clock.now += 10
+        with self.assertRaises(
+                circuit_breaker.CircuitBreakerOpenException) as error:
+            self.breaker.before_call()
+        self.assertEqual(error.exception.retry_after, 20)
+        self.assertEqual(error.exception.service_type, 'volume')
+
+    def test_failures_outside_window_are_ignored(self):
+        self._fail(2)
+        self.clock.now += 61
+        self._fail(2)
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_CLOSED)
+
+    def test_slow_calls_are_failures(self):
+        for _ in range(3):
+            probe = self.breaker.before_call()
+            self.breaker.record_result(probe, False, 11)
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_OPEN)
+
+    def test_half_open_probe_success_closes(self):
+        self._fail(3)
+        self.clock.now += 30
+        self.assertTrue(self.breaker.before_call())
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_HALF_OPEN)
+        # Only one probe is allowed at the same time
+        self.assertRaises(circuit_breaker.CircuitBreakerOpenException,
+                          self.breaker.before_call)
+        self.breaker.record_result(True, False, 1)
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_CLOSED)
+        self.assertFalse(self.breaker.before_call())
+
+    def test_half_open_probe_failure_reopens(self):
+        self._fail(3)
+        self.clock.now += 30
+        probe = self.breaker.before_call()
+        self.breaker.record_result(probe, True, 1)
+        self.assertEqual(self.breaker.state, circuit_breaker.STATE_OPEN)
+        self.assertRaises(circuit_breaker.CircuitBreakerOpenException,
+                          self.breaker.before_call)
+
+    def test_install_circuit_breaker_disabled(self):
+        connection = mock.MagicMock()
+        request = connection.session.request
+        circuit_breaker.install_circuit_breaker(connection, {})
+        self.assertEqual(connection.session.request, request)
+
+    def test_install_circuit_breaker(self):
+        def request(url, method, **kwargs):
+            if kwargs['endpoint_filter']['service_type'] == 'volume':
+                raise ks_exceptions.ConnectFailure('timeout')
+            return mock.MagicMock(status_code=200)
+
+        connection = mock.MagicMock()
+        connection.session.request = request
+        circuit_breaker.install_circuit_breaker(connection, {
+            'auth_url': 'test_auth_url',
+            'region_name': 'test_region_name',
+            'circuit_breaker': {
+                'enabled': True,
+                'failure_threshold': 2,
+            }
+        })
+        endpoint_filter = {'endpoint_filter': {'service_type': 'volume'}}
+        for _ in range(2):
+            self.assertRaises(ks_exceptions.ConnectFailure,
+                              connection.session.request,
+                              '/volumes', 'GET', **endpoint_filter)
+
+        self.assertRaises(circuit_breaker.CircuitBreakerOpenException,
+                          connection.session.request,
+                          '/volumes', 'GET', **endpoint_filter)
+
+        # Other services are not affected
+        response = connection.session.request(
+            '/servers', 'GET', endpoint_filter={'service_type': 'compute'})
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch('openstack.connect')
+    def test_circuit_breaker_config_not_passed_to_connection(self,
+                                                             mock_connect):
+        OpenstackResource(client_config={
+            'foo': 'foo',
+            'circuit_breaker': {'enabled': False}
+        })
+        mock_connect.assert_called_with(foo='foo', insecure=False)
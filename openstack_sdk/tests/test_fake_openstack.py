@@ -0,0 +1,129 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import time
+import logging
+import unittest
+
+# Third party imports
+import openstack.exceptions
+
+# Local imports
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+from openstack_sdk.resources.compute import OpenstackServer
+from openstack_sdk.resources.dns_service import OpenstackZone
+from openstack_sdk.resources.manila import OpenstackShareNetwork
+from openstack_sdk.resources.networks import (OpenstackNetwork,
+                                              OpenstackSecurityGroup)
+from openstack_sdk.resources.volume import OpenstackVolume
+
+
+class FakeOpenstackServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(FakeOpenstackServerTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer(page_size=2).start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.logger = logging.getLogger('test_fake_openstack')
+
+    def _resource(self, class_resource, resource_config):
+        return class_resource(client_config=self.fake_openstack.client_config,
+                              resource_config=resource_config,
+                              logger=self.logger)
+
+    def test_network_lifecycle(self):
+        network = self._resource(OpenstackNetwork, {'name': 'test-network'})
+        remote_network = network.create()
+        self.assertEqual(remote_network.status, 'ACTIVE')
+
+        network.resource_id = remote_network.id
+        self.assertEqual(network.get().name, 'test-network')
+        self.assertEqual(network.find_network('test-network').id,
+                         remote_network.id)
+
+        network.delete()
+        self.assertRaises(openstack.exceptions.ResourceNotFound, network.get)
+        self.assertEqual(
+            self.fake_openstack.count_requests('POST', '/auth/tokens'), 1)
+
+    def test_pagination(self):
+        for index in range(5):
+            self._resource(OpenstackNetwork,
+                           {'name': 'network-{0}'.format(index)}).create()
+        self.fake_openstack.reset_requests()
+
+        networks = list(self._resource(OpenstackNetwork, {}).list())
+        self.assertEqual(len(networks), 5)
+        self.assertEqual(
+            self.fake_openstack.count_requests('GET', '/v2.0/networks$'), 3)
+
+    def test_server_status_transitions(self):
+        self.fake_openstack.status_delay = 0.2
+        flavor = self.fake_openstack.add_resource(
+            'compute', 'flavors', {'name': 'test-flavor'})
+        image = self.fake_openstack.add_resource(
+            'image', 'images', {'name': 'test-image', 'status': 'active'})
+        server = self._resource(OpenstackServer, {
+            'name': 'test-server',
+            'flavor_id': flavor['id'],
+            'image_id': image['id']
+        })
+        remote_server = server.create()
+        self.assertEqual(remote_server.status, 'BUILD')
+
+        server.resource_id = remote_server.id
+        self.assertEqual(server.get().status, 'BUILD')
+        time.sleep(0.3)
+        self.assertEqual(server.get().status, 'ACTIVE')
+
+        server.stop()
+        self.assertEqual(server.get().status, 'SHUTOFF')
+
+    def test_services(self):
+        volume = self._resource(OpenstackVolume,
+                                {'name': 'test-volume', 'size': 1})
+        self.assertEqual(volume.create().status, 'creating')
+
+        security_group = self._resource(OpenstackSecurityGroup,
+                                        {'name': 'test-security-group'})
+        self.assertEqual(
+            len(security_group.create().security_group_rules), 2)
+
+        zone = self._resource(OpenstackZone, {
+            'name': 'example.com.',
+            'email': 'admin@example.com'
+        })
+        self.assertEqual(zone.create().status, 'PENDING')
+
+        share_network = self._resource(OpenstackShareNetwork,
+                                       {'name': 'test-share-network'})
+        share_network.resource_id = share_network.create().id
+        self.assertEqual(share_network.get().name, 'test-share-network')
+
+    def test_error_injection_and_latency(self):
+        network = self._resource(OpenstackNetwork, {'name': 'test-network'})
+        network.resource_id = network.create().id
+
+        self.fake_openstack.inject_error(500, method='GET',
+                                         path='/networks/')
+        self.assertRaises(openstack.exceptions.HttpException, network.get)
+        # The error is only injected once
+        self.assertEqual(network.get().name, 'test-network')
+
+        self.fake_openstack.latency = 0.2
+        start = time.time()
+        network.get()
+        self.assertGreaterEqual(time.time() - start, 0.2)
@@ -0,0 +1,54 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import shutil
+import tempfile
+import unittest
+import mock
+
+# Local imports
+from openstack_sdk.file_state import (FileState,
+                                      FileLockUnavailableException)
+
+
+class FileStateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(FileStateTestCase, self).setUp()
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        patcher = mock.patch('tempfile.gettempdir',
+                             return_value=self.tempdir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_save(self):
+        state = FileState('test', default={'items': []})
+        with state.lock():
+            data = state.load()
+            self.assertEqual(data, {'items': []})
+            data['items'].append(1)
+            state.save(data)
+        # The default is not changed by the loaded state
+        self.assertEqual(state.default, {'items': []})
+        self.assertEqual(FileState('test').load(), {'items': [1]})
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    def test_lock_unavailable(self):
+        state = FileState('test')
+        with self.assertRaises(FileLockUnavailableException):
+            with state.lock():
+                pass
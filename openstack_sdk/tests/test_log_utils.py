@@ -0,0 +1,48 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import logging
+import unittest
+import mock
+
+# Local imports
+from openstack_sdk import log_utils
+
+
+class ResourceLoggerTestCase(unittest.TestCase):
+
+    def test_arguments_not_formatted_when_disabled(self):
+        logger = logging.getLogger('test_resource_logger')
+        logger.setLevel(logging.INFO)
+        resource = mock.MagicMock()
+        log_utils.get_resource_logger(logger).debug(
+            'Found server with this result: %s', resource)
+        resource.__str__.assert_not_called()
+
+    def test_large_arguments_truncated(self):
+        logger = mock.MagicMock()
+        resource_logger = log_utils.ResourceLogger(logger, max_length=10)
+        resource_logger.debug('Found server with this result: %s', 'a' * 15)
+        level, msg, arg = logger.log.call_args[0]
+        self.assertEqual(level, logging.DEBUG)
+        self.assertEqual(msg % arg, 'Found server with this result: '
+                                    'aaaaaaaaaa... (5 characters truncated)')
+
+    def test_get_resource_logger(self):
+        self.assertIsNone(log_utils.get_resource_logger(None))
+        resource_logger = log_utils.get_resource_logger(mock.MagicMock())
+        self.assertIs(log_utils.get_resource_logger(resource_logger),
+                      resource_logger)
@@ -0,0 +1,135 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+# Local imports
+from openstack_sdk import metrics
+from openstack_sdk.file_state import FileLockUnavailableException
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(MetricsTestCase, self).setUp()
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        self.now = 1000
+        self.config = metrics.get_metrics_config({
+            'metrics': {
+                'enabled': True,
+                'store_path': os.path.join(self.metrics_dir, 'store.json'),
+                'textfile_path': os.path.join(self.metrics_dir,
+                                              'openstack.prom'),
+                'export_interval': 60
+            }
+        })
+
+    def _update(self, operation='create', duration=0.3):
+        batch = metrics.MetricsBatch()
+        batch.inc(metrics.OPERATIONS_TOTAL,
+                  {'operation': operation, 'outcome': 'success'})
+        batch.observe(metrics.OPERATION_DURATION,
+                      {'operation': operation}, duration)
+        return metrics.update_metrics_store(
+            batch, self.config, clock=lambda: self.now)
+
+    def _read_textfile(self):
+        with open(self.config['textfile_path']) as textfile:
+            return textfile.read()
+
+    def test_default_store_path(self):
+        config = metrics.get_metrics_config(
+            {'metrics': {'store_path': None}})
+        self.assertEqual(config['store_path'],
+                         metrics.DEFAULT_METRICS_CONFIG['store_path'])
+
+    def test_render_textfile(self):
+        batch = metrics.MetricsBatch()
+        batch.inc(metrics.API_REQUESTS_TOTAL,
+                  {'service': 'compute', 'method': 'GET', 'status': '2xx'},
+                  3)
+        batch.observe(metrics.API_REQUEST_DURATION,
+                      {'service': 'compute'}, 0.2)
+        data = {}
+        batch.merge_into(data)
+        textfile = metrics.render_textfile(data)
+
+        self.assertIn(
+            '# TYPE cloudify_openstack_api_requests_total counter\n'
+            'cloudify_openstack_api_requests_total'
+            '{method="GET",service="compute",status="2xx"} 3\n',
+            textfile)
+        self.assertIn(
+            'cloudify_openstack_api_request_duration_seconds_bucket'
+            '{service="compute",le="0.1"} 0\n'
+            'cloudify_openstack_api_request_duration_seconds_bucket'
+            '{service="compute",le="0.25"} 1\n',
+            textfile)
+        self.assertIn(
+            'cloudify_openstack_api_request_duration_seconds_bucket'
+            '{service="compute",le="+Inf"} 1\n'
+            'cloudify_openstack_api_request_duration_seconds_sum'
+            '{service="compute"} 0.2\n'
+            'cloudify_openstack_api_request_duration_seconds_count'
+            '{service="compute"} 1\n',
+            textfile)
+        self.assertNotIn('cloudify_openstack_auth_requests_total', textfile)
+
+    def test_update_metrics_store(self):
+        self.assertTrue(self._update())
+        self.assertIn('cloudify_openstack_operations_total'
+                      '{operation="create",outcome="success"} 1\n',
+                      self._read_textfile())
+
+        # Metrics are aggregated, but the textfile is only exported once
+        # the interval is passed
+        self.now += 30
+        self.assertFalse(self._update(duration=20))
+        self.now += 30
+        self.assertTrue(self._update(operation='delete'))
+
+        textfile = self._read_textfile()
+        self.assertIn('cloudify_openstack_operations_total'
+                      '{operation="create",outcome="success"} 2\n',
+                      textfile)
+        self.assertIn('cloudify_openstack_operations_total'
+                      '{operation="delete",outcome="success"} 1\n',
+                      textfile)
+        self.assertIn('cloudify_openstack_operation_duration_seconds_bucket'
+                      '{operation="create",le="10"} 1\n',
+                      textfile)
+        self.assertIn('cloudify_openstack_operation_duration_seconds_count'
+                      '{operation="create"} 2\n',
+                      textfile)
+
+    def test_update_corrupted_metrics_store(self):
+        with open(self.config['store_path'], 'w') as store:
+            store.write('{')
+        self.assertTrue(self._update())
+        self.assertIn('cloudify_openstack_operations_total'
+                      '{operation="create",outcome="success"} 1\n',
+                      self._read_textfile())
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    def test_update_metrics_store_without_file_locks(self):
+        with self.assertRaises(FileLockUnavailableException):
+            self._update()
+        self.assertFalse(os.path.exists(self.config['store_path']))
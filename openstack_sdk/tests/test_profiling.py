@@ -0,0 +1,82 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import os
+import shutil
+import pstats
+import tempfile
+import unittest
+import tracemalloc
+
+# Third party imports
+import mock
+
+# Local imports
+from openstack_sdk import profiling
+
+
+def _allocate():
+    return [str(index) * 10 for index in range(10000)]
+
+
+class OperationProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(OperationProfilerTestCase, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_write_profile(self):
+        profiler = profiling.OperationProfiler(
+            top=5, output_dir=os.path.join(self.temp_dir, 'profiles'))
+        profiler.start()
+        allocated = _allocate()
+        profiler.stop()
+        self.assertEqual(len(allocated), 10000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        profile_path, summary_path = profiler.write(
+            profiling.get_profile_name(
+                'deployment', 'server_1',
+                'cloudify.interfaces.lifecycle.create'))
+        self.assertEqual(
+            os.path.basename(profile_path),
+            'deployment_server_1_cloudify.interfaces.lifecycle.create.pstats')
+        stats = pstats.Stats(profile_path)
+        self.assertTrue(any(function[2] == '_allocate'
+                            for function in stats.stats))
+        with open(summary_path) as summary_file:
+            summary = summary_file.read()
+        self.assertIn('Top 5 functions by cumulative time', summary)
+        self.assertIn('Top 5 allocations', summary)
+        self.assertIn('test_profiling.py', summary)
+        self.assertGreater(profiler.peak_memory, 0)
+
+    def test_tracemalloc_left_running(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        profiler = profiling.OperationProfiler()
+        profiler.start()
+        profiler.stop()
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_get_profiling_config(self):
+        self.assertFalse(profiling.get_profiling_config({})['enabled'])
+        self.assertTrue(profiling.get_profiling_config(
+            {'profiling': {'enabled': True}})['enabled'])
+        with mock.patch.dict(os.environ,
+                             {profiling.PROFILING_ENV: 'true'}):
+            self.assertTrue(profiling.get_profiling_config({})['enabled'])
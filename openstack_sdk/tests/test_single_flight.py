@@ -0,0 +1,124 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import threading
+import unittest
+import mock
+
+# Local imports
+from openstack_sdk import single_flight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(SingleFlightTestCase, self).setUp()
+        self.now = 1000.0
+        self.single_flight = single_flight.SingleFlight(
+            clock=lambda: self.now)
+
+    def tearDown(self):
+        single_flight._single_flight.clear()
+        super(SingleFlightTestCase, self).tearDown()
+
+    def test_concurrent_calls_are_shared(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'network'
+
+        results = []
+
+        def call():
+            results.append(self.single_flight.do('key', func))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=call) for _ in range(5)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['network'] * 6)
+
+    def test_error_is_not_cached(self):
+        func = mock.MagicMock(side_effect=[ValueError('error'), 'network'])
+        self.assertRaises(ValueError,
+                          self.single_flight.do, 'key', func, ttl=5)
+        self.assertEqual(self.single_flight.do('key', func, ttl=5),
+                         'network')
+
+    def test_result_ttl(self):
+        func = mock.MagicMock(side_effect=['network_1', 'network_2'])
+        self.assertEqual(self.single_flight.do('key', func, ttl=5),
+                         'network_1')
+        self.assertEqual(self.single_flight.do('key', func, ttl=5),
+                         'network_1')
+        self.now += 5
+        self.assertEqual(self.single_flight.do('key', func, ttl=5),
+                         'network_2')
+
+    def test_result_not_cacheable(self):
+        func = mock.MagicMock(side_effect=['network_1', 'network_2'])
+        self.single_flight.do('key', func, ttl=5, cacheable=lambda _: False)
+        self.assertEqual(
+            self.single_flight.do('key', func, ttl=5), 'network_2')
+
+    def test_install_single_flight(self):
+        request = mock.MagicMock(return_value=mock.MagicMock(status_code=200))
+        connection = mock.MagicMock()
+        connection.session.request = request
+        single_flight.install_single_flight(
+            connection,
+            {'single_flight': {'enabled': True, 'ttl': 10}},
+            {'auth_url': 'test_auth_url'})
+
+        endpoint_filter = {'service_type': 'network'}
+        for _ in range(2):
+            connection.session.request(
+                '/networks', 'GET',
+                endpoint_filter=endpoint_filter,
+                params={'name': 'ext'})
+        self.assertEqual(request.call_count, 1)
+
+        # Different query is a different request
+        connection.session.request(
+            '/networks', 'GET',
+            endpoint_filter=endpoint_filter,
+            params={'name': 'int'})
+        self.assertEqual(request.call_count, 2)
+
+        # Write requests are never shared
+        for _ in range(2):
+            connection.session.request(
+                '/networks', 'POST',
+                endpoint_filter=endpoint_filter)
+        self.assertEqual(request.call_count, 4)
+
+    def test_install_single_flight_disabled(self):
+        connection = mock.MagicMock()
+        request = connection.session.request
+        single_flight.install_single_flight(connection, {}, {})
+        self.assertEqual(connection.session.request, request)
@@ -0,0 +1,124 @@
+# #######
+# Copyright (c) 2019 Cloudify Platform Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Standard imports
+import shutil
+import logging
+import tempfile
+import unittest
+import mock
+
+# Local imports
+from openstack_sdk.resources.compute import OpenstackServer
+from openstack_sdk.resources.volume import OpenstackVolume
+from openstack_sdk.status_poller import get_polled_status
+from openstack_sdk.tests.fake_openstack import FakeOpenstackServer
+
+
+class StatusPollerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(StatusPollerTestCase, self).setUp()
+        self.fake_openstack = FakeOpenstackServer(status_delay=60).start()
+        self.addCleanup(self.fake_openstack.stop)
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        patcher = mock.patch('tempfile.gettempdir',
+                             return_value=self.tempdir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 1000.0
+        self.logger = logging.getLogger('test_status_poller')
+
+    def _clock(self):
+        return self.now
+
+    def _resource(self, class_resource, resource_config, enabled=True):
+        client_config = dict(self.fake_openstack.client_config,
+                             status_poller={'enabled': enabled,
+                                            'interval': 10})
+        return class_resource(client_config=client_config,
+                              resource_config=resource_config,
+                              logger=self.logger)
+
+    def _create_servers(self, count):
+        flavor = self.fake_openstack.add_resource(
+            'compute', 'flavors', {'name': 'test-flavor'})
+        image = self.fake_openstack.add_resource(
+            'image', 'images', {'name': 'test-image', 'status': 'active'})
+        servers = []
+        for index in range(count):
+            server = self._resource(OpenstackServer, {
+                'name': 'test-server-{0}'.format(index),
+                'flavor_id': flavor['id'],
+                'image_id': image['id']
+            })
+            server.resource_id = server.create().id
+            servers.append(server)
+        self.fake_openstack.reset_requests()
+        return servers
+
+    def test_servers_share_one_list_request(self):
+        servers = self._create_servers(3)
+        for server in servers:
+            self.assertEqual(get_polled_status(server, clock=self._clock),
+                             'BUILD')
+        self.assertEqual(
+            self.fake_openstack.count_requests('GET', '/servers/detail$'), 1)
+        for server in servers:
+            self.assertEqual(
+                self.fake_openstack.count_requests(
+                    'GET', '/servers/{0}$'.format(server.resource_id)), 0)
+
+    def test_servers_incremental_poll(self):
+        server = self._create_servers(1)[0]
+        get_polled_status(server, clock=self._clock)
+
+        self.now += 10
+        with mock.patch.object(OpenstackServer, 'list',
+                               autospec=True,
+                               side_effect=OpenstackServer.list) as list_:
+            self.assertEqual(get_polled_status(server, clock=self._clock),
+                             'BUILD')
+        query = list_.call_args[1]['query']
+        self.assertEqual(query['changes_since'], '1970-01-01T00:15:40Z')
+        self.assertEqual(
+            self.fake_openstack.count_requests('GET', '/servers/detail$'), 2)
+
+    def test_volumes_full_poll(self):
+        volume = self._resource(OpenstackVolume,
+                                {'name': 'test-volume', 'size': 1})
+        volume.resource_id = volume.create().id
+        self.assertEqual(get_polled_status(volume, clock=self._clock),
+                         'creating')
+
+        self.now += 10
+        with mock.patch.object(OpenstackVolume, 'list',
+                               autospec=True,
+                               side_effect=OpenstackVolume.list) as list_:
+            get_polled_status(volume, clock=self._clock)
+        self.assertEqual(list_.call_args[1]['query'], {})
+
+    def test_disabled(self):
+        server = self._resource(OpenstackServer, {}, enabled=False)
+        server.resource_id = 'a95b5509-c122-4c2f-823e-884bb559afe8'
+        self.assertIsNone(get_polled_status(server, clock=self._clock))
+        self.assertEqual(self.fake_openstack.count_requests(), 0)
+
+    @mock.patch('openstack_sdk.file_state.fcntl', None)
+    def test_file_locks_unavailable(self):
+        server = self._create_servers(1)[0]
+        self.assertIsNone(get_polled_status(server, clock=self._clock))
+        self.assertEqual(self.fake_openstack.count_requests(), 0)